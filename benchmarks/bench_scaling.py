@@ -0,0 +1,341 @@
+"""Scaling benchmarks for the permit hot paths, with a stored baseline.
+
+Each case runs at each scale in a fresh process, on synthetic data from
+benchmarks/synthetic.py (generated once per scale and seed, then reused).
+Each run reports throughput, peak RSS and the RSS growth during the case
+itself (peak minus the RSS after setup). ``--check`` compares throughput
+and RSS growth with benchmarks/baseline.json and exits non-zero on a
+regression.
+``--update-baseline`` records the current numbers; baselines are
+machine-specific, so record one on the machine you compare on.
+
+Usage:
+    python benchmarks/bench_scaling.py [--scales 100k,1M] [--cases explode_zips,...]
+    python benchmarks/bench_scaling.py --check
+    python benchmarks/bench_scaling.py --scales 1M,10M,50M --update-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+SCRIPTS_DIR = ROOT / "data_processing" / "scripts"
+DATA_DIR = BENCH_DIR / ".data"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+DEFAULT_SCALES = "100k,1M"
+DEFAULT_TOLERANCE = 0.25
+RSS_SLACK_MB = 16  # cases that allocate next to nothing still vary by a few pages
+
+
+def _paths():
+    for path in (ROOT, SCRIPTS_DIR, BENCH_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+
+def parse_rows(text):
+    """'100k' -> 100_000, '1M' -> 1_000_000, '2500' -> 2500."""
+    text = text.strip()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def format_rows(rows):
+    for suffix, scale in (("M", 1_000_000), ("k", 1_000)):
+        if rows >= scale and rows % scale == 0:
+            return f"{rows // scale}{suffix}"
+    return str(rows)
+
+
+def dataset(rows, seed, date_format):
+    """Project-style tree with synthetic raw data (reused across runs)."""
+    _paths()
+    from synthetic import generate_raw_data
+
+    root = DATA_DIR / f"{date_format}-{rows}-{seed}"
+    raw_dir = root / "data_processing" / "data" / "raw"
+    if not (raw_dir / "zip_boundaries.geojson").exists():
+        print(f"⏳ Generating {rows:,} synthetic permits ({date_format} dates)...")
+        generate_raw_data(raw_dir, rows, seed, date_format)
+    return root
+
+
+# =====================
+# Cases: setup(root) returns the timed callable; it returns rows processed
+# =====================
+def _records(root):
+    import pandas as pd
+
+    df = pd.read_csv(root / "data_processing" / "data" / "raw" / "film_permits.csv",
+                     usecols=["EventType", "StartDateTime", "ZipCode(s)"], dtype=str)
+    df["zipcode"] = df["ZipCode(s)"].str.split(",", n=1).str[0]
+    return df.rename(columns={"StartDateTime": "date", "EventType": "type"})[
+        ["zipcode", "date", "type"]].to_dict("records")
+
+
+def setup_explode_zips(root):
+    import pandas as pd
+    from zip_explode import explode_zips
+
+    zips = pd.read_csv(root / "data_processing" / "data" / "raw" / "film_permits.csv",
+                       usecols=["ZipCode(s)"], dtype=str)["ZipCode(s)"]
+    return lambda: len(explode_zips(zips, sep=",", zip_length=5).offsets) - 1
+
+
+def setup_map_handler_aggregate(root):
+    from process_permits import MapHandler
+
+    records = _records(root)
+    return lambda: (MapHandler().aggregatePermitData(records), len(records))[1]
+
+
+def setup_map_handler_counts(root):
+    from process_permits import MapHandler
+
+    records = _records(root)
+    return lambda: (MapHandler().aggregatePermitCounts(records), len(records))[1]
+
+
+def setup_validate_permit_data(root):
+    from process_permits import validate_permit_data
+
+    records = _records(root)
+    return lambda: (validate_permit_data(records), len(records))[1]
+
+
+def setup_validate_permit_batch(root):
+    import pandas as pd
+    from process_permits import validate_permit_batch
+
+    df = pd.read_csv(root / "data_processing" / "data" / "raw" / "film_permits.csv", dtype=str)
+    return lambda: validate_permit_batch(df, date_format="%m/%d/%Y %I:%M:%S %p")["rows"]
+
+
+def _expanded(root):
+    import pandas as pd
+    from process_data import USECOLS, WEEKLY_KEYS, expand_permits
+
+    df = pd.read_csv(root / "data_processing" / "data" / "raw" / "film_permits.csv", usecols=USECOLS,
+                     dtype={"ZipCode(s)": str})
+    return expand_permits(df)[0][WEEKLY_KEYS].astype({"EventType": "category"})
+
+
+def setup_aggregate_permits(root):
+    from process_data import aggregate_permits
+
+    expanded = _expanded(root)
+    return lambda: (aggregate_permits(expanded), len(expanded))[1]
+
+
+def setup_aggregate_permits_groupby(root):
+    from process_data import aggregate_permits_groupby
+
+    expanded = _expanded(root)
+    return lambda: (aggregate_permits_groupby(expanded), len(expanded))[1]
+
+
+def _csv_rows(root):
+    with open(root / "data_processing" / "data" / "raw" / "film_permits.csv", "rb") as f:
+        return sum(1 for _ in f) - 1
+
+
+def setup_process_data(root):
+    import process_data
+
+    rows = _csv_rows(root)
+    return lambda: (process_data.process_data(project_root=root), rows)[1]
+
+
+def setup_process_data_chunked(root):
+    import process_data
+
+    rows = _csv_rows(root)
+    return lambda: (process_data.process_data(project_root=root, chunksize=500_000), rows)[1]
+
+
+def setup_process_data_monthly(root):
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(
+        "monthly_process_data", SCRIPTS_DIR / "data_processing" / "process_data.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # The monthly script reads <root>/data/raw
+    data_root = root / "data_processing"
+    rows = _csv_rows(root)
+    return lambda: (module.process_data(project_root=data_root), rows)[1]
+
+
+# name -> (setup, date format of the input, largest scale it is run at)
+CASES = {
+    "explode_zips": (setup_explode_zips, "us", None),
+    "map_handler_aggregate": (setup_map_handler_aggregate, "us", 5_000_000),
+    "map_handler_counts": (setup_map_handler_counts, "us", 5_000_000),
+    "validate_permit_data": (setup_validate_permit_data, "us", 5_000_000),
+    "validate_permit_batch": (setup_validate_permit_batch, "us", 20_000_000),
+    "aggregate_permits": (setup_aggregate_permits, "us", 20_000_000),
+    "aggregate_permits_groupby": (setup_aggregate_permits_groupby, "us", 20_000_000),
+    "process_data": (setup_process_data, "us", 20_000_000),
+    "process_data_chunked": (setup_process_data_chunked, "us", None),
+    "process_data_monthly": (setup_process_data_monthly, "iso", 20_000_000),
+}
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS to the current RSS (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    """Peak RSS since the last reset (VmHWM), or of the whole process where it cannot be reset."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return None
+
+
+def run_case(name, root):
+    """Run one case in the current (fresh) process; returns its measurements."""
+    _paths()
+    import contextlib
+    import io
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    setup = CASES[name][0]
+    func = setup(Path(root))
+    # Measure the case itself, not the setup that loaded its input
+    _reset_peak_rss()
+    rss_before = _rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        rows = func()
+        seconds = time.perf_counter() - started
+    peak = _peak_rss_mb()
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - rss_before, 1) if rss_before is not None else None,
+    }
+
+
+def run_isolated(name, root):
+    """Run a case in a fresh interpreter so peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, name, str(root)).result()
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for results slower or larger than the baseline allows."""
+    problems = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if reference.get("rows_per_second") and result["rows_per_second"] is not None:
+            floor = reference["rows_per_second"] * (1 - tolerance)
+            if result["rows_per_second"] < floor:
+                problems.append(f"{key}: {result['rows_per_second']:,.0f} rows/s "
+                                f"< {floor:,.0f} (baseline {reference['rows_per_second']:,.0f})")
+        # Memory the case itself allocated: the peak also holds the setup's input data
+        if reference.get("rss_growth_mb") is not None and result.get("rss_growth_mb") is not None:
+            ceiling = max(reference["rss_growth_mb"] * (1 + tolerance), reference["rss_growth_mb"] + RSS_SLACK_MB)
+            if result["rss_growth_mb"] > ceiling:
+                problems.append(f"{key}: RSS growth {result['rss_growth_mb']:,.0f} MB "
+                                f"> {ceiling:,.0f} MB (baseline {reference['rss_growth_mb']:,.0f} MB)")
+    return problems
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    merged = {**load_baseline(path), **results}
+    with open(path, "w") as f:
+        json.dump({
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "cpus": multiprocessing.cpu_count()},
+            "results": dict(sorted(merged.items())),
+        }, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the permit hot paths")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated row counts, e.g. 100k,1M,50M")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated case names")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="Fail if slower/larger than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional slowdown / memory growth for --check")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+
+    results = {}
+    print(f"{'case':<26} {'rows':>6} {'seconds':>9} {'rows/s':>13} {'peak MB':>9} {'growth MB':>10}")
+    for rows in map(parse_rows, args.scales.split(",")):
+        for name in names:
+            _, date_format, max_rows = CASES[name]
+            if max_rows is not None and rows > max_rows:
+                continue
+            result = run_isolated(name, dataset(rows, args.seed, date_format))
+            key = f"{name}@{format_rows(rows)}"
+            results[key] = result
+            growth = f"{result['rss_growth_mb']:,.0f}" if result["rss_growth_mb"] is not None else "-"
+            print(f"{name:<26} {format_rows(rows):>6} {result['seconds']:>9.2f} "
+                  f"{result['rows_per_second']:>13,.0f} {result['peak_rss_mb']:>9,.0f} {growth:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"💾 Baseline updated: {BASELINE_PATH}")
+    if args.check:
+        problems = compare(results, load_baseline(), args.tolerance)
+        if problems:
+            print("\n❌ PERFORMANCE REGRESSION")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print(f"\n✅ Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark the vectorized multi-ZIP explode against the per-row versions.
+
+Usage: python benchmarks/bench_zip_explode.py [--rows 1000000] [--seed 0]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data_processing" / "scripts"))
+from zip_explode import explode_zips
+
+
+def make_zip_strings(rows, seed=0):
+    """Synthetic ZipCode(s) column: 1-4 ZIPs per permit, a few blanks."""
+    rng = np.random.default_rng(seed)
+    zips = np.array([f"{z:05d}" for z in range(10001, 11698)])
+    counts = rng.choice([0, 1, 2, 3, 4], size=rows, p=[0.02, 0.55, 0.25, 0.12, 0.06])
+    picks = zips[rng.integers(0, len(zips), size=counts.sum())]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return pd.Series([", ".join(picks[offsets[i]:offsets[i + 1]]) for i in range(rows)])
+
+
+def legacy_weekly(zip_strings):
+    """Per-row strip as in process_data.py before the shared engine."""
+    df = pd.DataFrame({"ZipCode(s)": zip_strings})
+    df["ZipCode(s)"] = df["ZipCode(s)"].astype(str).str.split(",").apply(lambda x: [z.strip() for z in x])
+    expanded = df.explode("ZipCode(s)", ignore_index=True)
+    return expanded[expanded["ZipCode(s)"].str.len() == 5]
+
+
+def legacy_weighted(zip_strings):
+    """Per-row strip and per-row .loc weight lookup as in the monthly script."""
+    df = pd.DataFrame({"ZIPs": zip_strings})
+    df["ZIPs"] = df["ZIPs"].fillna("").apply(lambda s: [z.strip() for z in str(s).split(", ") if z.strip()])
+    df = df[df["ZIPs"].apply(len) > 0]
+    expanded = df.explode("ZIPs", ignore_index=False)
+    expanded["num_zips"] = expanded.index.map(lambda idx: len(df.loc[idx, "ZIPs"]))
+    expanded["weight"] = 1 / expanded["num_zips"]
+    return expanded
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.3f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} synthetic ZIP strings...")
+    zip_strings = make_zip_strings(args.rows, args.seed)
+
+    print("\n=== 5-digit explode (process_data.py) ===")
+    legacy, legacy_time = timed("legacy .apply strip", legacy_weekly, zip_strings)
+    engine, engine_time = timed("explode_zips", explode_zips, zip_strings, ",", 5)
+    assert list(legacy["ZipCode(s)"]) == list(engine.zip)
+    print(f"Speedup: {legacy_time / engine_time:.1f}x")
+
+    print("\n=== Weighted explode (data_processing/process_data.py) ===")
+    legacy, legacy_time = timed("legacy .apply + index.map(.loc)", legacy_weighted, zip_strings)
+    engine, engine_time = timed("explode_zips", explode_zips, zip_strings, ", ", None)
+    assert np.allclose(legacy["weight"].to_numpy(), engine.weight)
+    print(f"Speedup: {legacy_time / engine_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
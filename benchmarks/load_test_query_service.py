@@ -0,0 +1,164 @@
+"""Load test for query_service.py.
+
+Processes a synthetic dataset (benchmarks/synthetic.py), starts the service
+in a subprocess pinned to one core, and drives it with concurrent keep-alive
+connections. Requests mix week ranges, type subsets and ZIP subsets drawn
+from a pool, so some repeat (LRU hits). A share of them revalidate with
+If-None-Match (304s). Reports requests/s and latency percentiles, and exits
+1 if throughput is below --min-rps.
+
+Usage: python benchmarks/load_test_query_service.py [--rows 1M] [--requests 5000]
+           [--connections 16] [--min-rps 300]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "data_processing" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+from bench_scaling import dataset, parse_rows  # noqa: E402
+from permit_cube import MANIFEST_FILE, PermitCube  # noqa: E402
+
+
+def processed_dir_for(rows, seed):
+    root = dataset(rows, seed, "us")
+    processed = root / "data_processing" / "data" / "processed"
+    if not (processed / MANIFEST_FILE).exists():
+        import process_data
+        print("🔧 Processing synthetic permits...")
+        process_data.process_data(project_root=root, chunksize=500_000)
+    return processed
+
+
+def query_pool(cube, size, seed):
+    """Distinct /counts targets resembling map interactions."""
+    rng = random.Random(seed)
+    weeks = len(cube.weeks)
+    pool = []
+    for _ in range(size):
+        params = {}
+        kind = rng.random()
+        if kind < 0.6:  # slider on one week
+            params["weeks"] = str(rng.randrange(weeks))
+        elif kind < 0.9:  # a range
+            start = rng.randrange(weeks)
+            params["weeks"] = f"{start}..{min(weeks - 1, start + rng.randrange(1, 52))}"
+        types = rng.sample(cube.types, rng.randint(1, len(cube.types)))
+        if len(types) < len(cube.types):
+            params["types"] = ",".join(types)
+        if rng.random() < 0.2:
+            params["zips"] = ",".join(rng.sample(cube.zips, min(len(cube.zips), 10)))
+        pool.append("/counts?" + urlencode(params))
+    return pool
+
+
+async def _request(reader, writer, target, etag=None):
+    lines = [f"GET {target} HTTP/1.1", "Host: localhost"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("etag")
+
+
+async def run_load(port, pool, requests, connections, revalidate_share, seed):
+    rng = random.Random(seed)
+    etags = {}
+    latencies = []
+    statuses = {}
+    per_connection = [requests // connections + (i < requests % connections) for i in range(connections)]
+
+    async def worker(count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            for _ in range(count):
+                target = rng.choice(pool)
+                etag = etags.get(target) if rng.random() < revalidate_share else None
+                started = time.perf_counter()
+                status, new_etag = await _request(reader, writer, target, etag)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+                if new_etag:
+                    etags[target] = new_etag
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(count) for count in per_connection))
+    return time.perf_counter() - started, np.asarray(latencies), statuses
+
+
+def start_service(processed_dir, port, cache_size):
+    def pin_to_one_core():
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / "query_service.py"), "--processed-dir", str(processed_dir),
+         "--port", str(port), "--cache-size", str(cache_size)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, preexec_fn=pin_to_one_core,
+    )
+    process.stdout.readline()  # the "Serving" line: listening
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the permit query service")
+    parser.add_argument("--rows", default="1M", help="Synthetic permits behind the service")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--pool", type=int, default=500, help="Distinct filter combinations")
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--revalidate", type=float, default=0.3, help="Share of requests sending If-None-Match")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--min-rps", type=float, default=300)
+    args = parser.parse_args()
+
+    processed_dir = processed_dir_for(parse_rows(args.rows), args.seed)
+    cube = PermitCube.load(processed_dir)
+    pool = query_pool(cube, args.pool, args.seed)
+
+    process = start_service(processed_dir, args.port, args.cache_size)
+    try:
+        print(f"⏳ {args.requests:,} requests over {args.connections} connections "
+              f"({len(cube.zips)} ZIPs x {len(cube.weeks)} weeks x {len(cube.types)} types)...")
+        seconds, latencies, statuses = asyncio.run(
+            run_load(args.port, pool, args.requests, args.connections, args.revalidate, args.seed))
+    finally:
+        process.terminate()
+        process.wait()
+
+    rps = args.requests / seconds
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"Throughput: {rps:,.0f} requests/s ({seconds:.2f}s)")
+    print(f"Latency: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+    print("Statuses: " + ", ".join(f"{status}: {count:,}" for status, count in sorted(statuses.items())))
+    if rps < args.min_rps:
+        print(f"❌ Below {args.min_rps:,.0f} requests/s")
+        sys.exit(1)
+    print(f"✅ Above {args.min_rps:,.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
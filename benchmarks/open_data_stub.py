@@ -0,0 +1,160 @@
+"""Local stand-in for the NYC Open Data (SODA) film permits endpoint.
+
+Serves permit rows the way the real endpoint does for the queries
+open_data.py sends: ``$select=count(*) AS n``, and ``$select=:*, *`` pages
+ordered by ``:id`` with ``$limit``/``$offset``, filtered by a ``$where`` on
+``:updated_at``. Fields use the SODA names and ISO dates. Requests are
+logged, and failures (HTTP status per page offset) and per-request latency
+can be injected, so syncs can be tested and benchmarked with no network.
+
+Run as a script it benchmarks full syncs of synthetic permits through the
+stub at several connection counts.
+
+Usage: python benchmarks/open_data_stub.py [--rows 200000] [--page-size 10000]
+           [--latency 0.05] [--connections 1,4,16]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "data_processing" / "scripts"))
+from open_data import DATE_COLUMNS, FIELD_NAMES, OpenDataClient, sync  # noqa: E402
+from process_data import DATE_FORMAT  # noqa: E402
+
+SODA_NAMES = {export: soda for soda, export in FIELD_NAMES.items()}
+RESOURCE_PATH = "/resource/tg4x-b46p.csv"
+WHERE_CLAUSE = re.compile(r":updated_at\s*(>|<=)\s*'([^']*)'")
+
+
+def to_soda(rows: pd.DataFrame) -> pd.DataFrame:
+    """Permit rows in the manual export layout, renamed and re-dated like the SODA CSV."""
+    rows = rows.astype(str)
+    for column in DATE_COLUMNS:
+        if column in rows:
+            parsed = pd.to_datetime(rows[column], format=DATE_FORMAT, errors="coerce")
+            rows[column] = parsed.dt.strftime("%Y-%m-%dT%H:%M:%S.000").where(parsed.notna(), rows[column])
+    return rows.rename(columns=SODA_NAMES)
+
+
+class OpenDataStub:
+    def __init__(self, latency=0.0):
+        self.rows = pd.DataFrame()
+        self.latency = latency
+        self.requests = []        # parsed query of every request, in arrival order
+        self.failures = {}        # page offset -> list of statuses to answer before succeeding
+        self._lock = threading.Lock()
+        self._server = None
+
+    def upsert(self, rows: pd.DataFrame, updated_at: str) -> None:
+        """Add or replace permits (by EventID), stamped with ``updated_at``."""
+        soda = to_soda(rows)
+        with self._lock:
+            if len(self.rows):
+                kept = self.rows[~self.rows["eventid"].isin(soda["eventid"])]
+                next_id = self.rows[":id"].max() + 1
+            else:
+                kept, next_id = self.rows, 0
+            soda.insert(0, ":updated_at", updated_at)
+            soda.insert(0, ":id", np.arange(next_id, next_id + len(soda)))
+            self.rows = pd.concat([kept, soda], ignore_index=True)
+
+    def fail(self, offset: int, *statuses: int) -> None:
+        self.failures.setdefault(offset, []).extend(statuses)
+
+    def _select(self, where: str) -> pd.DataFrame:
+        with self._lock:
+            rows = self.rows
+        for op, value in WHERE_CLAUSE.findall(where):
+            rows = rows[rows[":updated_at"] > value] if op == ">" else rows[rows[":updated_at"] <= value]
+        return rows.sort_values(":id")
+
+    def respond(self, query: dict):
+        """(status, CSV body) for one parsed query string."""
+        self.requests.append(query)
+        if self.latency:
+            time.sleep(self.latency)
+        rows = self._select(query.get("$where", ""))
+        if query.get("$select") == "count(*) AS n":
+            return 200, f'"n"\n"{len(rows)}"\n'
+        offset, limit = int(query.get("$offset", 0)), int(query.get("$limit", 1000))
+        with self._lock:
+            pending = self.failures.get(offset)
+            if pending:
+                return pending.pop(0), "error"
+        return 200, rows.iloc[offset:offset + limit].to_csv(index=False)
+
+    def start(self, host="127.0.0.1", port=0) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != RESOURCE_PATH:
+                    self.send_error(404)
+                    return
+                status, body = stub.respond({k: v[0] for k, v in parse_qs(url.query).items()})
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/csv; charset=UTF-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}{RESOURCE_PATH}"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        self.url = self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    from bench_scaling import parse_rows
+    from synthetic import generate_permits
+
+    parser = argparse.ArgumentParser(description="Benchmark open_data.py syncs against a local stub")
+    parser.add_argument("--rows", type=parse_rows, default=200_000)
+    parser.add_argument("--page-size", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument("--connections", default="1,4,16")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, OpenDataStub(args.latency) as stub:
+        print(f"⏳ Serving {args.rows:,} synthetic permits...")
+        stub.upsert(pd.read_csv(generate_permits(Path(tmp) / "source.csv", args.rows), dtype=str),
+                    "2024-01-01T00:00:00.000Z")
+        for connections in map(int, args.connections.split(",")):
+            raw_dir = Path(tmp) / f"raw-{connections}"
+            client = OpenDataClient(stub.url, args.page_size, connections, backoff=0)
+            start = time.perf_counter()
+            asyncio.run(sync(raw_dir, client))
+            elapsed = time.perf_counter() - start
+            print(f"   {connections:>3} connections: {elapsed:6.2f}s, {args.rows / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
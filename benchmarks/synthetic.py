@@ -0,0 +1,205 @@
+"""Seeded synthetic film_permits.csv and zip_boundaries.geojson.
+
+The permits mimic the NYC Open Data extract: the same columns, multi-ZIP
+strings ("10001, 10002, 10003") with a few blanks and malformed ZIPs, a small
+share of unparseable dates, a Zipf-like ZIP popularity skew (a handful of ZIPs
+get most shoots) and a skewed EventType mix. Boundaries are a grid of
+square ZIPs carrying both ``postalCode`` (process_data.py) and ``ZIP_CODE``
+(data_processing/process_data.py).
+
+Rows are written in chunks, so tens of millions of rows can be generated
+without holding them in memory.
+
+Usage: python benchmarks/synthetic.py OUT_DIR [--rows 1000000] [--seed 0] [--date-format us|iso]
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Date formats accepted by process_data.py and data_processing/process_data.py
+DATE_FORMATS = {
+    "us": "%m/%d/%Y %I:%M:%S %p",
+    "iso": "%Y-%m-%d %H:%M:%S",
+}
+
+EVENT_TYPES = {
+    "Shooting Permit": 0.80,
+    "Theater Load in and Load Outs": 0.09,
+    "Rigging Permit": 0.06,
+    "DCAS Prep/Shoot/Wrap Permit": 0.04,
+    "Special Event": 0.01,
+}
+BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island"]
+
+# ZIPs per permit: mostly one, long tail up to six
+ZIPS_PER_PERMIT = [1, 2, 3, 4, 5, 6]
+ZIPS_PER_PERMIT_P = [0.58, 0.22, 0.10, 0.05, 0.03, 0.02]
+
+# ParkingHeld: 1-3 "AVENUE between W n ST and W n+1 ST" segments per permit,
+# spelled like the extract does ("7 AVENUE", "WEST 44 STREET", "W 44 ST")
+AVENUES = ["1 AVENUE", "2 AVENUE", "3 AVENUE", "LEXINGTON AVENUE", "PARK AVENUE", "MADISON AVENUE",
+           "5 AVENUE", "6 AVENUE", "7 AVENUE", "BROADWAY", "8 AVENUE", "9 AVENUE", "10 AVENUE",
+           "11 AVENUE", "12 AVENUE"]
+CROSS_STREET_SPELLINGS = ["W {} ST", "WEST {} STREET", "W {} STREET"]
+
+BLANK_ZIP_RATE = 0.01
+MALFORMED_ZIP_RATE = 0.005
+BAD_DATE_RATE = 0.002
+
+CHUNK_ROWS = 500_000
+GRID_ORIGIN = (-74.05, 40.55)
+GRID_STEP = 0.01
+
+
+def zip_codes(count=180):
+    """ZIP codes for the synthetic city, spread over the real NYC ranges."""
+    ranges = [(10001, 10282), (10301, 10314), (10451, 10475), (11201, 11256), (11354, 11697)]
+    pool = np.concatenate([np.arange(lo, hi + 1) for lo, hi in ranges])
+    picks = np.linspace(0, len(pool) - 1, count).astype(int)
+    return [f"{z:05d}" for z in pool[picks]]
+
+
+def zip_weights(count, rng):
+    """Zipf-like popularity: a few ZIPs dominate, shuffled across the grid."""
+    weights = 1 / np.arange(1, count + 1) ** 1.1
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _zip_strings(rng, rows, zips, weights):
+    counts = rng.choice(ZIPS_PER_PERMIT, size=rows, p=ZIPS_PER_PERMIT_P)
+    # A permit covers a popular ZIP and the ones after it (distinct, like a street run)
+    first = np.repeat(rng.choice(len(zips), size=rows, p=weights), counts)
+    step = np.arange(int(counts.sum())) - np.repeat(np.r_[0, np.cumsum(counts)[:-1]], counts)
+    picks = np.asarray(zips, dtype=object)[(first + step) % len(zips)]
+    malformed = rng.random(len(picks)) < MALFORMED_ZIP_RATE
+    picks[malformed] = [z[:4] for z in picks[malformed]]
+
+    offsets = np.r_[0, np.cumsum(counts)]
+    flat = picks.tolist()
+    strings = np.array([", ".join(flat[offsets[i]:offsets[i + 1]]) for i in range(rows)], dtype=object)
+    strings[rng.random(rows) < BLANK_ZIP_RATE] = ""
+    return strings
+
+
+def _format_minutes(minutes, epoch, date_format):
+    """Format minute offsets from ``epoch``.
+
+    strftime per row dominates generation time, so each distinct day and
+    minute-of-day is formatted once and the parts are joined by lookup.
+    """
+    date_fmt, _, time_fmt = date_format.partition(" ")
+    if not time_fmt:
+        return (epoch + pd.to_timedelta(minutes, unit="m")).strftime(date_format).to_numpy(dtype=object)
+    day, minute = np.divmod(minutes, 24 * 60)
+    first_day = int(day.min())
+    days = pd.date_range(epoch + pd.Timedelta(days=first_day), periods=int(day.max()) - first_day + 1, freq="D")
+    day_text = (days.strftime(date_fmt) + " ").to_numpy(dtype=object)
+    time_text = pd.date_range("2000-01-01", periods=24 * 60, freq="min").strftime(time_fmt).to_numpy(dtype=object)
+    return day_text[day - first_day] + time_text[minute]
+
+
+def _parking_held(event_ids):
+    """Street segments for each permit, derived from its EventID (not the RNG stream)."""
+    mixed = (event_ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+    segments = 1 + (mixed % np.uint64(3)).astype(int)
+    avenue = (mixed // np.uint64(3) % np.uint64(len(AVENUES))).astype(int)
+    street = 1 + (mixed // np.uint64(64) % np.uint64(110)).astype(int)
+    spelling = (mixed // np.uint64(8192) % np.uint64(len(CROSS_STREET_SPELLINGS))).astype(int)
+    texts = []
+    for count, ave, st, spell in zip(segments, avenue, street, spelling):
+        cross = CROSS_STREET_SPELLINGS[spell]
+        texts.append(",  ".join(
+            f"{AVENUES[(ave + i) % len(AVENUES)]} between {cross.format(st)} and {cross.format(st + 1)}"
+            for i in range(count)
+        ))
+    return np.asarray(texts, dtype=object)
+
+
+def permits_chunk(rng, start_id, rows, zips, weights, date_format, start="2018-01-01", days=6 * 365):
+    """One chunk of synthetic permit rows as a DataFrame."""
+    types = list(EVENT_TYPES)
+    epoch = pd.Timestamp(start)
+    starts = rng.integers(7 * 24 * 60, days * 24 * 60, size=rows)
+    ends = starts + rng.integers(1, 72, size=rows) * 60
+
+    start_text = _format_minutes(starts, epoch, date_format)
+    start_text[rng.random(rows) < BAD_DATE_RATE] = "not a date"
+    return pd.DataFrame({
+        "EventID": np.arange(start_id, start_id + rows),
+        "EventType": np.asarray(types, dtype=object)[rng.choice(len(types), size=rows, p=list(EVENT_TYPES.values()))],
+        "StartDateTime": start_text,
+        "EndDateTime": _format_minutes(ends, epoch, date_format),
+        "EnteredOn": _format_minutes(starts - 7 * 24 * 60, epoch, date_format),
+        "EventAgency": "Mayor's Office of Media & Entertainment",
+        "ParkingHeld": _parking_held(np.arange(start_id, start_id + rows)),
+        "Borough": np.asarray(BOROUGHS, dtype=object)[rng.integers(0, len(BOROUGHS), size=rows)],
+        "ZipCode(s)": _zip_strings(rng, rows, zips, weights),
+    })
+
+
+def generate_permits(path, rows, seed=0, date_format="us", zips=None, chunk_rows=CHUNK_ROWS):
+    """Write ``rows`` synthetic permits to ``path`` (CSV); same seed, same file."""
+    rng = np.random.default_rng(seed)
+    zips = zips or zip_codes()
+    weights = zip_weights(len(zips), rng)
+    fmt = DATE_FORMATS.get(date_format, date_format)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        for start_id in range(0, rows, chunk_rows):
+            chunk = permits_chunk(rng, start_id + 1, min(chunk_rows, rows - start_id), zips, weights, fmt)
+            chunk.to_csv(f, index=False, header=start_id == 0)
+    return path
+
+
+def generate_boundaries(path, zips=None):
+    """Write a grid of square ZIP polygons as GeoJSON."""
+    zips = zips or zip_codes()
+    columns = int(np.ceil(np.sqrt(len(zips))))
+    features = []
+    for i, zip_code in enumerate(zips):
+        x = GRID_ORIGIN[0] + (i % columns) * GRID_STEP
+        y = GRID_ORIGIN[1] + (i // columns) * GRID_STEP
+        ring = [[x, y], [x + GRID_STEP, y], [x + GRID_STEP, y + GRID_STEP], [x, y + GRID_STEP], [x, y]]
+        features.append({
+            "type": "Feature",
+            "properties": {"postalCode": zip_code, "ZIP_CODE": zip_code, "borough": BOROUGHS[i % len(BOROUGHS)]},
+            "geometry": {"type": "Polygon", "coordinates": [[[round(v, 6) for v in p] for p in ring]]},
+        })
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return path
+
+
+def generate_raw_data(raw_dir, rows, seed=0, date_format="us"):
+    """film_permits.csv and zip_boundaries.geojson in ``raw_dir``."""
+    raw_dir = Path(raw_dir)
+    zips = zip_codes()
+    generate_permits(raw_dir / "film_permits.csv", rows, seed, date_format, zips)
+    generate_boundaries(raw_dir / "zip_boundaries.geojson", zips)
+    return raw_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NYC film permit data")
+    parser.add_argument("out_dir", type=Path, help="Directory for film_permits.csv and zip_boundaries.geojson")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--date-format", default="us", choices=sorted(DATE_FORMATS))
+    args = parser.parse_args()
+
+    print(f"⏳ Generating {args.rows:,} permits (seed {args.seed})...")
+    generate_raw_data(args.out_dir, args.rows, args.seed, args.date_format)
+    print(f"✅ Wrote {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the pipeline scripts importable from the tests
+sys.path.insert(0, str(Path(__file__).parent / "data_processing" / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+CSV = """EventID,EventType,StartDateTime,EndDateTime,ZipCode(s)
+1,Shooting Permit,01/02/2023 07:00:00 AM,01/02/2023 09:00:00 PM,"10001, 10002"
+2,Shooting Permit,01/03/2023 07:00:00 AM,01/03/2023 09:00:00 PM,10001
+3,Rigging Permit,01/10/2023 07:00:00 AM,01/11/2023 09:00:00 PM,"10002,10003, 10004"
+4,Rigging Permit,not a date,01/11/2023 09:00:00 PM,10001
+5,Theater Load in and Load Outs,02/01/2023 06:00:00 PM,02/02/2023 01:00:00 AM,
+6,Shooting Permit,02/01/2023 06:00:00 PM,02/02/2023 01:00:00 AM,"10001, 1000"
+"""
+
+
+@pytest.fixture
+def permits_csv(tmp_path):
+    """Fixture writing a small raw permits CSV with multi-ZIP and invalid rows"""
+    path = tmp_path / "film_permits.csv"
+    path.write_text(CSV)
+    return path
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    """Fixture laying out a project tree with the raw permits and four square ZIP boundaries"""
+    import json
+
+    raw_dir = tmp_path / "data_processing" / "data" / "raw"
+    raw_dir.mkdir(parents=True)
+    (raw_dir / "film_permits.csv").write_text(CSV)
+    features = []
+    for i, zip_code in enumerate(["10001", "10002", "10003", "10004"]):
+        x, y = -74.0 + (i % 2) * 0.01, 40.7 + (i // 2) * 0.01
+        ring = [[x, y], [x + 0.01, y], [x + 0.01, y + 0.01], [x, y + 0.01], [x, y]]
+        features.append({"type": "Feature", "properties": {"postalCode": zip_code},
+                         "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    with open(raw_dir / "zip_boundaries.geojson", "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return tmp_path
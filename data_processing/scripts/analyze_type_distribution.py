@@ -1,19 +1,17 @@
-import json
 import pandas as pd
 import numpy as np
 from collections import Counter
+import sys
 
-def analyze_type_distribution():
-    # Read the JSON file
-    with open('../data_processing/data/processed/total_by_type.json', 'r') as f:
-        data = json.load(f)
-    
-    # Convert to DataFrame for easier analysis
-    df = pd.DataFrame(data)
+from column_store import load_processed_frame
+
+def analyze_type_distribution(use_cache=True):
+    # Read the JSON file (memory-mapped from the column store when current)
+    df = load_processed_frame('../data_processing/data/processed/total_by_type.json', use_cache)
     
     # Basic statistics
     print("\n=== Basic Statistics ===")
-    total_types = len(data)
+    total_types = len(df)
     print(f"Total number of types: {total_types}")
     
     if 'count' in df.columns:
@@ -38,4 +36,4 @@ def analyze_type_distribution():
             print(f"Group {i+1}: {left:.2f} to {right:.2f}")
 
 if __name__ == "__main__":
-    analyze_type_distribution()
+    analyze_type_distribution(use_cache='--no-cache' not in sys.argv)
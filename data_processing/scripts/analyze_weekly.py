@@ -1,20 +1,18 @@
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 from pathlib import Path
 import sys
 
-def analyze_weekly_data(file_path):
+from column_store import load_processed_frame
+
+def analyze_weekly_data(file_path, use_cache=True, histogram_path=None):
     """Analyze weekly permit data and suggest binning thresholds"""
-    # Load data
-    with open(file_path) as f:
-        data = json.load(f)
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    import matplotlib.pyplot as plt
+
+    # Load data (memory-mapped from the column store when current)
+    df = load_processed_frame(file_path, use_cache)
     
     # Aggregate permits per ZIP per week
-    weekly_agg = df.groupby(['year', 'week', 'ZipCode(s)'])['permit_count'].sum().reset_index()
+    weekly_agg = df.groupby(['year', 'week', 'ZipCode(s)'], observed=True)['permit_count'].sum().reset_index()
     
     # Basic stats
     print("=== Weekly Permit Count Statistics ===")
@@ -35,22 +33,36 @@ def analyze_weekly_data(file_path):
     plt.grid(True)
     
     # Save histogram
-    output_dir = Path(file_path).parent.parent / 'reports'
-    output_dir.mkdir(exist_ok=True)
-    plt.savefig(output_dir / 'weekly_permits_histogram.png')
-    print(f"\nHistogram saved to: {output_dir / 'weekly_permits_histogram.png'}")
+    histogram_path = Path(histogram_path or Path(file_path).parent.parent / 'reports' / 'weekly_permits_histogram.png')
+    histogram_path.parent.mkdir(exist_ok=True)
+    plt.savefig(histogram_path)
+    print(f"\nHistogram saved to: {histogram_path}")
+
+def main(argv=None, processed_dir=None):
+    parser = argparse.ArgumentParser(prog='analyze_weekly.py', description='Weekly permit count statistics')
+    parser.add_argument('weekly_json', nargs='?', type=Path, help='weekly_permits.json to analyze')
+    parser.add_argument('--no-cache', action='store_true', help='Parse the JSON without the permit cache')
+    parser.add_argument('--preview', action='store_true',
+                        help='Read the sampled estimates written by process_data.py --sample')
+    args = parser.parse_args(argv)
 
-if __name__ == "__main__":
     # Default path relative to the script location
-    default_path = Path(__file__).parent.parent / 'data' / 'processed' / 'weekly_permits.json'
+    processed_dir = Path(processed_dir or Path(__file__).parent.parent / 'data' / 'processed')
+    # --preview reads the sampled estimates written by process_data.py --sample
+    default_path = processed_dir / ('preview' if args.preview else '') / 'weekly_permits.json'
+    histogram_path = None
+    if args.preview:
+        histogram_path = processed_dir.parent / 'reports' / 'weekly_permits_histogram_preview.png'
     
     # Use command line argument if provided, otherwise use default path
-    file_path = Path(sys.argv[1]) if len(sys.argv) > 1 else default_path
+    file_path = args.weekly_json or default_path
     
     if not file_path.exists():
         print(f"Error: File not found at {file_path}")
-        print(f"Usage: python analyze_weekly.py [path_to_weekly_permits.json]")
+        parser.print_usage()
         sys.exit(1)
     
-    analyze_weekly_data(file_path)
+    analyze_weekly_data(file_path, use_cache=not args.no_cache, histogram_path=histogram_path)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compact binary encoding for the records-style aggregate outputs.
+
+weekly_permits.json and total_by_type.json repeat every key and every ZIP /
+EventType string on each row. The binary form stores instead:
+
+  <name>.bin            one little-endian typed array per column, each
+                        starting on an 8-byte boundary
+  <name>.manifest.json  row count, and per column its dtype, byte offset
+                        and (for string columns) the dictionary the integer
+                        codes index into
+
+String columns are dictionary-encoded (uint16 codes), year/week are uint16
+and counts uint32, matching what the browser reads with typed arrays.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+# Column dtypes for the known outputs; unlisted columns default by kind
+COLUMN_DTYPES = {
+    "year": "uint16",
+    "week": "uint16",
+    "permit_count": "uint32",
+    "type_count": "uint32",
+    "total_permits": "uint32",
+    "active_permits": "uint32",
+}
+CODE_DTYPE = "uint16"
+
+
+def manifest_path(output_dir: Path, name: str) -> Path:
+    return Path(output_dir) / f"{name}.manifest.json"
+
+
+def write_binary(df: pd.DataFrame, output_dir: Path, name: str) -> Path:
+    """Write ``df`` as <name>.bin plus <name>.manifest.json; returns the manifest path."""
+    output_dir = Path(output_dir)
+    columns = []
+    offset = 0
+    # Both files go to temporary names and are moved into place, the manifest
+    # last, so a reader never pairs a new .bin with an old manifest
+    data_tmp = output_dir / f"{name}.bin.tmp"
+    with open(data_tmp, "wb") as f:
+        for column in df.columns:
+            values = df[column]
+            spec = {"name": column}
+            if values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+                codes, dictionary = pd.factorize(values.astype(str), sort=True)
+                if len(dictionary) > np.iinfo(CODE_DTYPE).max:
+                    raise ValueError(f"Too many distinct values in {column} for {CODE_DTYPE} codes")
+                spec["dictionary"] = dictionary.tolist()
+                data = codes.astype(CODE_DTYPE)
+                spec["dtype"] = CODE_DTYPE
+            else:
+                is_float = values.dtype.kind == "f"
+                dtype = COLUMN_DTYPES.get(column, "float64" if is_float else "int32")
+                data = values.to_numpy(dtype="float64" if is_float else "int64")
+                if dtype.startswith("uint") and len(data) and (data.min() < 0 or data.max() > np.iinfo(dtype).max):
+                    raise ValueError(f"Values in {column} do not fit {dtype}")
+                data = data.astype(dtype)
+                spec["dtype"] = dtype
+
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            raw = data.astype(np.dtype(spec["dtype"]).newbyteorder("<")).tobytes()
+            f.write(raw)
+            spec["offset"] = offset
+            offset += len(raw)
+            columns.append(spec)
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "rows": len(df),
+        "data": f"{name}.bin",
+        "columns": columns,
+    }
+    path = manifest_path(output_dir, name)
+    manifest_tmp = path.with_name(path.name + ".tmp")
+    with open(manifest_tmp, "w") as f:
+        json.dump(manifest, f)
+    data_tmp.replace(output_dir / f"{name}.bin")
+    manifest_tmp.replace(path)
+    return path
+
+
+def read_binary(output_dir: Path, name: str) -> pd.DataFrame:
+    """Read a table written by ``write_binary`` back into a DataFrame."""
+    output_dir = Path(output_dir)
+    with open(manifest_path(output_dir, name)) as f:
+        manifest = json.load(f)
+    if manifest["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary format version: {manifest['version']}")
+
+    buffer = np.fromfile(output_dir / manifest["data"], dtype=np.uint8)
+    rows = manifest["rows"]
+    data = {}
+    for spec in manifest["columns"]:
+        dtype = np.dtype(spec["dtype"]).newbyteorder("<")
+        values = np.frombuffer(buffer, dtype=dtype, count=rows, offset=spec["offset"])
+        if "dictionary" in spec:
+            data[spec["name"]] = np.asarray(spec["dictionary"], dtype=object)[values]
+        else:
+            data[spec["name"]] = values.astype(np.int64 if dtype.kind in "ui" else np.float64)
+    return pd.DataFrame(data, columns=[spec["name"] for spec in manifest["columns"]])
@@ -0,0 +1,327 @@
+"""Multi-resolution, topology-preserving boundary export (TopoJSON).
+
+zip_permits.geojson stores every ZIP polygon at full resolution and full
+float precision, so each border between two ZIPs is written (and drawn)
+twice. This module writes the same features as TopoJSON instead:
+
+  - coordinates are quantized to an integer grid over the data bounds
+  - rings are cut at junctions into arcs, and an arc shared by two
+    neighbouring ZIPs is stored once (referenced reversed by the other)
+  - each zoom range gets its own file, with arcs simplified for that
+    zoom's pixel size; since shared arcs are simplified once, neighbours
+    never drift apart and no slivers or gaps appear
+
+Files are named ``<name>.z<min>-<max>.topojson`` and listed, with their
+size and vertex count, in ``<name>.levels.json`` for the map.
+"""
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import shapely
+
+QUANTIZATION = 100_000
+OBJECT_NAME = "zips"
+
+# Simplification tolerance in screen pixels at the low end of each zoom range
+PIXEL_TOLERANCE = 0.5
+TILE_SIZE = 256
+
+DEFAULT_MIN_ZOOM = 10
+DEFAULT_MAX_ZOOM = 18
+ZOOM_STEP = 2
+
+
+def read_map_zoom(config_path: Path):
+    """(minZoom, maxZoom) from the map's config.js, or the defaults."""
+    try:
+        text = Path(config_path).read_text()
+    except OSError:
+        return DEFAULT_MIN_ZOOM, DEFAULT_MAX_ZOOM
+    min_zoom = re.search(r"minZoom:\s*(\d+)", text)
+    max_zoom = re.search(r"maxZoom:\s*(\d+)", text)
+    return (
+        int(min_zoom.group(1)) if min_zoom else DEFAULT_MIN_ZOOM,
+        int(max_zoom.group(1)) if max_zoom else DEFAULT_MAX_ZOOM,
+    )
+
+
+def zoom_ranges(min_zoom, max_zoom, step=ZOOM_STEP):
+    """Split [min_zoom, max_zoom] into ranges of ``step`` zooms; the last absorbs the remainder."""
+    starts = list(range(min_zoom, max_zoom + 1, step))
+    if len(starts) > 1 and max_zoom - starts[-1] + 1 < step:
+        starts.pop()
+    return [(start, (starts[i + 1] - 1) if i + 1 < len(starts) else max_zoom) for i, start in enumerate(starts)]
+
+
+def _quantized_rings(geometries, translate, scale, quantization):
+    """Quantize every ring at once.
+
+    Returns (rings, ring_polygon, polygon_feature, polygon_ring_start) where
+    ``rings`` holds each ring as a list of integer point keys (x * Q + y)
+    without the closing point or consecutive duplicates, and the index
+    arrays map rings to polygon parts and parts to features.
+    """
+    parts, polygon_feature = shapely.get_parts(geometries, return_index=True)
+    rings, ring_polygon = shapely.get_rings(parts, return_index=True)
+    coords, point_ring = shapely.get_coordinates(rings, return_index=True)
+
+    points = np.rint((coords - translate) / scale).astype(np.int64)
+    keys = points[:, 0] * quantization + points[:, 1]
+
+    # Drop each ring's closing point and duplicates created by quantization
+    ring_end = np.r_[point_ring[1:] != point_ring[:-1], True]
+    ring_start = np.r_[True, ring_end[:-1]]
+    keep = ~ring_end & (ring_start | (keys != np.r_[-1, keys[:-1]]))
+    first_of_ring = np.maximum.accumulate(np.where(ring_start, np.arange(len(keys)), 0))
+    last_kept = np.r_[ring_end[1:], False]  # point before the closing point
+    keep &= ~(last_kept & (keys == keys[first_of_ring]) & ~ring_start)
+
+    bounds = np.searchsorted(point_ring[keep], np.arange(len(rings) + 1))
+    kept = keys[keep].tolist()
+    ring_lists = [kept[bounds[i]:bounds[i + 1]] for i in range(len(rings))]
+    return ring_lists, ring_polygon, polygon_feature
+
+
+def _find_junctions(rings):
+    """Points whose neighbours differ between occurrences (where borders meet or split)."""
+    lengths = np.fromiter(map(len, rings), dtype=np.int64, count=len(rings))
+    rings = [ring for ring in rings if ring]
+    if not rings:
+        return set()
+    lengths = lengths[lengths > 0]
+    point = np.fromiter((p for ring in rings for p in ring), dtype=np.int64, count=int(lengths.sum()))
+    offsets = np.r_[0, np.cumsum(lengths)]
+    index = np.arange(len(point))
+    ring_of = np.repeat(np.arange(len(rings)), lengths)
+    start, length = offsets[ring_of], lengths[ring_of]
+    prev = point[start + (index - start - 1) % length]
+    next_ = point[start + (index - start + 1) % length]
+    low, high = np.minimum(prev, next_), np.maximum(prev, next_)
+
+    # A point is a junction if it occurs with more than one neighbour pair
+    order = np.lexsort((high, low, point))
+    point, low, high = point[order], low[order], high[order]
+    same_point = point[1:] == point[:-1]
+    new_pair = (low[1:] != low[:-1]) | (high[1:] != high[:-1])
+    return set(point[1:][same_point & new_pair].tolist())
+
+
+class _ArcIndex:
+    """Deduplicates arcs; a reversed match is referenced as ~index."""
+
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+
+    def add(self, points):
+        key = tuple(points)
+        if key in self._index:
+            return self._index[key]
+        reverse = key[::-1]
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+
+def _cut_ring(ring, junctions, arc_index):
+    """Arc references for one ring."""
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+    if not cuts:
+        # Closed arc; start at the smallest point so identical rings match
+        start = ring.index(min(ring))
+        points = ring[start:] + ring[:start]
+        return [arc_index.add(points + [points[0]])]
+
+    rotated = ring[cuts[0]:] + ring[:cuts[0]]
+    cuts = [i - cuts[0] for i in cuts] + [len(ring)]
+    rotated = rotated + [rotated[0]]
+    return [arc_index.add(rotated[cuts[i]:cuts[i + 1] + 1]) for i in range(len(cuts) - 1)]
+
+
+def build_topology(gdf, quantization=QUANTIZATION):
+    """Quantize and cut the boundaries into shared arcs.
+
+    Returns (arcs, geometries, transform) where arcs are integer point
+    arrays and geometries hold TopoJSON arc references per feature.
+    """
+    bounds = gdf.total_bounds
+    translate = bounds[:2]
+    extent = np.maximum(bounds[2:] - bounds[:2], 1e-12)
+    scale = extent / (quantization - 1)
+
+    rings, ring_polygon, polygon_feature = _quantized_rings(
+        gdf.geometry.to_numpy(), translate, scale, quantization
+    )
+    junctions = _find_junctions(rings)
+    arc_index = _ArcIndex()
+
+    # Group arc references as feature -> polygon part -> ring
+    features = [[] for _ in range(len(gdf))]
+    parts = [[] for _ in range(len(polygon_feature))]
+    for ring, polygon in zip(rings, ring_polygon):
+        if len(ring) >= 3:
+            parts[polygon].append(_cut_ring(ring, junctions, arc_index))
+    for part, feature in zip(parts, polygon_feature):
+        if part:
+            features[feature].append(part)
+
+    geometries = []
+    for arcs in features:
+        if not arcs:
+            geometries.append({"type": None})
+        elif len(arcs) == 1:
+            geometries.append({"type": "Polygon", "arcs": arcs[0]})
+        else:
+            geometries.append({"type": "MultiPolygon", "arcs": arcs})
+
+    points = [np.column_stack(np.divmod(np.asarray(arc, dtype=np.int64), quantization)) for arc in arc_index.arcs]
+    transform = {"scale": scale.tolist(), "translate": translate.tolist()}
+    return points, geometries, transform
+
+
+def _ring_refs(geometries):
+    """Arc references of every ring in ``geometries``."""
+    for geometry in geometries:
+        if geometry["type"] == "Polygon":
+            yield from geometry["arcs"]
+        elif geometry["type"] == "MultiPolygon":
+            for part in geometry["arcs"]:
+                yield from part
+
+
+def _degenerate_ring(arcs, refs):
+    """True if the ring joined from ``refs`` has fewer than 3 distinct points or no area."""
+    parts = [arcs[ref] if ref >= 0 else arcs[~ref][::-1] for ref in refs]
+    points = np.concatenate([parts[0]] + [part[1:] for part in parts[1:]])
+    if len(np.unique(points, axis=0)) < 3:
+        return True
+    x, y = points[:, 0], points[:, 1]
+    return (x[:-1] * y[1:] - x[1:] * y[:-1]).sum() == 0
+
+
+def simplify_arcs(arcs, tolerance, rings=()):
+    """Douglas-Peucker simplify every arc once (endpoints are always kept).
+
+    Closed arcs keep at least 4 points so their ring stays a polygon. Open
+    arcs are simplified on their own, so a ring joined from several can
+    still collapse; the arcs of every ring in ``rings`` (lists of arc
+    references) that would be left without area are kept at full resolution.
+    """
+    if tolerance <= 0:
+        return [np.asarray(arc, dtype=np.int64) for arc in arcs]
+    coords = [np.asarray(arc, dtype=np.float64) for arc in arcs]
+    lines = shapely.linestrings(np.concatenate(coords), indices=np.repeat(np.arange(len(coords)), [len(c) for c in coords]))
+    simplified = shapely.simplify(lines, tolerance, preserve_topology=False)
+
+    result = []
+    for original, line in zip(coords, simplified):
+        points = shapely.get_coordinates(line)
+        if len(points) < 4 and len(original) >= 4 and (original[0] == original[-1]).all():
+            points = original  # collapsed ring: keep it at full resolution
+        result.append(np.rint(points).astype(np.int64))
+
+    # Restoring an arc changes its other ring too, so repeat until no ring is degenerate
+    rings = [refs for refs in rings if refs]
+    restored = set()
+    changed = True
+    while changed:
+        changed = False
+        for refs in rings:
+            indices = {ref if ref >= 0 else ~ref for ref in refs} - restored
+            if indices and _degenerate_ring(result, refs):
+                for index in indices:
+                    result[index] = np.asarray(arcs[index], dtype=np.int64)
+                restored |= indices
+                changed = True
+    return result
+
+
+def _encode_arcs(arcs):
+    """Delta-encode integer arcs as TopoJSON expects (first point absolute)."""
+    if not arcs:
+        return []
+    lengths = [len(arc) for arc in arcs]
+    offsets = np.r_[0, np.cumsum(lengths)]
+    points = np.concatenate(arcs)
+    deltas = np.diff(points, axis=0, prepend=points[:1])
+    deltas[offsets[:-1]] = points[offsets[:-1]]
+    flat = deltas.tolist()
+    return [flat[offsets[i]:offsets[i + 1]] for i in range(len(arcs))]
+
+
+def _degrees_per_pixel(zoom):
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def export_topology_levels(gdf, output_dir: Path, name: str, min_zoom=DEFAULT_MIN_ZOOM,
+                           max_zoom=DEFAULT_MAX_ZOOM, quantization=QUANTIZATION):
+    """Write one simplified TopoJSON per zoom range plus the levels manifest.
+
+    Returns the per-level report (zoom range, file, bytes, vertices).
+    """
+    output_dir = Path(output_dir)
+    arcs, geometries, transform = build_topology(gdf, quantization)
+    properties = json.loads(gdf.drop(columns=gdf.geometry.name).to_json(orient="records"))
+    for geometry, props in zip(geometries, properties):
+        geometry["properties"] = props
+
+    rings = list(_ring_refs(geometries))
+
+    # Tolerances are in quantized grid units
+    grid_unit = min(transform["scale"])
+    levels = []
+    for low, high in zoom_ranges(min_zoom, max_zoom):
+        tolerance = PIXEL_TOLERANCE * _degrees_per_pixel(low) / grid_unit
+        level_arcs = simplify_arcs(arcs, tolerance if high < max_zoom else 0, rings)
+
+        topology = {
+            "type": "Topology",
+            "bbox": gdf.total_bounds.tolist(),
+            "transform": transform,
+            "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": geometries}},
+            "arcs": _encode_arcs(level_arcs),
+        }
+        file_name = f"{name}.z{low}-{high}.topojson"
+        text = json.dumps(topology, separators=(",", ":"))
+        (output_dir / file_name).write_text(text)
+        levels.append({
+            "minZoom": low,
+            "maxZoom": high,
+            "file": file_name,
+            "bytes": len(text.encode()),
+            "vertices": int(sum(len(arc) for arc in level_arcs)),
+        })
+
+    with open(output_dir / f"{name}.levels.json", "w") as f:
+        json.dump({"object": OBJECT_NAME, "levels": levels}, f, indent=2)
+    return levels
+
+
+def decode_topology(topology):
+    """Decode a topology written by ``export_topology_levels`` into shapely geometries."""
+    scale = np.asarray(topology["transform"]["scale"])
+    translate = np.asarray(topology["transform"]["translate"])
+    arcs = [np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) * scale + translate for arc in topology["arcs"]]
+
+    def ring(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc[1:] if points else arc)
+        return points
+
+    geometries = []
+    for geometry in topology["objects"][OBJECT_NAME]["geometries"]:
+        if geometry["type"] == "Polygon":
+            rings = [ring(refs) for refs in geometry["arcs"]]
+            geometries.append(shapely.Polygon(rings[0], rings[1:]))
+        elif geometry["type"] == "MultiPolygon":
+            polygons = [[ring(refs) for refs in part] for part in geometry["arcs"]]
+            geometries.append(shapely.MultiPolygon([(p[0], p[1:]) for p in polygons]))
+        else:
+            geometries.append(None)
+    return geometries
@@ -0,0 +1,138 @@
+"""Color-scale breaks for every map view, from quantile sketches over the aggregates.
+
+The map colors a ZIP gray for no permits and with one of ``HEATMAP_BUCKETS``
+shades otherwise. Each view gets its own breaks, taken as quantiles of the
+non-zero per-ZIP counts that view can show:
+
+  - ``all``: all-time totals per ZIP
+  - ``types``: all-time totals per ZIP for each EventType
+  - ``weeks``: weekly totals per ZIP, one set of breaks per week
+  - ``weekly``: all weeks pooled (the per-week sketches merged)
+
+Sketches are fed from the aggregated frames the pipeline already holds, so
+no extra pass over the raw permits is needed. Breaks are ``[0, q1, ..., max]``
+like ``CONFIG.colors.breaks``: bucket 0 is zero, bucket ``i`` covers
+``(breaks[i - 1], breaks[i]]`` and the last bucket everything above
+``breaks[-2]``. They are written to a generated script that overrides
+CONFIG.colors after config.js loads, and the bucket of every ZIP cell is
+precomputed with ``searchsorted`` into color_buckets.json.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import DEFAULT_K, KLLSketch
+
+HEATMAP_BUCKETS = 6  # shades after the gray "no permits" color
+GENERATED_SCRIPT = "color-breaks.js"
+BUCKETS_FILE = "color_buckets.json"
+
+
+def week_key(year, week) -> str:
+    return f"{int(year)}-{int(week)}"
+
+
+def _sketch(values, k):
+    values = np.asarray(values)
+    return KLLSketch(k).update(values[values > 0])
+
+
+def _weekly_zip_totals(weekly_counts: pd.DataFrame) -> pd.DataFrame:
+    """Per-ZIP totals for each week (summed over EventTypes), sorted by week."""
+    return (weekly_counts.groupby(["year", "week", "ZipCode(s)"], observed=True)["permit_count"]
+            .sum().reset_index())
+
+
+def build_sketches(weekly_counts, total_counts, total_by_type, k=DEFAULT_K) -> dict:
+    """Quantile sketches for the ``all``, ``types``, ``weeks`` and ``weekly`` views."""
+    by_type = total_by_type.assign(EventType=total_by_type["EventType"].astype(str))
+    type_groups = by_type.groupby("EventType")["type_count"]
+    weekly = _weekly_zip_totals(weekly_counts)
+    week_groups = weekly.groupby(["year", "week"])["permit_count"]
+
+    weeks = {week_key(year, week): _sketch(values.to_numpy(), k) for (year, week), values in week_groups}
+    pooled = KLLSketch(k)
+    for sketch in weeks.values():
+        pooled.merge(sketch)
+    return {
+        "all": _sketch(total_counts["total_permits"].to_numpy(), k),
+        "types": {event_type: _sketch(values.to_numpy(), k) for event_type, values in type_groups},
+        "weeks": weeks,
+        "weekly": pooled,
+    }
+
+
+def breaks_from_sketch(sketch: KLLSketch, buckets=HEATMAP_BUCKETS) -> list:
+    """``[0, q(1/b), ..., q((b-1)/b), max]`` as non-decreasing integers."""
+    if len(sketch) == 0:
+        return [0] * (buckets + 1)
+    cuts = np.rint(sketch.quantiles(np.linspace(0, 1, buckets + 1)[1:])).astype(np.int64)
+    return [0] + np.maximum.accumulate(cuts).tolist()
+
+
+def bucket_index(values, breaks) -> np.ndarray:
+    """Color bucket of each value: 0 for zero, else 1..len(breaks) - 1."""
+    values = np.asarray(values)
+    inner = np.asarray(breaks[1:-1])
+    return np.where(values > 0, np.searchsorted(inner, values, side="left") + 1, 0).astype(np.uint8)
+
+
+def color_breaks(sketches: dict, buckets=HEATMAP_BUCKETS) -> dict:
+    """Breaks for every view in ``sketches``."""
+    return {
+        "all": breaks_from_sketch(sketches["all"], buckets),
+        "weekly": breaks_from_sketch(sketches["weekly"], buckets),
+        "types": {name: breaks_from_sketch(s, buckets) for name, s in sketches["types"].items()},
+        "weeks": {name: breaks_from_sketch(s, buckets) for name, s in sketches["weeks"].items()},
+    }
+
+
+def bucket_table(weekly_counts, total_counts, total_by_type, breaks) -> dict:
+    """Bucket of every ZIP cell per view, aligned with the sorted ZIP list."""
+    zips = pd.Index(sorted(total_counts["ZipCode(s)"].astype(str)))
+    totals = total_counts.set_index(total_counts["ZipCode(s)"].astype(str))["total_permits"]
+
+    by_type = total_by_type.assign(EventType=total_by_type["EventType"].astype(str))
+    types = {}
+    for event_type, group in by_type.groupby("EventType"):
+        counts = np.zeros(len(zips), dtype=np.int64)
+        counts[zips.get_indexer(group["ZipCode(s)"].astype(str))] = group["type_count"].to_numpy()
+        types[event_type] = bucket_index(counts, breaks["types"][event_type]).tolist()
+
+    weekly = _weekly_zip_totals(weekly_counts)
+    week_codes, week_values = pd.factorize(weekly["year"].astype("int64") * 100 + weekly["week"].astype("int64"),
+                                           sort=True)
+    counts = np.zeros((len(week_values), len(zips)), dtype=np.int64)
+    counts[week_codes, zips.get_indexer(weekly["ZipCode(s)"].astype(str))] = weekly["permit_count"].to_numpy()
+    week_keys = [week_key(value // 100, value % 100) for value in week_values]
+    week_buckets = [bucket_index(row, breaks["weeks"][key]).tolist() for row, key in zip(counts, week_keys)]
+
+    return {
+        "zips": zips.tolist(),
+        "all": bucket_index(totals.reindex(zips, fill_value=0).to_numpy(), breaks["all"]).tolist(),
+        "types": types,
+        "weeks": week_keys,
+        "weekly": week_buckets,
+    }
+
+
+def write_color_breaks(frames, processed_dir: Path, script_path: Path, k=DEFAULT_K) -> dict:
+    """Write color_buckets.json and the generated CONFIG.colors script; returns the breaks."""
+    weekly_counts, total_counts, total_by_type = frames
+    breaks = color_breaks(build_sketches(weekly_counts, total_counts, total_by_type, k))
+
+    with open(Path(processed_dir) / BUCKETS_FILE, "w") as f:
+        json.dump(bucket_table(weekly_counts, total_counts, total_by_type, breaks), f, separators=(",", ":"))
+
+    script_path = Path(script_path)
+    script_path.parent.mkdir(parents=True, exist_ok=True)
+    views = {name: breaks[name] for name in ("weekly", "types", "weeks")}
+    script_path.write_text(
+        "// Generated by data_processing/scripts/process_data.py (color_breaks.py); do not edit.\n"
+        "// Quantile color breaks per view, loaded after config.js.\n"
+        f"CONFIG.colors.breaks = {json.dumps(breaks['all'])};\n"
+        f"CONFIG.colors.views = {json.dumps(views, separators=(',', ':'))};\n"
+    )
+    return breaks
@@ -0,0 +1,151 @@
+"""Memory-mapped columnar store of the processed tables for the analysis scripts.
+
+Each table is a set of fixed-width little-endian column files plus a small
+JSON manifest (row count, per column its file, dtype and, for string
+columns, the sorted dictionary its codes index into), next to the JSON
+outputs in the processed folder:
+
+  <table>.columns.json      manifest
+  <table>.<gen>.col<i>.bin  raw values of column i; <gen> hashes the table contents
+
+Opening a table reads only the manifest and maps the column files; columns
+are ``np.memmap`` views in read-only mode, so any number of analysis processes share the same page
+cache pages and nothing is parsed or copied until a value is touched.
+String columns come back as ``pd.Categorical`` over the memory-mapped codes
+(stored with the integer width pandas itself would pick), so ``to_frame``
+builds a DataFrame without copying any column.
+
+Each write is a generation named after its contents (so re-writing the
+same table gives the same files): its column files get new names, and the
+manifest that lists them is moved into place last. A reader therefore sees
+either the old or the new table as a whole, never the old manifest with new
+columns. The previous generation's files are deleted once the new manifest
+is in place. Tables already open keep their mapped inodes, and a reader
+that loses the race between reading the manifest and mapping the columns
+simply reads the new manifest again.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+
+
+def manifest_path(directory: Path, name: str) -> Path:
+    return Path(directory) / f"{name}.columns.json"
+
+
+def write_table(df: pd.DataFrame, directory: Path, name: str) -> Path:
+    """Write ``df`` as a new generation of column files plus a manifest; returns the manifest path."""
+    directory = Path(directory)
+    path = manifest_path(directory, name)
+    columns, arrays = [], []
+    for column in df.columns:
+        values = df[column]
+        spec = {"name": column}
+        if values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            categorical = pd.Categorical(values.astype(str))
+            spec["dictionary"] = categorical.categories.tolist()
+            data = categorical.codes
+        else:
+            data = values.to_numpy()
+        data = data.astype(data.dtype.newbyteorder("<"), copy=False)
+        spec["dtype"] = data.dtype.str
+        columns.append(spec)
+        arrays.append(data)
+
+    digest = hashlib.sha256(json.dumps(columns).encode())
+    for data in arrays:
+        digest.update(np.ascontiguousarray(data).data)
+    generation = digest.hexdigest()[:12]
+    for i, (spec, data) in enumerate(zip(columns, arrays)):
+        spec["file"] = f"{name}.{generation}.col{i}.bin"
+        tmp = directory / f".{spec['file']}.tmp"
+        data.tofile(tmp)
+        os.replace(tmp, directory / spec["file"])
+
+    tmp = directory / f".{path.name}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": STORE_VERSION, "generation": generation, "rows": len(df), "columns": columns}, f)
+    os.replace(tmp, path)
+
+    # Older generations are unreachable now (open memmaps keep their inodes)
+    current = {spec["file"] for spec in columns}
+    pattern = re.compile(rf"{re.escape(name)}(\.[0-9a-f]+)?\.col\d+\.bin")
+    for old in directory.glob(f"{name}.*.bin"):
+        if pattern.fullmatch(old.name) and old.name not in current:
+            old.unlink(missing_ok=True)
+    return path
+
+
+class Table:
+    def __init__(self, directory: Path, name: str):
+        self.directory = Path(directory)
+        self.name = name
+        try:
+            self._open()
+        except FileNotFoundError:
+            self._open()  # a writer replaced the generation between manifest and columns
+
+    def _open(self):
+        with open(manifest_path(self.directory, self.name)) as f:
+            manifest = json.load(f)
+        if manifest["version"] != STORE_VERSION:
+            raise ValueError(f"Unsupported column store version: {manifest['version']}")
+        self.rows = manifest["rows"]
+        self.specs = {spec["name"]: spec for spec in manifest["columns"]}
+        # Map every column now so the table stays consistent with the manifest just read
+        self.arrays = {name: self._map(spec) for name, spec in self.specs.items()}
+
+    @property
+    def columns(self):
+        return list(self.specs)
+
+    def __len__(self):
+        return self.rows
+
+    def _map(self, spec) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        if not self.rows:
+            return np.empty(0, dtype=dtype)  # mmap cannot map an empty file
+        return np.memmap(self.directory / spec["file"], dtype=dtype, mode="r", shape=(self.rows,))
+
+    def array(self, column: str) -> np.ndarray:
+        """Read-only memory-mapped values of ``column`` (codes for string columns)."""
+        return self.arrays[column]
+
+    def dictionary(self, column: str) -> pd.Index:
+        return pd.Index(self.specs[column]["dictionary"])
+
+    def column(self, column: str):
+        """Values of ``column``: the memmap, or a Categorical over the memory-mapped codes."""
+        if "dictionary" in self.specs[column]:
+            return pd.Categorical.from_codes(self.array(column), categories=self.dictionary(column),
+                                             validate=False)
+        return self.array(column)
+
+    def to_frame(self, columns=None) -> pd.DataFrame:
+        """DataFrame whose columns are views on the mapped files (no copy)."""
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({column: self.column(column) for column in columns}, columns=columns, copy=False)
+
+
+def load_processed_frame(json_path: Path, use_cache: bool = True) -> pd.DataFrame:
+    """Frame of a processed records-JSON file, memory-mapped from the store when it is current.
+
+    Falls back to parsing the JSON (through the permit cache) when the store
+    has no copy of the table or its copy is older than the JSON.
+    """
+    json_path = Path(json_path)
+    manifest = manifest_path(json_path.parent, json_path.stem)
+    if manifest.exists() and (not json_path.exists() or manifest.stat().st_mtime_ns >= json_path.stat().st_mtime_ns):
+        return Table(json_path.parent, json_path.stem).to_frame()
+
+    from permit_cache import load_json_frame
+
+    return load_json_frame(json_path, use_cache)
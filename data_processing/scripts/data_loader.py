@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+import logging
+import sys
+from typing import TYPE_CHECKING
+
+from profiling import profiler
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Raw CSV columns used by process_data.py
+REQUIRED_COLUMNS = ['EventType', 'StartDateTime', 'EndDateTime', 'ZipCode(s)']
+
+class DataLoader:
+    def __init__(self, project_root: Path, use_cache: bool = True):
+        self.raw_data_path = project_root / 'data_processing' / 'data' / 'raw'
+        self.permits_path = self.raw_data_path / 'film_permits.csv'
+        self.boundaries_path = self.raw_data_path / 'zip_boundaries.geojson'
+        self.cache = None
+        if use_cache:
+            from permit_cache import PermitCache
+            self.cache = PermitCache(project_root / 'data_processing' / 'data' / 'cache')
+
+    def validate_paths(self) -> bool:
+        """Validate all required paths exist."""
+        paths_exist = True
+        for path in [self.raw_data_path, self.permits_path, self.boundaries_path]:
+            if not path.exists():
+                logger.error(f"Path not found: {path}")
+                paths_exist = False
+        return paths_exist
+
+    def validate_columns(self) -> bool:
+        """Validate the permits CSV header has every column the pipeline reads."""
+        with open(self.permits_path, newline='') as f:
+            header = next(csv.reader(f), [])
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            logger.error(f"Missing columns in {self.permits_path.name}: {', '.join(missing)}")
+        return not missing
+
+    def load_permits(self) -> pd.DataFrame:
+        """Load and clean film permits data with ZIP code handling."""
+        with profiler.stage('DataLoader.load_permits') as timer:
+            if self.cache:
+                df = self.cache.get_frame('permits', [self.permits_path], self._read_permits)
+            else:
+                df = self._read_permits()
+            timer.rows_out = len(df)
+        return df
+
+    def _read_permits(self) -> pd.DataFrame:
+        import pandas as pd
+        logger.info("Loading permits data...")
+        df = pd.read_csv(self.permits_path)
+        
+        # Handle ZIP codes
+        if 'ZipCode(s)' in df.columns:
+            df = (df.assign(ZipCode=df['ZipCode(s)'].str.split(','))
+                  .explode('ZipCode')
+                  .assign(ZipCode=lambda x: x['ZipCode'].str.strip())
+                  .dropna(subset=['ZipCode']))
+        return df
+
+    def load_boundaries(self) -> gpd.GeoDataFrame:
+        """Load and validate geographic boundaries."""
+        with profiler.stage('DataLoader.load_boundaries') as timer:
+            if self.cache:
+                gdf = self.cache.get_geoframe('boundaries', [self.boundaries_path], self._read_boundaries)
+            else:
+                gdf = self._read_boundaries()
+            timer.rows_out = len(gdf)
+        return gdf
+
+    def _read_boundaries(self) -> gpd.GeoDataFrame:
+        import geopandas as gpd
+        logger.info("Loading boundaries data...")
+        gdf = gpd.read_file(self.boundaries_path)
+        gdf['postalCode'] = gdf['postalCode'].astype(str).str.strip()
+        return gdf
+
+    def load_spatial_index(self):
+        """STRtree index over the ZIP boundaries for point assignment and region rollups."""
+        from spatial_index import ZipSpatialIndex
+        cache_dir = self.cache.cache_dir if self.cache else None
+        return ZipSpatialIndex(self.load_boundaries(), cache_dir=cache_dir)
+
+def get_project_root() -> Path:
+    """Calculate project root relative to this file's location."""
+    current_file = Path(__file__).resolve()
+    return current_file.parents[2]  # Adjust this number based on your file structure
+
+def main(argv=None, project_root=None):
+    parser = argparse.ArgumentParser(prog='data_loader.py', description='Load and summarize the raw permits and ZIP boundaries')
+    parser.add_argument('--no-cache', action='store_true', help='Parse the raw files without the permit cache')
+    parser.add_argument('--profile', action='store_true', help='Write load timings to data_loader_profile.json')
+    args = parser.parse_args(argv)
+    try:
+        # Path configuration
+        project_root = project_root or get_project_root()
+        logger.info(f"Project root: {project_root}")
+        
+        if args.profile:
+            profiler.enable()
+        loader = DataLoader(project_root, use_cache=not args.no_cache)
+        if not loader.validate_paths():
+            logger.error("Missing required data files. Check paths above.")
+            sys.exit(1)
+            
+        # Load data
+        permits_df = loader.load_permits()
+        boundaries_gdf = loader.load_boundaries()
+        
+        # Display summary
+        print("\n=== Data Summary ===")
+        print(f"Permits loaded: {len(permits_df):,}")
+        print(f"Unique ZIP codes: {permits_df['ZipCode'].nunique():,}")
+        print(f"Boundary shapes: {len(boundaries_gdf):,}")
+        print("Boroughs:", ', '.join(boundaries_gdf['borough'].unique()))
+
+        if profiler.enabled:
+            logger.info(f"Profile report written to {profiler.write_report('data_loader_profile.json')}")
+        
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,13 +1,21 @@
 import pandas as pd
+import numpy as np
 import geopandas as gpd
 from pathlib import Path
 import json
+import sys
 
-def process_data():
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from group_counts import GroupCounts
+from monthly_slices import GEOMETRY_FILE, SLICES_DIR, write_geometry, write_month_slices
+from zip_explode import explode_zips
+
+def process_data(project_root=None):
     # =====================
     # 1. Path Configuration
     # =====================
-    project_root = Path(__file__).parent.parent.parent
+    if project_root is None:
+        project_root = Path(__file__).parent.parent.parent
     print(f"Project root: {project_root}")
     raw_data_dir = project_root / "data" / "raw"
     print(f"Raw data dir: {raw_data_dir}")
@@ -46,30 +54,25 @@ def process_data():
     # 3. Data Preprocessing
     # ======================
     print("🔧 Processing ZIP codes...")
-    permits_df["ZIPs"] = (
-        permits_df["ZIPs"]
-        .fillna("")
-        .apply(lambda s: [z.strip() for z in str(s).split(", ") if z.strip()])
-    )
-    permits_df = permits_df[permits_df["ZIPs"].apply(len) > 0]
+    exploded = explode_zips(permits_df["ZIPs"], sep=", ", zip_length=None)
+    has_zips = exploded.offsets[1:] > exploded.offsets[:-1]
 
     print("🌀 Expanding multi-ZIP permits...")
-    permits_expanded = permits_df.explode("ZIPs", ignore_index=False)
+    permits_expanded = permits_df.iloc[exploded.row].copy()
+    permits_expanded["ZIPs"] = exploded.zip
+    permits_df = permits_df[has_zips]
 
     # ====================
     # 4. Data Processing
     # ====================
     print("📅 Processing temporal data...")
-    permits_expanded["num_zips"] = permits_expanded.index.map(
-        lambda idx: len(permits_df.loc[idx, "ZIPs"])
-    )
-    permits_expanded["weight"] = 1 / permits_expanded["num_zips"]
+    permits_expanded["num_zips"] = exploded.num_zips
+    permits_expanded["weight"] = exploded.weight
     
-    # Convert to monthly period
+    # Month as an integer code (year * 12 + month - 1); labels are formatted once per month
     permits_expanded["month"] = (
-        permits_expanded["StartDateTime"]
-        .dt.to_period("M")
-        .astype(str)
+        permits_expanded["StartDateTime"].dt.year * 12
+        + permits_expanded["StartDateTime"].dt.month - 1
     )
 
     # ======================
@@ -80,29 +83,39 @@ def process_data():
     zip_gdf["ZIP_CODE"] = zip_gdf["ZIP_CODE"].astype(str)
     permits_expanded["ZIPs"] = permits_expanded["ZIPs"].astype(str)
 
-    grouped = permits_expanded.groupby(["month", "ZIPs"]).agg(
-        total=("weight", "count"),
-        weighted=("weight", "sum")
-    ).reset_index()
+    # One bincount over ZIP x month (counts, and the 1 / num_zips weights summed
+    # as floats like the groupby did); the dense tables are the pivots
+    counts = GroupCounts.from_frame(permits_expanded, {"zip": "ZIPs", "month": "month"}, weights=["weight"])
+    months = [f"{code // 12:04d}-{code % 12 + 1:02d}" for code in counts.labels["month"]]
+    total = counts.counts
+    weighted = counts.weights["weight"]
 
-    total_pivot = grouped.pivot(index="ZIPs", columns="month", values="total")
-    weighted_pivot = grouped.pivot(index="ZIPs", columns="month", values="weighted")
-    
-    zip_gdf["total_permits"] = zip_gdf["ZIP_CODE"].map(total_pivot.to_dict("index")).fillna({})
-    zip_gdf["weighted_permits"] = zip_gdf["ZIP_CODE"].map(weighted_pivot.to_dict("index")).fillna({})
+    # Rows of the dense tables in the boundaries' feature order (zeros for ZIPs without permits)
+    rows = pd.Index(counts.labels["zip"]).get_indexer(zip_gdf["ZIP_CODE"])
+    present = rows >= 0
+    total_by_zip = np.zeros((len(zip_gdf), len(months)), dtype=total.dtype)
+    weighted_by_zip = np.zeros((len(zip_gdf), len(months)))
+    total_by_zip[present] = total[rows[present]]
+    weighted_by_zip[present] = weighted[rows[present]]
 
     # =================
     # 6. Output Files
     # =================
     print("💾 Saving processed data...")
-    zip_gdf.to_file(processed_data_dir / "zip_data.geojson", driver="GeoJSON")
-    
     monthly_stats = [{
         "start": pd.Period(month).start_time.date().isoformat(),
         "end": pd.Period(month).end_time.date().isoformat(),
         "label": pd.Period(month).strftime("%b %Y")
-    } for month in grouped["month"].unique()]
-    
+    } for month in months]
+
+    # Geometry once (untouched while the boundaries are unchanged), one small slice per month
+    if write_geometry(zip_gdf, processed_data_dir):
+        print(f"🗺️ Wrote {GEOMETRY_FILE}")
+    written = write_month_slices(processed_data_dir, zip_gdf["ZIP_CODE"].tolist(),
+                                 [{"month": month, **stats} for month, stats in zip(months, monthly_stats)],
+                                 total_by_zip, weighted_by_zip)
+    print(f"📦 {written} of {len(months)} monthly slices changed in {SLICES_DIR}/")
+
     with open(processed_data_dir / "monthly_stats.json", "w") as f:
         json.dump({
             "monthly": monthly_stats,
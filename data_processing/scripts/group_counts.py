@@ -0,0 +1,111 @@
+"""Single-pass categorical aggregation over integer-coded axes.
+
+Each grouping axis (ZIP, EventType, week, month, ...) is factorized to
+integer codes once. The codes are combined into one flat cell index and a
+single ``np.bincount`` produces the counts of the finest grouping, plus one
+more ``bincount`` per weight column. Any coarser grouping is then a sum
+over the dense array's other axes, with no further pass over the rows and
+no string regrouping.
+
+Axis labels are sorted, and frames come out in C order over the kept axes,
+so ``to_frame`` matches ``groupby(keys).size()`` row for row (rows with a
+missing key are dropped the same way). The dense
+array has one cell per label combination; that is fine for the permit axes
+(a few hundred weeks x a few hundred ZIPs x a handful of types).
+"""
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+AxisSpec = Union[str, Sequence[str]]
+
+
+def _factorize(frame: pd.DataFrame, columns: List[str]):
+    """Sorted codes and labels for one axis, which may span several columns."""
+    if len(columns) == 1:
+        return pd.factorize(frame[columns[0]], sort=True)
+    # Combine per-column codes into one integer key (lexicographic in the sorted labels)
+    key = np.zeros(len(frame), dtype=np.int64)
+    column_labels = []
+    for column in columns:
+        codes, labels = pd.factorize(frame[column], sort=True)
+        key = key * len(labels) + codes
+        column_labels.append(labels)
+    keys, codes = np.unique(key, return_inverse=True)
+    positions = np.unravel_index(keys, [len(labels) for labels in column_labels])
+    labels = pd.MultiIndex.from_arrays([labels.take(position) for labels, position in zip(column_labels, positions)],
+                                       names=columns)
+    return codes.reshape(-1), labels
+
+
+class GroupCounts:
+    def __init__(self, axes: Dict[str, List[str]], labels: Dict[str, pd.Index], counts: np.ndarray,
+                 weights: Dict[str, np.ndarray] = None):
+        self.axes = axes            # axis name -> the frame columns it covers
+        self.labels = labels        # axis name -> sorted labels along that axis
+        self.counts = counts        # shape (len(labels[a]) for a in axes)
+        self.weights = weights or {}
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, axes: Dict[str, AxisSpec], weights: Sequence[str] = ()):
+        """Count rows (and sum ``weights`` columns) per combination of axis labels.
+
+        Args:
+            frame: One row per event
+            axes: Axis name -> column, or list of columns forming one axis
+                (e.g. ``{"week": ["year", "week"], "zip": "ZipCode(s)"}``)
+            weights: Columns summed per cell alongside the counts
+        """
+        axes = {name: [spec] if isinstance(spec, str) else list(spec) for name, spec in axes.items()}
+        # Rows with a missing label in any axis are dropped, as groupby does
+        missing = frame[[column for columns in axes.values() for column in columns]].isna().any(axis=1)
+        if missing.any():
+            frame = frame[~missing.to_numpy()]
+        codes, labels = [], {}
+        for name, columns in axes.items():
+            axis_codes, axis_labels = _factorize(frame, columns)
+            codes.append(axis_codes)
+            labels[name] = axis_labels
+        shape = tuple(len(labels[name]) for name in axes)
+        size = int(np.prod(shape))
+
+        flat = np.ravel_multi_index(codes, shape) if codes and len(frame) else np.zeros(0, dtype=np.int64)
+        counts = np.bincount(flat, minlength=size).reshape(shape)
+        sums = {column: np.bincount(flat, weights=frame[column].to_numpy(dtype=np.float64),
+                                    minlength=size).reshape(shape)
+                for column in weights}
+        return cls(axes, labels, counts, sums)
+
+    def rollup(self, keep: Sequence[str]) -> "GroupCounts":
+        """Counts over the ``keep`` axes only, summing the others out."""
+        names = list(self.axes)
+        drop = tuple(i for i, name in enumerate(names) if name not in keep)
+        remaining = [name for name in names if name in keep]
+        order = [remaining.index(name) for name in keep]
+
+        def reduce(values):
+            return np.transpose(values.sum(axis=drop) if drop else values, order)
+
+        return GroupCounts({name: self.axes[name] for name in keep}, {name: self.labels[name] for name in keep},
+                           reduce(self.counts), {column: reduce(values) for column, values in self.weights.items()})
+
+    def to_frame(self, name: str = "count", nonzero: bool = True) -> pd.DataFrame:
+        """Long frame with the axis columns, ``name`` (the count) and the weight sums.
+
+        Only cells with at least one row are kept unless ``nonzero`` is False.
+        """
+        cells = np.flatnonzero(self.counts) if nonzero else np.arange(self.counts.size)
+        positions = np.unravel_index(cells, self.counts.shape)
+        data = {}
+        for axis, position in zip(self.axes, positions):
+            labels = self.labels[axis]
+            if isinstance(labels, pd.MultiIndex):
+                for level, column in enumerate(self.axes[axis]):
+                    data[column] = labels.get_level_values(level).take(position).array
+            else:
+                data[self.axes[axis][0]] = labels.take(position).array
+        data[name] = self.counts.reshape(-1)[cells]
+        for column, values in self.weights.items():
+            data[column] = values.reshape(-1)[cells]
+        return pd.DataFrame(data)
@@ -0,0 +1,187 @@
+"""Incremental re-processing of the permits CSV against persisted aggregate state.
+
+The running weekly/ZIP/type counters are saved next to the processed outputs
+together with a watermark (highest StartDateTime and EventID seen) and the
+byte offset of the CSV that has already been folded in. A later run only
+parses the rows appended after that offset and merges their deltas into the
+saved counters, so run time tracks the size of the delta, not the history.
+
+Anything that cannot be merged safely falls back to a full rebuild:
+  - no saved state, or state written by a different version
+  - the CSV header changed or the already-processed prefix was rewritten
+  - an appended row re-uses an EventID at or below the watermark (an amended
+    permit, whose previous contribution cannot be subtracted)
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from process_data import (
+    aggregate_permits_chunked,
+    counters_to_frames,
+    fold_chunk,
+    new_counters,
+    read_permits_chunks,
+)
+
+STATE_VERSION = 3  # 2 labelled weeks by ISO year, 3 is back to the calendar year
+STATE_FILE = "incremental_state.json"
+DEFAULT_CHUNKSIZE = 100_000
+
+# Bytes just before the processed offset that must be unchanged to resume
+FINGERPRINT_BYTES = 4096
+
+
+class AmendedPermitError(Exception):
+    """Raised when the delta contains a permit already covered by the watermark."""
+
+
+def file_fingerprint(permits_path, offset):
+    """Hash of the header line and the bytes just before ``offset``."""
+    with open(permits_path, "rb") as f:
+        header = f.readline()
+        f.seek(max(len(header), offset - FINGERPRINT_BYTES))
+        tail = f.read(offset - f.tell())
+    return hashlib.sha256(header + b"\0" + tail).hexdigest()
+
+
+def read_header(permits_path):
+    """CSV column names and the byte length of the header line."""
+    with open(permits_path, "rb") as f:
+        header = f.readline()
+    names = pd.read_csv(permits_path, nrows=0).columns.tolist()
+    return names, len(header)
+
+
+def load_state(state_path):
+    """Load persisted counters and watermark, or None if absent/incompatible."""
+    state_path = Path(state_path)
+    if not state_path.exists():
+        return None
+    with open(state_path) as f:
+        raw = json.load(f)
+    if raw.get("version") != STATE_VERSION:
+        return None
+
+    counters = new_counters()
+    counters["weekly"].update({tuple(row[:-1]): row[-1] for row in raw["weekly"]})
+    counters["totals"].update({row[0]: row[1] for row in raw["totals"]})
+    counters["by_type"].update({tuple(row[:-1]): row[-1] for row in raw["by_type"]})
+    return {
+        "counters": counters,
+        "offset": raw["offset"],
+        "fingerprint": raw["fingerprint"],
+        "columns": raw["columns"],
+        "watermark": raw["watermark"],
+        "dropped": raw["dropped"],
+    }
+
+
+def save_state(state, state_path):
+    """Persist counters, watermark and CSV offset as JSON."""
+    counters = state["counters"]
+    raw = {
+        "version": STATE_VERSION,
+        "offset": state["offset"],
+        "fingerprint": state["fingerprint"],
+        "columns": state["columns"],
+        "watermark": state["watermark"],
+        "dropped": state["dropped"],
+        "weekly": [list(key) + [count] for key, count in sorted(counters["weekly"].items())],
+        "totals": [[key, count] for key, count in sorted(counters["totals"].items())],
+        "by_type": [list(key) + [count] for key, count in sorted(counters["by_type"].items())],
+    }
+    tmp_path = Path(state_path).with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(raw, f)
+    tmp_path.replace(state_path)
+
+
+def _can_resume(state, permits_path, columns, size):
+    if state is None:
+        return False
+    if state["columns"] != columns or size < state["offset"]:
+        return False
+    return file_fingerprint(permits_path, state["offset"]) == state["fingerprint"]
+
+
+def _fold_from(permits_path, offset, columns, state, chunksize):
+    """Fold rows starting at byte ``offset`` into ``state`` in place.
+
+    Returns the number of raw rows read.
+    """
+    watermark = state["watermark"]
+    # Only EventIDs covered by a *previous* run count as amendments
+    base_event_id = watermark["EventID"]
+    rows = 0
+    with open(permits_path, "rb") as f:
+        f.seek(offset)
+        for chunk in read_permits_chunks(f, chunksize, names=columns, extra_columns=["EventID"]):
+            rows += len(chunk)
+            if "EventID" in chunk.columns:
+                event_ids = pd.to_numeric(chunk["EventID"], errors="coerce")
+                if base_event_id is not None and (event_ids <= base_event_id).any():
+                    raise AmendedPermitError("delta contains permits at or below the EventID watermark")
+                if event_ids.notna().any():
+                    watermark["EventID"] = max(watermark["EventID"] or 0, int(event_ids.max()))
+                chunk = chunk.drop(columns="EventID")
+
+            # fold_chunk parses the dates in place, so the max is taken afterwards
+            state["dropped"] += fold_chunk(state["counters"], chunk)
+            latest = chunk["StartDateTime"].max()
+            if pd.notna(latest) and (watermark["StartDateTime"] is None
+                                     or latest.isoformat() > watermark["StartDateTime"]):
+                watermark["StartDateTime"] = latest.isoformat()
+    return rows
+
+
+def update_incremental(permits_path, state_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Bring the saved aggregate state up to date with the permits CSV.
+
+    Returns ((weekly_counts, total_counts, total_by_type), stats) where
+    stats records the mode used ("incremental" or "full") and rows read.
+    """
+    permits_path = Path(permits_path)
+    columns, header_len = read_header(permits_path)
+    size = permits_path.stat().st_size
+    state = load_state(state_path)
+
+    mode = "incremental"
+    if not _can_resume(state, permits_path, columns, size):
+        state, mode = None, "full"
+
+    if state is not None:
+        try:
+            rows = _fold_from(permits_path, state["offset"], columns, state, chunksize)
+        except AmendedPermitError:
+            state, mode = None, "full"
+            print("♻️ Amended permits in delta, falling back to a full rebuild")
+
+    if state is None:
+        state = {
+            "counters": new_counters(),
+            "columns": columns,
+            "watermark": {"StartDateTime": None, "EventID": None},
+            "dropped": 0,
+        }
+        rows = _fold_from(permits_path, header_len, columns, state, chunksize)
+
+    state["offset"] = size
+    state["fingerprint"] = file_fingerprint(permits_path, size)
+    save_state(state, state_path)
+    return counters_to_frames(state["counters"]), {"mode": mode, "rows": rows, "dropped": state["dropped"]}
+
+
+def verify_incremental(permits_path, frames, chunksize=DEFAULT_CHUNKSIZE):
+    """Compare incrementally maintained frames against a full rebuild.
+
+    Returns the list of aggregate names that differ (empty when consistent).
+    """
+    expected, _ = aggregate_permits_chunked(permits_path, chunksize)
+    names = ["weekly_permits", "total_counts", "total_by_type"]
+    return [
+        name for name, exp, act in zip(names, expected, frames)
+        if exp.to_json(orient="records") != act.to_json(orient="records")
+    ]
@@ -0,0 +1,98 @@
+"""ZIP geometry written once, per-month ZIP counts as small aligned arrays.
+
+The monthly script used to put a {month: count} dict for every month into
+each ZIP feature, so the boundaries were re-sent whenever a month changed.
+Its outputs are now:
+
+  zip_geometry.geojson   ZIP boundaries and their static properties only,
+                         feature ``id`` = ZIP code. Only rewritten when its
+                         content changes, so it stays cached between runs
+  monthly/manifest.json  ZIP order (the geometry's feature order), and per
+                         month its label, date range and slice file
+  monthly/<YYYY-MM>.bin  total_permits (uint32) then weighted_permits
+                         (float32), one little-endian value per ZIP in
+                         manifest order; 0 where a ZIP had no permits
+
+A month is a single fetch of 8 bytes per ZIP. Slices are also only
+rewritten when they change, and slices of months no longer present are
+removed.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SLICES_VERSION = 1
+GEOMETRY_FILE = "zip_geometry.geojson"
+SLICES_DIR = "monthly"
+MANIFEST_FILE = "manifest.json"
+
+# Arrays in each slice file, in order
+ARRAYS = [("total_permits", "<u4"), ("weighted_permits", "<f4")]
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Replace ``path`` with ``data`` unless it already holds exactly that; True if written."""
+    path = Path(path)
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+    return True
+
+
+def write_geometry(zip_gdf, output_dir: Path, key: str = "ZIP_CODE") -> bool:
+    """Write the ZIP boundaries keyed by ``key``; True if the file changed."""
+    geojson = zip_gdf.set_index(zip_gdf[key].rename(None)).to_json()
+    return write_if_changed(Path(output_dir) / GEOMETRY_FILE, geojson.encode())
+
+
+def write_month_slices(output_dir: Path, zips, months, total, weighted) -> int:
+    """Write one slice per month and the manifest; returns the number of slices written.
+
+    ``total`` and ``weighted`` are (len(zips), len(months)) arrays and
+    ``months`` a list of dicts with ``month`` ("YYYY-MM") plus any other
+    per-month fields (label, start, end) to put in the manifest.
+    """
+    slices_dir = Path(output_dir) / SLICES_DIR
+    slices_dir.mkdir(parents=True, exist_ok=True)
+    arrays = [np.asarray(total), np.asarray(weighted)]
+    written = 0
+    entries = []
+    for i, month in enumerate(months):
+        name = f"{month['month']}.bin"
+        data = b"".join(array[:, i].astype(dtype).tobytes() for array, (_, dtype) in zip(arrays, ARRAYS))
+        written += write_if_changed(slices_dir / name, data)
+        entries.append({**month, "file": name})
+
+    current = {entry["file"] for entry in entries}
+    for stale in slices_dir.glob("*.bin"):
+        if stale.name not in current:
+            stale.unlink()
+
+    manifest = {
+        "version": SLICES_VERSION,
+        "geometry": f"../{GEOMETRY_FILE}",
+        "zips": list(zips),
+        "arrays": [{"name": name, "dtype": dtype} for name, dtype in ARRAYS],
+        "months": entries,
+    }
+    write_if_changed(slices_dir / MANIFEST_FILE, json.dumps(manifest, indent=2).encode())
+    return written
+
+
+def load_month(output_dir: Path, month: str) -> pd.DataFrame:
+    """One month's counts as a frame indexed by ZIP (in geometry order)."""
+    slices_dir = Path(output_dir) / SLICES_DIR
+    with open(slices_dir / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    entry = next(entry for entry in manifest["months"] if entry["month"] == month)
+    data = (slices_dir / entry["file"]).read_bytes()
+    columns, offset = {}, 0
+    for spec in manifest["arrays"]:
+        dtype = np.dtype(spec["dtype"])
+        columns[spec["name"]] = np.frombuffer(data, dtype=dtype, count=len(manifest["zips"]), offset=offset)
+        offset += dtype.itemsize * len(manifest["zips"])
+    return pd.DataFrame(columns, index=pd.Index(manifest["zips"], name="ZIP_CODE"))
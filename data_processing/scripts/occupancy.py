@@ -0,0 +1,169 @@
+"""Concurrent-permit occupancy per ZIP from StartDateTime/EndDateTime intervals.
+
+Expanding every permit into the hours it covers costs O(total duration).
+Instead each (permit, ZIP) interval becomes two boundaries, +1 in the bucket
+where it starts and -1 in the bucket after it ends. The boundaries are
+sorted by (group, bucket) once, equal keys are collapsed, and a single
+cumulative sum gives the number of active permits from each change point
+until the next. Each group's deltas sum to zero, so the running sum is back
+at zero at every group boundary and one global ``cumsum`` serves all groups.
+The whole build is O(n log n) in the number of intervals, independent of
+how long the permits run.
+
+The result is a step function per group stored CSR-style (``offsets`` into
+``times``/``levels``). Levels at any buckets are then binary searches, dense
+series are materialized only for the range asked for, and peaks are a
+segmented max over the change points.
+
+Buckets are hours (``"h"``), days (``"D"``) or ISO weeks (``"W"``), counted
+from the Unix epoch; a permit is active in every bucket its
+[start, end) interval overlaps, and at least in its start bucket.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+UNITS = ("h", "D", "W")
+EPOCH = pd.Timestamp("1970-01-01")
+_MONDAY_SHIFT = 3  # 1970-01-01 is a Thursday
+_KEY_SHIFT = 40    # group index above, bucket index below, in composite search keys
+
+
+def to_buckets(times, unit: str) -> np.ndarray:
+    """Bucket index of each timestamp (hours, days or ISO weeks since the epoch)."""
+    values = np.asarray(times, dtype="datetime64[ns]")
+    if unit == "h":
+        return values.astype("datetime64[h]").astype(np.int64)
+    days = values.astype("datetime64[D]").astype(np.int64)
+    if unit == "D":
+        return days
+    if unit == "W":
+        return (days + _MONDAY_SHIFT) // 7
+    raise ValueError(f"Unknown unit {unit!r} (choose from {', '.join(UNITS)})")
+
+
+def bucket_starts(buckets, unit: str) -> pd.DatetimeIndex:
+    """Start timestamp of each bucket index."""
+    buckets = np.asarray(buckets, dtype=np.int64)
+    if unit == "h":
+        return pd.DatetimeIndex(buckets.astype("datetime64[h]"))
+    if unit == "D":
+        return pd.DatetimeIndex(buckets.astype("datetime64[D]"))
+    return pd.DatetimeIndex((buckets * 7 - _MONDAY_SHIFT).astype("datetime64[D]"))
+
+
+class Occupancy:
+    def __init__(self, groups, unit, offsets, times, levels):
+        self.groups = [tuple(g) if isinstance(g, list) else g for g in groups]  # JSON turns tuples to lists
+        self.unit = unit
+        self.offsets = np.asarray(offsets, dtype=np.int64)  # per group + 1, into times/levels
+        self.times = np.asarray(times, dtype=np.int64)      # bucket of each change point
+        self.levels = np.asarray(levels, dtype=np.int64)    # active permits from that bucket on
+        self._group_index = {group: i for i, group in enumerate(self.groups)}
+        self._search_keys = self._keys(np.repeat(np.arange(len(self.groups)), np.diff(self.offsets)), self.times)
+
+    @classmethod
+    def from_intervals(cls, groups, start, end, unit="h") -> "Occupancy":
+        """Sweep (group, start, end) intervals into per-group change points.
+
+        Args:
+            groups: Group label per interval (e.g. ZIP code, or (ZIP, type) tuples)
+            start: Interval starts (datetime-like)
+            end: Interval ends, exclusive; ends before the start are treated as
+                ending in the start bucket
+            unit: Bucket size, one of ``UNITS``
+        """
+        codes, labels = pd.factorize(groups if hasattr(groups, "dtype") else pd.Series(list(groups)), sort=True)
+        first = to_buckets(start, unit)
+        end_values = np.asarray(end, dtype="datetime64[ns]")
+        last = np.maximum(to_buckets(end_values - np.timedelta64(1, "ns"), unit), first)
+
+        group = np.concatenate([codes, codes]).astype(np.int64)
+        times = np.concatenate([first, last + 1])
+        deltas = np.concatenate([np.ones(len(first), dtype=np.int64), -np.ones(len(first), dtype=np.int64)])
+        order = np.lexsort((times, group))
+        group, times, deltas = group[order], times[order], deltas[order]
+
+        # Collapse boundaries sharing a (group, bucket), then keep real changes
+        if len(group):
+            new_key = np.r_[True, (group[1:] != group[:-1]) | (times[1:] != times[:-1])]
+            starts = np.flatnonzero(new_key)
+            deltas = np.add.reduceat(deltas, starts)
+            group, times = group[starts], times[starts]
+        changed = deltas != 0
+        group, times, levels = group[changed], times[changed], np.cumsum(deltas)[changed]
+
+        offsets = np.searchsorted(group, np.arange(len(labels) + 1), side="left")
+        return cls(list(labels), unit, offsets, times, levels)
+
+    def _keys(self, group_index, buckets):
+        return (np.asarray(group_index, dtype=np.int64) << _KEY_SHIFT) + np.asarray(buckets, dtype=np.int64)
+
+    def levels_at(self, group_index, buckets) -> np.ndarray:
+        """Active permits for (group index, bucket) pairs, by binary search."""
+        group_index = np.asarray(group_index, dtype=np.int64)
+        position = np.searchsorted(self._search_keys, self._keys(group_index, buckets), side="right") - 1
+        inside = position >= self.offsets[group_index]
+        return np.where(inside, self.levels[np.maximum(position, 0)], 0)
+
+    def series(self, group, start=None, end=None) -> pd.Series:
+        """Dense active-permit series for one group over [start, end] (defaults to its span)."""
+        i = self._group_index[group]
+        times = self.times[self.offsets[i]:self.offsets[i + 1]]
+        first = to_buckets([start], self.unit)[0] if start is not None else (times[0] if len(times) else 0)
+        last = to_buckets([end], self.unit)[0] if end is not None else (times[-1] - 1 if len(times) else -1)
+        buckets = np.arange(first, last + 1)
+        return pd.Series(self.levels_at(np.full(len(buckets), i), buckets),
+                         index=bucket_starts(buckets, self.unit), name="active_permits")
+
+    def cells(self) -> pd.DataFrame:
+        """Every (group, bucket) with at least one active permit: group, bucket, active_permits."""
+        run_lengths = np.diff(np.r_[self.times, 0])
+        group_of = np.repeat(np.arange(len(self.groups)), np.diff(self.offsets))
+        active = self.levels > 0  # the change point after an active run is always in the same group
+        lengths = run_lengths[active]
+        starts = np.repeat(self.times[active], lengths)
+        steps = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return pd.DataFrame({
+            "group": np.repeat(group_of[active], lengths),
+            "bucket": starts + steps,
+            "active_permits": np.repeat(self.levels[active], lengths),
+        })
+
+    def peaks(self) -> pd.DataFrame:
+        """Peak concurrent permits per group and the first bucket it is reached."""
+        nonempty = np.flatnonzero(np.diff(self.offsets) > 0)
+        peak = np.zeros(len(self.groups), dtype=np.int64)
+        when = np.full(len(self.groups), -1, dtype=np.int64)
+        if len(nonempty):
+            starts = self.offsets[nonempty]
+            peak[nonempty] = np.maximum.reduceat(self.levels, starts)
+            # First change point per group reaching its peak
+            hits = np.flatnonzero(self.levels == np.repeat(peak, np.diff(self.offsets)))
+            first_hit = hits[np.searchsorted(hits, starts)]
+            when[nonempty] = self.times[first_hit]
+        starts_at = bucket_starts(np.maximum(when, 0), self.unit)
+        return pd.DataFrame({
+            "group": self.groups,
+            "peak_active": peak,
+            "peak_start": np.where(when >= 0, starts_at.strftime("%Y-%m-%dT%H:%M"), None),
+        })
+
+    def save(self, path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump({
+                "unit": self.unit,
+                "epoch": EPOCH.isoformat(),
+                "groups": self.groups,
+                "offsets": self.offsets.tolist(),
+                "times": self.times.tolist(),
+                "levels": self.levels.tolist(),
+            }, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Path) -> "Occupancy":
+        with open(path) as f:
+            raw = json.load(f)
+        return cls(raw["groups"], raw["unit"], raw["offsets"], raw["times"], raw["levels"])
@@ -0,0 +1,317 @@
+"""Paged, resumable download of the NYC Open Data film permits feed.
+
+The Socrata (SODA) endpoint serves the dataset as CSV pages of
+``$limit`` rows at increasing ``$offset``, ordered by the row id ``:id``.
+``OpenDataClient`` counts the rows of a sync window first, then fetches
+pages over a bounded number of concurrent connections (``connections``),
+retrying transient failures (connection errors, 429, 5xx) with
+exponential backoff. Pages are handed on strictly in order while at most
+``connections`` more are in flight, so memory stays at a few pages however
+large the dataset is.
+
+A sync window is ``since < :updated_at <= until``: the first sync has no
+``since`` and fetches everything, later ones only rows created or changed
+since the previous sync's ``until`` (kept in ``open_data_sync.json`` in
+the raw folder). Each page is normalized to the columns and date format of
+the manual film_permits.csv export and either
+
+  - folded straight into the running counters of the chunked ingest path
+    (``aggregate_feed``, always over the whole feed: folding only changed
+    rows into fresh counters would count amended permits as new), without
+    writing the dataset anywhere, or
+  - appended to a delta CSV (``sync``). After every page the state file
+    records the next page and the delta's size, so an interrupted sync
+    resumes from the last completed page. Once all pages are in, the
+    delta is merged into film_permits.csv: appended as-is when all of its
+    EventIDs are new (so ``process_data.py --incremental`` stays
+    incremental), otherwise the superseded rows are dropped in a streaming
+    rewrite first.
+
+Usage: python data_processing/scripts/open_data.py [--full] [--connections 4] [--page-size 50000]
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from process_data import DATE_FORMAT, counters_to_frames, fold_chunk, new_counters
+
+logger = logging.getLogger(__name__)
+
+DATASET_URL = "https://data.cityofnewyork.us/resource/tg4x-b46p.csv"
+APP_TOKEN_ENV = "NYC_OPEN_DATA_APP_TOKEN"
+STATE_FILE = "open_data_sync.json"
+DELTA_FILE = "film_permits.delta.csv"
+PERMITS_FILE = "film_permits.csv"
+
+DEFAULT_PAGE_SIZE = 50_000
+DEFAULT_CONNECTIONS = 4
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5  # seconds, doubled per retry
+REWRITE_CHUNKSIZE = 200_000
+
+# SODA field names -> column names of the manual CSV export
+FIELD_NAMES = {
+    "eventid": "EventID",
+    "eventtype": "EventType",
+    "startdatetime": "StartDateTime",
+    "enddatetime": "EndDateTime",
+    "enteredon": "EnteredOn",
+    "eventagency": "EventAgency",
+    "parkingheld": "ParkingHeld",
+    "borough": "Borough",
+    "communityboard_s": "CommunityBoard(s)",
+    "policeprecinct_s": "PolicePrecinct(s)",
+    "category": "Category",
+    "subcategoryname": "SubCategoryName",
+    "country": "Country",
+    "zipcode_s": "ZipCode(s)",
+}
+DATE_COLUMNS = ["StartDateTime", "EndDateTime", "EnteredOn"]
+UPDATED_AT = ":updated_at"
+
+
+class TransientHTTPError(Exception):
+    """A failed request that is worth retrying."""
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def normalize_page(data: bytes) -> pd.DataFrame:
+    """One SODA CSV page as rows of the manual export (same columns and date format)."""
+    page = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, na_values=[""])
+    page = page.drop(columns=[c for c in page.columns if c.startswith(":")]).rename(columns=FIELD_NAMES)
+    for column in DATE_COLUMNS:
+        if column in page:
+            parsed = pd.to_datetime(page[column], format="ISO8601", errors="coerce")
+            page[column] = parsed.dt.strftime(DATE_FORMAT).where(parsed.notna(), page[column])
+    return page
+
+
+class OpenDataClient:
+    def __init__(self, url=DATASET_URL, page_size=DEFAULT_PAGE_SIZE, connections=DEFAULT_CONNECTIONS,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=60, app_token=None):
+        self.url = url
+        self.page_size = page_size
+        self.connections = connections
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.app_token = app_token or os.environ.get(APP_TOKEN_ENV)
+        self._slots = {}  # event loop -> connection semaphore
+
+    @staticmethod
+    def where(since=None, until=None):
+        clauses = [f"{UPDATED_AT} > '{since}'"] if since else []
+        if until:
+            clauses.append(f"{UPDATED_AT} <= '{until}'")
+        return " AND ".join(clauses)
+
+    def _get(self, params) -> bytes:
+        request = urllib.request.Request(f"{self.url}?{urllib.parse.urlencode(params)}")
+        if self.app_token:
+            request.add_header("X-App-Token", self.app_token)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise TransientHTTPError(f"HTTP {e.code}") from e
+            raise
+        except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+            raise TransientHTTPError(str(e)) from e
+
+    async def request(self, params) -> bytes:
+        """GET with the connection limit, retrying transient failures with backoff."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._slots:
+            self._slots = {loop: asyncio.Semaphore(self.connections)}
+        for attempt in range(self.retries + 1):
+            async with self._slots[loop]:
+                try:
+                    return await asyncio.to_thread(self._get, params)
+                except TransientHTTPError as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self.backoff * 2 ** attempt
+                    logger.warning(f"{e}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def count(self, where="") -> int:
+        params = {"$select": "count(*) AS n"}
+        if where:
+            params["$where"] = where
+        body = await self.request(params)
+        return int(pd.read_csv(io.BytesIO(body))["n"].iloc[0])
+
+    async def fetch_page(self, index, where="") -> bytes:
+        params = {"$select": ":*, *", "$order": ":id", "$limit": self.page_size,
+                  "$offset": index * self.page_size}
+        if where:
+            params["$where"] = where
+        return await self.request(params)
+
+    async def pages(self, where="", first=0, last=None):
+        """Yield (index, raw CSV) for pages ``first``..``last - 1`` in order."""
+        if last is None:
+            last = -(-await self.count(where) // self.page_size)
+        in_flight = deque()
+        next_index = first
+        try:
+            while in_flight or next_index < last:
+                while next_index < last and len(in_flight) <= self.connections:
+                    in_flight.append((next_index, asyncio.ensure_future(self.fetch_page(next_index, where))))
+                    next_index += 1
+                index, task = in_flight.popleft()
+                yield index, await task
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+
+async def aggregate_feed(client: OpenDataClient):
+    """Fold every page of the feed into the chunked-ingest counters.
+
+    Returns ((weekly_counts, total_counts, total_by_type), dropped) like
+    ``aggregate_permits_chunked``, without storing the dataset.
+    """
+    counters = new_counters()
+    dropped = 0
+    async for _, data in client.pages(client.where()):
+        dropped += fold_chunk(counters, normalize_page(data))
+    return counters_to_frames(counters), dropped
+
+
+def load_sync_state(state_path: Path) -> dict:
+    if not Path(state_path).exists():
+        return {}
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def save_sync_state(state: dict, state_path: Path) -> None:
+    tmp = Path(state_path).with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, state_path)
+
+
+def _merge_delta(permits_path: Path, delta_path: Path) -> str:
+    """Merge the delta into film_permits.csv; returns "created", "appended" or "rewritten"."""
+    if not permits_path.exists():
+        os.replace(delta_path, permits_path)
+        return "created"
+    columns = pd.read_csv(permits_path, nrows=0).columns.tolist()
+    delta = pd.read_csv(delta_path, dtype=str, keep_default_na=False).reindex(columns=columns, fill_value="")
+    changed = set(delta["EventID"])
+    superseded = any(
+        chunk["EventID"].isin(changed).any()
+        for chunk in pd.read_csv(permits_path, usecols=["EventID"], dtype=str, chunksize=REWRITE_CHUNKSIZE)
+    )
+    if not superseded:
+        with open(permits_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        delta.to_csv(permits_path, mode="a", header=False, index=False)
+        os.remove(delta_path)
+        return "appended"
+
+    # Amended permits: drop their old rows while copying, then add the new versions
+    tmp = permits_path.with_suffix(".tmp")
+    with open(tmp, "w", newline="") as f:
+        pd.DataFrame(columns=columns).to_csv(f, index=False)
+        for chunk in pd.read_csv(permits_path, dtype=str, keep_default_na=False, chunksize=REWRITE_CHUNKSIZE):
+            chunk[~chunk["EventID"].isin(changed)].to_csv(f, header=False, index=False)
+        delta.to_csv(f, header=False, index=False)
+    os.replace(tmp, permits_path)
+    os.remove(delta_path)
+    return "rewritten"
+
+
+async def sync(raw_dir, client: OpenDataClient, full=False, now=None) -> dict:
+    """Bring raw_dir/film_permits.csv up to date with the feed; returns the sync summary.
+
+    ``full`` ignores the previous sync and downloads everything again.
+    """
+    raw_dir = Path(raw_dir)
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    state_path = raw_dir / STATE_FILE
+    delta_path = raw_dir / DELTA_FILE
+    permits_path = raw_dir / PERMITS_FILE
+    state = load_sync_state(state_path)
+
+    pending = state.get("pending")
+    delta_size = delta_path.stat().st_size if delta_path.exists() else 0
+    if pending and (full or pending["page_size"] != client.page_size or pending["url"] != client.url
+                    or delta_size < pending["delta_bytes"]):
+        pending = None
+    if pending:
+        print(f"⏯️ Resuming sync at page {pending['next_page'] + 1} of {pending['pages']}...")
+        with open(delta_path, "ab") as f:
+            f.truncate(pending["delta_bytes"])
+    else:
+        since = None if full else state.get("watermark")
+        until = _timestamp(now or datetime.now(timezone.utc))
+        where = client.where(since, until)
+        rows = await client.count(where)
+        pending = {"url": client.url, "page_size": client.page_size, "since": since, "until": until,
+                   "rows": rows, "pages": -(-rows // client.page_size), "next_page": 0, "delta_bytes": 0}
+        if full and permits_path.exists():
+            pending["replace"] = True
+        delta_path.unlink(missing_ok=True)
+        print(f"⬇️ Fetching {rows:,} permits {'changed since ' + since if since else '(full download)'}...")
+    state["pending"] = pending
+    save_sync_state(state, state_path)
+
+    where = client.where(pending["since"], pending["until"])
+    async for index, data in client.pages(where, pending["next_page"], pending["pages"]):
+        page = normalize_page(data)
+        with open(delta_path, "a", newline="") as f:
+            page.to_csv(f, header=pending["delta_bytes"] == 0, index=False)
+            pending["delta_bytes"] = f.tell()
+        pending["next_page"] = index + 1
+        save_sync_state(state, state_path)
+
+    if pending.get("replace") and pending["delta_bytes"]:
+        permits_path.unlink(missing_ok=True)  # already gone if a resumed sync stopped right here
+    mode = _merge_delta(permits_path, delta_path) if pending["delta_bytes"] else "unchanged"
+    delta_path.unlink(missing_ok=True)
+    state = {"url": client.url, "watermark": pending["until"], "rows": pending["rows"], "mode": mode}
+    save_sync_state(state, state_path)
+    print(f"✅ {pending['rows']:,} permits synced ({mode})")
+    return state
+
+
+def main(argv=None, project_root=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    project_root = project_root or Path(__file__).resolve().parents[2]
+    parser = argparse.ArgumentParser(description="Download film permits from NYC Open Data")
+    parser.add_argument("--raw-dir", type=Path, default=project_root / "data_processing" / "data" / "raw")
+    parser.add_argument("--url", default=DATASET_URL, help="SODA CSV endpoint of the dataset")
+    parser.add_argument("--full", action="store_true", help="Ignore the last sync and download everything")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help="Pages fetched concurrently")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    args = parser.parse_args(argv)
+    client = OpenDataClient(args.url, args.page_size, args.connections, args.retries)
+    asyncio.run(sync(args.raw_dir, client, full=args.full))
+
+
+if __name__ == "__main__":
+    main()
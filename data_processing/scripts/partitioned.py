@@ -0,0 +1,156 @@
+"""Partitioned map/reduce aggregation of film_permits.csv across processes.
+
+The weekly, per-ZIP and per-ZIP/type counts are sums, so the CSV can be
+cut into partitions, each reduced independently to a partial aggregate,
+and the partials added up:
+
+  partition  ``partition_csv`` splits the file into byte ranges aligned to
+             line starts; a ``Partition`` is a plain picklable record
+             (path, byte range, column names), so it can be shipped to any
+             worker that sees the same file.
+  map        ``aggregate_partition`` streams only its byte range and returns
+             a ``Partial``: the (year, week, ZIP, type) counts of its rows
+             plus the rows read/dropped - a few thousand rows however large
+             the partition.
+  reduce     ``merge_partials`` adds the partials up, sorted by key, so the
+             result does not depend on partition count or completion order.
+             The per-ZIP and per-ZIP/type totals are rollups of the merged
+             weekly counts.
+
+Execution goes through a runner with a single ``map(fn, tasks)`` method
+returning results in task order: ``SerialRunner`` in-process,
+``LocalRunner`` over a ``ProcessPoolExecutor``. A multi-node runner (a
+cluster client's ``map``) only has to provide the same method.
+
+Byte ranges assume no quoted field spans a line break, which holds for the
+NYC Open Data permits export.
+"""
+import csv
+import functools
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from process_data import TYPE_KEYS, WEEKLY_KEYS, aggregate_permits, expand_permits, read_permits_chunks
+
+
+@dataclass(frozen=True)
+class Partition:
+    path: str
+    start: int          # byte offset of the first row (a line start)
+    end: int            # byte offset just past the last row
+    names: tuple        # CSV header, since the range has none
+
+
+@dataclass
+class Partial:
+    weekly: pd.DataFrame  # WEEKLY_KEYS + permit_count
+    rows: int
+    dropped: int
+
+
+def partition_csv(path, partitions: int) -> List[Partition]:
+    """Split the CSV body into about ``partitions`` byte ranges of similar size."""
+    path = Path(path)
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        names = tuple(next(csv.reader([f.readline().decode("utf-8-sig")]), ()))
+        body = f.tell()
+        cuts = [body]
+        for i in range(1, partitions):
+            f.seek(max(body + (size - body) * i // partitions - 1, cuts[-1]))
+            f.readline()  # move to the next line start
+            cuts.append(min(f.tell(), size))
+        cuts.append(size)
+    return [Partition(str(path), start, end, names) for start, end in zip(cuts, cuts[1:]) if end > start]
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw reader over an open binary file from its position up to byte ``end``."""
+
+    def __init__(self, f, end: int):
+        self._f = f
+        self._remaining = end - f.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._f.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+
+def aggregate_partition(partition: Partition, chunksize: Optional[int] = None) -> Partial:
+    """Map step: weekly counts of the rows in one byte range.
+
+    The range is streamed, so with ``chunksize`` only one chunk of it is in memory.
+    """
+    weekly, rows, dropped = [], 0, 0
+    with open(partition.path, "rb") as f:
+        f.seek(partition.start)
+        reader = io.BufferedReader(_RangeReader(f, partition.end))
+        chunks = read_permits_chunks(reader, chunksize, names=list(partition.names))
+        for chunk in chunks if chunksize else [chunks]:
+            rows += len(chunk)
+            expanded, chunk_dropped = expand_permits(chunk)
+            dropped += chunk_dropped
+            weekly.append(aggregate_permits(expanded)[0])
+    return Partial(_sum_by(weekly, WEEKLY_KEYS, "permit_count"), rows, dropped)
+
+
+def _sum_by(frames, keys, name):
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=keys + [name])
+    merged = pd.concat(frames, ignore_index=True).astype({"EventType": str})
+    return merged.groupby(keys, sort=True)[name].sum().reset_index()
+
+
+def merge_partials(partials: List[Partial]):
+    """Reduce step: (weekly_counts, total_counts, total_by_type) and rows dropped."""
+    weekly = _sum_by([partial.weekly for partial in partials], WEEKLY_KEYS, "permit_count")
+    totals = weekly.groupby("ZipCode(s)", sort=True)["permit_count"].sum().reset_index(name="total_permits")
+    by_type = weekly.groupby(TYPE_KEYS, sort=True)["permit_count"].sum().reset_index(name="type_count")
+    return (weekly, totals, by_type), sum(partial.dropped for partial in partials)
+
+
+class SerialRunner:
+    """Runs every task in this process (reference and debugging)."""
+
+    def map(self, fn, tasks):
+        return [fn(task) for task in tasks]
+
+
+class LocalRunner:
+    """Runs tasks in a pool of worker processes on this machine."""
+
+    def __init__(self, workers: Optional[int] = None, mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+
+    def map(self, fn, tasks):
+        tasks = list(tasks)
+        with ProcessPoolExecutor(min(self.workers, max(len(tasks), 1)), mp_context=self.mp_context) as pool:
+            return list(pool.map(fn, tasks))
+
+
+def aggregate_partitioned(permits_path, partitions: Optional[int] = None, runner=None,
+                          chunksize: Optional[int] = None):
+    """Aggregate the permits CSV as ``partitions`` map tasks merged into the serial outputs.
+
+    ``chunksize`` bounds the rows each worker parses at a time. Returns
+    ((weekly_counts, total_counts, total_by_type), dropped), the same as
+    ``aggregate_permits_chunked``.
+    """
+    runner = runner or LocalRunner()
+    tasks = partition_csv(permits_path, partitions or getattr(runner, "workers", 1))
+    return merge_partials(runner.map(functools.partial(aggregate_partition, chunksize=chunksize), tasks))
@@ -0,0 +1,173 @@
+"""Content-hashed columnar cache for parsed permits and boundaries.
+
+Cached frames are stored as Arrow IPC (Feather) files named after the
+content hash of the raw inputs they were built from, so editing or replacing
+a raw file automatically misses the cache. Geometries are stored as WKB next
+to their attributes. File hashes are memoised by (size, mtime) so a warm
+load does not even re-read the raw files.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached representation changes
+CACHE_VERSION = 1
+
+# data_processing/data/cache, where DataLoader and process_data.py keep theirs
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / 'data_processing' / 'data' / 'cache'
+
+HASH_BLOCK_SIZE = 1 << 20
+META_KEY = b"permit_cache"
+
+
+class PermitCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "hashes.json"
+
+    def _load_index(self) -> dict:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def file_hash(self, path: Path) -> str:
+        """SHA-256 of a file's contents, memoised by size and mtime."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        index = self._load_index()
+        entry = index.get(str(path))
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        index[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        # Replace the index atomically so a concurrent reader never sees half of it
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        tmp_path.replace(self.index_path)
+        return digest.hexdigest()
+
+    def key(self, name: str, sources) -> str:
+        """Cache key for ``name`` built from the given raw files."""
+        digest = hashlib.sha256(f"{CACHE_VERSION}:{name}".encode())
+        for source in sources:
+            digest.update(self.file_hash(source).encode())
+        return digest.hexdigest()[:24]
+
+    def _entry_path(self, name: str, key: str) -> Path:
+        return self.cache_dir / f"{name}-{key}.feather"
+
+    def _write(self, name: str, key: str, df: pd.DataFrame, meta: dict) -> None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[META_KEY] = json.dumps(meta).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        path = self._entry_path(name, key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            feather.write_feather(table, tmp_path, compression="lz4")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        tmp_path.replace(path)
+        # Only then drop stale entries for the same name, so a reader always finds one
+        for stale in self.cache_dir.glob(f"{name}-*.feather"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def _read(self, name: str, key: str):
+        path = self._entry_path(name, key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except FileNotFoundError:  # not cached, or removed by a concurrent write
+            return None, None
+        meta = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+        return table.to_pandas(), meta
+
+    def get_frame(self, name: str, sources, build) -> pd.DataFrame:
+        """Return the cached frame for ``name`` or build, store and return it.
+
+        ``df.attrs`` set by ``build`` are stored with the frame and restored
+        on later loads.
+        """
+        key = self.key(name, sources)
+        df, meta = self._read(name, key)
+        if df is not None:
+            logger.info(f"Cache hit: {name}")
+            df.attrs.update(meta.get("attrs", {}))
+            return df
+
+        logger.info(f"Cache miss: {name}, building...")
+        df = build()
+        try:
+            self._write(name, key, df.reset_index(drop=True), {"attrs": df.attrs})
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.warning(f"Could not cache {name}: {str(e)}")
+        return df
+
+    def get_geoframe(self, name: str, sources, build):
+        """Like ``get_frame`` for GeoDataFrames; geometry is stored as WKB."""
+        import geopandas as gpd
+        import shapely
+
+        key = self.key(name, sources)
+        df, meta = self._read(name, key)
+        if df is not None:
+            logger.info(f"Cache hit: {name}")
+            geometry_column = meta["geometry_column"]
+            geometry = shapely.from_wkb(df.pop(geometry_column).to_numpy())
+            gdf = gpd.GeoDataFrame(df, geometry=gpd.GeoSeries(geometry, name=geometry_column), crs=meta["crs"])
+            gdf.attrs.update(meta.get("attrs", {}))
+            return gdf
+
+        logger.info(f"Cache miss: {name}, building...")
+        gdf = build()
+        geometry_column = gdf.geometry.name
+        df = pd.DataFrame(gdf.drop(columns=geometry_column)).reset_index(drop=True)
+        df[geometry_column] = shapely.to_wkb(gdf.geometry.to_numpy())
+        meta = {
+            "geometry_column": geometry_column,
+            "crs": gdf.crs.to_json() if gdf.crs is not None else None,
+            "attrs": gdf.attrs,
+        }
+        try:
+            self._write(name, key, df, meta)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.warning(f"Could not cache {name}: {str(e)}")
+        return gdf
+
+
+def load_json_frame(json_path: Path, use_cache: bool = True, cache_dir: Path = None) -> pd.DataFrame:
+    """Load a processed records-JSON file as a DataFrame, through the cache.
+
+    The cache is the project's ``data_processing/data/cache`` unless
+    ``cache_dir`` is given, wherever under ``processed`` the file is.
+    """
+    json_path = Path(json_path)
+
+    def build():
+        with open(json_path) as f:
+            return pd.DataFrame(json.load(f))
+
+    if not use_cache:
+        return build()
+    cache = PermitCache(cache_dir or DEFAULT_CACHE_DIR)
+    return cache.get_frame(json_path.stem, [json_path], build)
@@ -0,0 +1,117 @@
+"""Dense ZIP x week x EventType permit cube with prefix sums along weeks.
+
+The weekly aggregate is integer-encoded once into a dense cube, and the
+cumulative sum over the week axis is stored alongside it. The count for any
+week range [a, b] is then ``cum[:, b + 1] - cum[:, a]``, so answering "counts
+per ZIP for weeks a..b and these types" costs O(ZIPs x types) no matter how
+many weeks or rows the history has.
+
+The cube is exported as ``permit_cube.json`` (axes + shape) and
+``permit_cube.bin`` (little-endian uint32 prefix sums, shape
+[zips, weeks + 1, types], row-major) so the map can load it directly.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from rolling_metrics import iso_week_mondays
+
+MANIFEST_FILE = "permit_cube.json"
+DATA_FILE = "permit_cube.bin"
+
+
+class PermitCube:
+    def __init__(self, zips, weeks, types, cumulative):
+        self.zips = list(zips)
+        self.weeks = [tuple(week) for week in weeks]  # (year, week), chronological
+        self.types = list(types)
+        self.cumulative = cumulative  # shape (zips, weeks + 1, types)
+        self._week_index = {week: i for i, week in enumerate(self.weeks)}
+        self._type_index = {event_type: i for i, event_type in enumerate(self.types)}
+
+    @classmethod
+    def from_weekly_counts(cls, weekly_counts: pd.DataFrame) -> "PermitCube":
+        """Build the cube from the weekly_permits frame (year, week, ZipCode(s), EventType, permit_count)."""
+        zip_codes, zips = pd.factorize(weekly_counts["ZipCode(s)"], sort=True)
+        type_codes, types = pd.factorize(weekly_counts["EventType"], sort=True)
+        week_keys = weekly_counts["year"].astype("int64") * 100 + weekly_counts["week"].astype("int64")
+        week_codes, week_values = pd.factorize(week_keys, sort=True)
+        # Order weeks by their Monday: Jan 1-3 labelled (year, 53) belong before (year, 1)
+        order = np.lexsort((week_values, iso_week_mondays(week_values // 100, week_values % 100)))
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        week_codes, week_values = rank[week_codes], week_values[order]
+
+        shape = (len(zips), len(week_values), len(types))
+        flat = np.bincount(
+            np.ravel_multi_index((zip_codes, week_codes, type_codes), shape),
+            weights=weekly_counts["permit_count"].to_numpy(),
+            minlength=int(np.prod(shape)),
+        )
+        counts = flat.reshape(shape).astype(np.uint32)
+
+        cumulative = np.zeros((shape[0], shape[1] + 1, shape[2]), dtype=np.uint32)
+        np.cumsum(counts, axis=1, out=cumulative[:, 1:, :])
+        weeks = [(int(key) // 100, int(key) % 100) for key in week_values]
+        return cls(zips.tolist(), weeks, types.tolist(), cumulative)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Per-week counts, shape (zips, weeks, types)."""
+        return np.diff(self.cumulative.astype(np.int64), axis=1)
+
+    def week_index(self, year: int, week: int) -> int:
+        return self._week_index[(year, week)]
+
+    def query(self, week_start=0, week_end=None, types=None) -> pd.Series:
+        """Permit counts per ZIP for weeks [week_start, week_end] (inclusive indices).
+
+        Args:
+            week_start: First week index (into ``self.weeks``)
+            week_end: Last week index, defaults to the latest week
+            types: EventTypes to include, defaults to all
+
+        Returns:
+            Series of counts indexed by ZIP code
+        """
+        if week_end is None:
+            week_end = len(self.weeks) - 1
+        window = (self.cumulative[:, week_end + 1, :].astype(np.int64)
+                  - self.cumulative[:, week_start, :])
+        if types is not None:
+            window = window[:, [self._type_index[t] for t in types if t in self._type_index]]
+        return pd.Series(window.sum(axis=1), index=pd.Index(self.zips, name="ZipCode(s)"), name="permit_count")
+
+    def save(self, output_dir: Path) -> None:
+        """Write the manifest and the raw prefix-sum buffer for the map.
+
+        Both go to temporary names first and are moved into place, the
+        manifest last, so readers never see a partially written file.
+        """
+        output_dir = Path(output_dir)
+        manifest = {
+            "shape": list(self.cumulative.shape),
+            "dtype": "uint32",
+            "zips": self.zips,
+            "weeks": [{"year": year, "week": week} for year, week in self.weeks],
+            "types": self.types,
+            "data": DATA_FILE,
+        }
+        data_tmp = output_dir / f"{DATA_FILE}.tmp"
+        manifest_tmp = output_dir / f"{MANIFEST_FILE}.tmp"
+        self.cumulative.astype("<u4").tofile(data_tmp)
+        with open(manifest_tmp, "w") as f:
+            json.dump(manifest, f)
+        data_tmp.replace(output_dir / DATA_FILE)
+        manifest_tmp.replace(output_dir / MANIFEST_FILE)
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "PermitCube":
+        output_dir = Path(output_dir)
+        with open(output_dir / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        cumulative = np.fromfile(output_dir / manifest["data"], dtype="<u4").reshape(manifest["shape"])
+        weeks = [(week["year"], week["week"]) for week in manifest["weeks"]]
+        return cls(manifest["zips"], weeks, manifest["types"], cumulative)
@@ -0,0 +1,270 @@
+"""Stage scheduler with parallel execution and fingerprint-cached stage outputs.
+
+A pipeline is a set of named stages. Each stage declares the stages whose
+outputs it takes as arguments (``inputs``), the raw files it reads
+(``sources``) and the files it writes (``outputs``). Stages whose inputs are
+ready run concurrently in a thread pool; pandas, GDAL and file I/O release
+the GIL for most of their work.
+
+With a cache directory, every stage gets a fingerprint: its name, the code
+it runs, its ``params``, the content hash of its sources and the
+fingerprints of its inputs. The code is the source of the stage function
+and, transitively, of the project functions it references, plus the whole
+file of any project module or class it uses (``aggregate_permits``,
+``GroupCounts``, ``color_breaks``, ...). Modules a function imports
+locally are found on the import path, loaded or not. Library code is not
+included. A stage whose fingerprint matches a stored
+result (and whose output files still exist) is not run. Its stored value is
+only loaded if a stage that does run needs it. Editing one output step
+therefore re-runs that step alone; replacing a raw file re-runs everything
+downstream of it.
+"""
+import dis
+import hashlib
+import importlib.util
+import inspect
+import pickle
+import sysconfig
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from permit_cache import PermitCache
+from profiling import count_rows, profiler
+
+# Bump when the stored stage representation changes
+STAGE_CACHE_VERSION = 2
+
+# Code under these paths (the interpreter and installed packages) is not hashed
+LIBRARY_PATHS = tuple(
+    str(Path(sysconfig.get_paths()[key]).resolve()) for key in ("stdlib", "platstdlib", "purelib", "platlib")
+)
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), sources=(), outputs=(), params=None, cache=True):
+        """
+        Args:
+            name: Unique stage name
+            func: Called with the values of ``inputs``, in order
+            inputs: Names of the stages this one depends on
+            sources: Raw files read by ``func``
+            outputs: Files written by ``func``; a cached result is only
+                reused while they all exist
+            params: Anything else that changes the result (paths, flags),
+                as a JSON-able/repr-stable value
+            cache: False for stages with side effects that must always run
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.sources = tuple(Path(s) for s in sources)
+        self.outputs = tuple(Path(o) for o in outputs)
+        self.params = params
+        self.cache = cache
+
+
+def _project_file(obj):
+    """Source file of ``obj``'s module when it is project code, else None."""
+    path = getattr(inspect.getmodule(obj), "__file__", None)
+    if path is None:
+        return None
+    path = str(Path(path).resolve())
+    return None if path.startswith(LIBRARY_PATHS) else path
+
+
+def _names(code):
+    """Global names used by ``code`` and its nested code objects."""
+    yield from code.co_names
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _names(const)
+
+
+def _imports(code):
+    """Modules imported inside ``code`` and its nested code objects."""
+    for instruction in dis.get_instructions(code):
+        if instruction.opname == "IMPORT_NAME":
+            yield instruction.argval
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _imports(const)
+
+
+def _module_file(name):
+    """Source file of module ``name`` when it is project code, else None.
+
+    Found on the import path, so it does not matter whether the module has
+    been imported yet.
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.has_location or not spec.origin:
+        return None
+    path = str(Path(spec.origin).resolve())
+    return None if path.startswith(LIBRARY_PATHS) else path
+
+
+def _referenced(func):
+    for name in _names(func.__code__):
+        if name in func.__globals__:
+            yield func.__globals__[name]
+    for cell in func.__closure__ or ():
+        try:
+            yield cell.cell_contents
+        except ValueError:  # not assigned yet
+            pass
+
+
+def _code_hash(func) -> str:
+    """Hash of ``func``'s source and of the project code it depends on."""
+    digest = hashlib.sha256()
+    files, seen, pending = set(), set(), [func]
+    while pending:
+        func = pending.pop()
+        if id(func) in seen:
+            continue
+        seen.add(id(func))
+        try:
+            digest.update(inspect.getsource(func).encode())
+        except (OSError, TypeError):
+            digest.update(func.__code__.co_code)
+        for obj in _referenced(func):
+            if inspect.isfunction(obj) and _project_file(obj):
+                pending.append(obj)
+            elif (inspect.ismodule(obj) or inspect.isclass(obj)) and _project_file(obj):
+                files.add(_project_file(obj))
+        # Modules imported inside the function, whether or not they are loaded yet
+        files.update(path for path in map(_module_file, _imports(func.__code__)) if path)
+    for path in sorted(files):
+        digest.update(path.encode())
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, stages, cache_dir: Path = None, workers: int = None):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self.order = self._topological_order()
+        self.cache = PermitCache(cache_dir) if cache_dir else None
+        self.stage_dir = Path(cache_dir) / "stages" if cache_dir else None
+        self.workers = workers
+        self.report = {}
+
+    def _topological_order(self):
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(missing)}")
+
+        order, done = [], set()
+        pending = list(self.stages.values())
+        while pending:
+            ready = [s for s in pending if all(name in done for name in s.inputs)]
+            if not ready:
+                raise ValueError(f"Stage dependencies form a cycle: {', '.join(s.name for s in pending)}")
+            for stage in ready:
+                order.append(stage.name)
+                done.add(stage.name)
+            pending = [s for s in pending if s.name not in done]
+        return order
+
+    def fingerprints(self) -> dict:
+        """Fingerprint of every stage, derived from code, params, sources and inputs."""
+        fingerprints = {}
+        for name in self.order:
+            stage = self.stages[name]
+            digest = hashlib.sha256(f"{STAGE_CACHE_VERSION}:{name}:{_code_hash(stage.func)}".encode())
+            digest.update(repr(stage.params).encode())
+            for source in stage.sources:
+                digest.update(self.cache.file_hash(source).encode() if source.exists() else b"missing")
+            for upstream in stage.inputs:
+                digest.update(fingerprints[upstream].encode())
+            fingerprints[name] = digest.hexdigest()[:24]
+        return fingerprints
+
+    def _entry_path(self, name, fingerprint) -> Path:
+        return self.stage_dir / f"{name}-{fingerprint}.pkl"
+
+    def _is_cached(self, stage, fingerprint) -> bool:
+        return (stage.cache and self._entry_path(stage.name, fingerprint).exists()
+                and all(path.exists() for path in stage.outputs))
+
+    def _load(self, name, fingerprint):
+        with open(self._entry_path(name, fingerprint), "rb") as f:
+            return pickle.load(f)
+
+    def _store(self, name, fingerprint, value):
+        self.stage_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.stage_dir.glob(f"{name}-*.pkl"):
+            stale.unlink()
+        path = self._entry_path(name, fingerprint)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    def plan(self):
+        """Return (fingerprints, stages to run, cached stages whose value is needed)."""
+        if self.cache is None:
+            return {}, set(self.order), set()
+        fingerprints = self.fingerprints()
+        run = {name for name in self.order if not self._is_cached(self.stages[name], fingerprints[name])}
+        load = {upstream for name in run for upstream in self.stages[name].inputs if upstream not in run}
+        return fingerprints, run, load
+
+    def _execute(self, name, fingerprint, values, load):
+        stage = self.stages[name]
+        started = time.perf_counter()
+        if load:
+            with profiler.stage(f"{name} (load cached)") as timer:
+                value = self._load(name, fingerprint)
+                timer.rows_out = count_rows(value)
+        else:
+            args = [values[upstream] for upstream in stage.inputs]
+            rows_in = [count_rows(arg) for arg in args]
+            with profiler.stage(name, rows_in=sum(rows_in) if rows_in and None not in rows_in else None) as timer:
+                value = stage.func(*args)
+                timer.rows_out = count_rows(value)
+            if fingerprint and stage.cache:
+                self._store(name, fingerprint, value)
+        self.report[name] = {"status": "loaded" if load else "ran", "seconds": time.perf_counter() - started}
+        return value
+
+    def run(self) -> dict:
+        """Run every stage that is not cached; returns the values that were computed or loaded."""
+        fingerprints, run, load = self.plan()
+        self.report = {name: {"status": "cached", "seconds": 0.0} for name in self.order}
+        active = [name for name in self.order if name in run or name in load]
+        values = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            remaining = list(active)
+            while remaining or futures:
+                # Cached inputs that are only loaded have no dependencies of their own
+                ready = [name for name in remaining
+                         if name in load or all(upstream in values for upstream in self.stages[name].inputs)]
+                for name in ready:
+                    remaining.remove(name)
+                    future = pool.submit(self._execute, name, fingerprints.get(name), values, name in load)
+                    futures[future] = name
+                if not futures:
+                    raise RuntimeError(f"Stages cannot be scheduled: {', '.join(remaining)}")
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures.pop(future)
+                    try:
+                        values[name] = future.result()
+                    except BaseException:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+        return values
@@ -0,0 +1,175 @@
+"""Fast approximate preview of the aggregates from a stratified permit sample.
+
+Most of a full run goes into parsing dates and exploding ZIPs for every
+permit. A preview reads the CSV once (raw strings only), assigns each
+permit to a stratum (its first ZIP x EventType), counts every stratum
+exactly and keeps a uniform sample of at most ``rows_per_stratum`` permits
+per stratum: the rows with the smallest content hash, so the sample only
+depends on the seed and the rows, not on chunking or row order. Only the
+sample is parsed, exploded and aggregated.
+
+Within stratum h (N_h permits, k_h sampled) each sampled permit stands for
+N_h / k_h permits. For every output cell the estimate is the weighted sum
+of sampled rows in that cell, with the variance of a stratified simple
+random sample without replacement:
+
+  Var = sum_h N_h^2 (1 - k_h / N_h) s_h^2 / k_h
+
+(s_h^2 the sample variance of the per-permit cell count in stratum h).
+Cells get ``ci_low``/``ci_high`` at ``CONFIDENCE``; the lower bound is never
+below the rows actually sampled into the cell. Strata with at most
+``rows_per_stratum`` permits are taken whole and contribute no error.
+Cells where no permit was sampled are missing from the preview.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from process_data import TYPE_KEYS, USECOLS, WEEKLY_KEYS, expand_permits, read_permits_chunks
+
+PREVIEW_DIR = "preview"
+DEFAULT_ROWS_PER_STRATUM = 100
+DEFAULT_CHUNKSIZE = 500_000
+CONFIDENCE = 0.95
+Z_SCORE = 1.959964  # two-sided normal quantile for CONFIDENCE
+ERROR_FILE = "preview_error.json"
+
+# Output name, cell keys and count column of each previewed aggregate
+OUTPUTS = {
+    "weekly_permits": (WEEKLY_KEYS, "permit_count"),
+    "total_counts": (["ZipCode(s)"], "total_permits"),
+    "total_by_type": (TYPE_KEYS, "type_count"),
+}
+
+
+def _strata(chunk):
+    """Stratum label (first ZIP | EventType) of each row, built once per distinct pair."""
+    zip_codes, zips = pd.factorize(chunk["ZipCode(s)"].fillna("").astype(str))
+    type_codes, types = pd.factorize(chunk["EventType"].astype(str))
+    primary = pd.Index(zips).str.split(",", n=1).str[0].str.strip()
+    pair_codes, pairs = pd.factorize(zip_codes * len(types) + type_codes)
+    labels = primary[pairs // len(types)] + "|" + pd.Index(types)[pairs % len(types)]
+    return labels.to_numpy()[pair_codes]
+
+
+def _bottom_k(rows, rows_per_stratum):
+    """The rows with the ``rows_per_stratum`` smallest hashes ``u`` in each stratum."""
+    codes, _ = pd.factorize(rows["stratum"])
+    order = np.lexsort((rows["u"].to_numpy(), codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    return rows.iloc[np.sort(order[rank < rows_per_stratum])]
+
+
+def stratified_sample(permits_path, rows_per_stratum=DEFAULT_ROWS_PER_STRATUM, seed=0,
+                      chunksize=DEFAULT_CHUNKSIZE):
+    """Bottom-k sample per stratum in one chunked pass.
+
+    Returns the sampled raw rows (with a ``stratum`` column) and a frame of
+    stratum sizes ``N`` and sample sizes ``k`` indexed by stratum.
+    """
+    if rows_per_stratum < 2:
+        raise ValueError("rows_per_stratum must be at least 2 to estimate errors")
+    hash_key = f"{seed:016d}"[-16:]
+    kept = pd.DataFrame()
+    sizes = pd.Series(dtype="int64")
+    for chunk in read_permits_chunks(permits_path, chunksize):
+        chunk = chunk[USECOLS].astype({"EventType": str})
+        chunk["stratum"] = _strata(chunk)
+        chunk["u"] = pd.util.hash_pandas_object(chunk[USECOLS], index=False, hash_key=hash_key,
+                                                categorize=False).to_numpy()
+        sizes = sizes.add(chunk["stratum"].value_counts(), fill_value=0)
+        # Keep the k smallest hashes per stratum among what was kept so far and this chunk
+        kept = _bottom_k(pd.concat([kept, _bottom_k(chunk, rows_per_stratum)], ignore_index=True),
+                         rows_per_stratum)
+    strata = pd.DataFrame({"N": sizes.astype("int64")})
+    strata["k"] = kept["stratum"].value_counts().reindex(strata.index, fill_value=0)
+    return kept.drop(columns="u").reset_index(drop=True), strata
+
+
+def _estimate(sample_cells, strata, keys, name):
+    """Estimate and CI per cell from (permit, stratum, keys...) rows of the exploded sample."""
+    y = sample_cells.groupby(["permit", "stratum"] + keys, observed=True).size().rename("y").reset_index()
+    y["y2"] = y["y"] ** 2
+    per_stratum = y.groupby(keys + ["stratum"], observed=True)[["y", "y2"]].sum().reset_index()
+    per_stratum = per_stratum.join(strata, on="stratum")
+    n, k = per_stratum["N"], per_stratum["k"]
+    per_stratum["estimate"] = n / k * per_stratum["y"]
+    sample_var = (per_stratum["y2"] - per_stratum["y"] ** 2 / k) / (k.clip(lower=2) - 1)
+    per_stratum["variance"] = np.where(k < n, n ** 2 * (1 - k / n) * sample_var / k, 0.0)
+
+    cells = per_stratum.groupby(keys, observed=True, sort=True)[["estimate", "variance", "y"]].sum()
+    margin = Z_SCORE * np.sqrt(cells["variance"])
+    frame = pd.DataFrame({
+        name: cells["estimate"].round(2),
+        "ci_low": np.maximum(cells["estimate"] - margin, cells["y"]).round(2),
+        "ci_high": (cells["estimate"] + margin).round(2),
+    }, index=cells.index)
+    return frame.reset_index()
+
+
+def estimate_aggregates(sample, strata):
+    """(weekly_counts, total_counts, total_by_type) estimates with CIs, and the estimated dropped rows."""
+    sample = sample.assign(permit=np.arange(len(sample)))
+    valid, _ = expand_permits(sample)  # parses the sample's date columns in place
+    invalid = sample[["StartDateTime", "EndDateTime"]].isna().any(axis=1)
+    sampled_invalid = sample.loc[invalid, "stratum"].value_counts().reindex(strata.index, fill_value=0)
+    dropped = float((sampled_invalid * strata["N"] / strata["k"].clip(lower=1)).sum())
+    frames = tuple(_estimate(valid, strata, keys, name) for keys, name in OUTPUTS.values())
+    return frames, dropped
+
+
+def preview_error(preview_frames, exact_frames):
+    """Error of the preview against the exact aggregates, per output."""
+    report = {}
+    for (output, (keys, name)), preview, exact in zip(OUTPUTS.items(), preview_frames, exact_frames):
+        # Cells with a true count of zero (weeks with only active permits) have no relative error
+        exact = exact[exact[name] > 0]
+        merged = exact[keys + [name]].merge(preview, on=keys, how="left", suffixes=("_exact", ""))
+        estimate = merged[name].fillna(0)
+        truth = merged[f"{name}_exact"]
+        covered = (merged["ci_low"] <= truth) & (truth <= merged["ci_high"])
+        report[output] = {
+            "cells": len(exact),
+            "cells_previewed": int(merged["ci_low"].notna().sum()),
+            "total_relative_error": float(abs(estimate.sum() - truth.sum()) / max(truth.sum(), 1)),
+            "median_cell_relative_error": float((abs(estimate - truth) / truth).median())
+            if len(truth) else 0.0,
+            "ci_coverage": float(covered.mean()) if len(truth) else 1.0,
+        }
+    return report
+
+
+def load_exact_frames(processed_dir):
+    """The exact aggregates of the last full run, or None if there is none."""
+    processed_dir = Path(processed_dir)
+    paths = [processed_dir / "weekly_permits.json", processed_dir / "total_by_type.json"]
+    if not all(path.exists() for path in paths):
+        return None
+    weekly, by_type = (pd.read_json(path, dtype={"ZipCode(s)": str}) for path in paths)
+    totals = by_type.groupby("ZipCode(s)")["type_count"].sum().reset_index(name="total_permits")
+    return weekly, totals, by_type
+
+
+def write_preview(permits_path, processed_dir, rows_per_stratum=DEFAULT_ROWS_PER_STRATUM, seed=0,
+                  chunksize=None):
+    """Write the preview outputs (and their error against the exact run, if any) to processed/preview."""
+    out = Path(processed_dir) / PREVIEW_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    sample, strata = stratified_sample(permits_path, rows_per_stratum, seed, chunksize or DEFAULT_CHUNKSIZE)
+    frames, dropped = estimate_aggregates(sample, strata)
+    for output, frame in zip(OUTPUTS, frames):
+        frame.to_json(out / f"{output}.json", orient="records", indent=2)
+
+    summary = {"permits": int(strata["N"].sum()), "sampled": len(sample), "strata": len(strata),
+               "rows_per_stratum": rows_per_stratum, "seed": seed, "confidence": CONFIDENCE,
+               "dropped_estimate": round(dropped, 2)}
+    exact = load_exact_frames(processed_dir)
+    if exact is not None:
+        summary["error"] = preview_error(frames, exact)
+    with open(out / ERROR_FILE, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
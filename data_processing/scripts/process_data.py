@@ -1,107 +1,565 @@
 import pandas as pd
 import geopandas as gpd
 from pathlib import Path
+from collections import Counter
+import argparse
 import json
 
-def process_data():
-    # =====================
-    # 1. Path Configuration (Consistent)
-    # =====================
-    project_root = Path(__file__).parent.parent.parent  # Correctly goes up to project root
-    raw_data_dir = project_root / "data_processing" / "data" / "raw"
-    processed_data_dir = project_root / "data_processing" / "data" / "processed"
-    processed_data_dir.mkdir(parents=True, exist_ok=True)  # Ensure output dir exists
+import binary_format
+import color_breaks
+import column_store
+from group_counts import GroupCounts
+from boundary_topology import export_topology_levels, read_map_zoom
+from occupancy import Occupancy, bucket_starts
+from permit_cube import MANIFEST_FILE as PERMIT_CUBE_FILE, PermitCube
+from pipeline import Pipeline, Stage
+from profiling import count_rows, profiler
+from rolling_metrics import MANIFEST_FILE as ROLLING_METRICS_FILE, RollingMetrics
+from zip_explode import explode_zips
 
-    # ===================
-    # 2. Data Loading
-    # ===================
-    print("⏳ Loading film permits data...")
-    permits_path = raw_data_dir / "film_permits.csv"
-    zip_path = raw_data_dir / "zip_boundaries.geojson"
+DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"  # Correct format for your data
+
+# Only the columns the aggregation actually uses (for chunked ingest)
+USECOLS = ["StartDateTime", "EndDateTime", "ZipCode(s)", "EventType"]
+
+WEEKLY_KEYS = ["year", "week", "ZipCode(s)", "EventType"]
+TYPE_KEYS = ["ZipCode(s)", "EventType"]
+
+DEFAULT_PROFILE_REPORT = "profile_report.json"
+
+INTERVAL_COLUMNS = ["ZipCode(s)", "EventType", "StartDateTime", "EndDateTime"]
+INTERVAL_CHUNKSIZE = 500_000
 
-    # Load data with CORRECT datetime conversion (using the format from your original prompt)
-    permits_df = pd.read_csv(permits_path)
+
+def expand_permits(permits_df):
+    """Parse dates, drop invalid rows and explode multi-ZIP permits.
+
+    Returns the exploded frame (one row per permit/ZIP pair) with
+    ``year``/``week`` columns, and the number of rows dropped for bad dates.
+    """
     permits_df["StartDateTime"] = pd.to_datetime(
         permits_df["StartDateTime"],
-        format="%m/%d/%Y %I:%M:%S %p",  # Correct format for your data
+        format=DATE_FORMAT,
         errors="coerce"
     )
     permits_df["EndDateTime"] = pd.to_datetime(
         permits_df["EndDateTime"],
-        format="%m/%d/%Y %I:%M:%S %p",
+        format=DATE_FORMAT,
         errors="coerce"
     )
 
     # Remove invalid dates
     initial_count = len(permits_df)
     permits_df = permits_df.dropna(subset=["StartDateTime", "EndDateTime"])
-    print(f"Removed {initial_count - len(permits_df)} records with invalid dates")
+    dropped = initial_count - len(permits_df)
+
+    # Split, strip and keep 5-digit ZIPs, one row per permit/ZIP pair
+    exploded = explode_zips(permits_df["ZipCode(s)"], sep=",", zip_length=5)
+    permits_expanded = permits_df.iloc[exploded.row].reset_index(drop=True)
+    permits_expanded["ZipCode(s)"] = exploded.zip
 
-    # ======================
-    # 3. Data Preprocessing
-    # ======================
-    print("🔧 Processing ZIP codes...")
-    # Clean and handle multiple ZIP codes
-    permits_df["ZipCode(s)"] = (
-        permits_df["ZipCode(s)"]
-        .astype(str)  # Convert to string first to handle mixed types
-        .str.split(",")  # Split by comma
-        .apply(lambda x: [z.strip() for z in x])  # Strip whitespace
-    )
-
-    print("🌀 Expanding multi-ZIP permits...")
-    permits_expanded = permits_df.explode("ZipCode(s)", ignore_index=True)
-    permits_expanded = permits_expanded[permits_expanded["ZipCode(s)"].str.len() == 5] #Ensure 5 digit zips
-    permits_expanded["ZipCode(s)"] = permits_expanded["ZipCode(s)"].astype(str)
-
-    # ====================
-    # 4. Data Processing (Aggregation)
-    # ====================
-    print("📅 Processing temporal data (weekly)...")
     permits_expanded["week"] = permits_expanded["StartDateTime"].dt.isocalendar().week
     permits_expanded["year"] = permits_expanded["StartDateTime"].dt.year
+    return permits_expanded, dropped
+
+
+def load_expanded_permits(permits_path, cache_dir=None):
+    """Read and expand the permits CSV, keeping only the aggregation columns.
+
+    With ``cache_dir`` the result is served from the content-hashed cache and
+    only rebuilt when film_permits.csv changes. The number of rows dropped
+    for invalid dates is returned in ``attrs["dropped"]``.
+    """
+    def build():
+        permits_expanded, dropped = expand_permits(pd.read_csv(permits_path))
+        permits_expanded = permits_expanded[WEEKLY_KEYS].astype({"EventType": "category"})
+        permits_expanded.attrs["dropped"] = dropped
+        return permits_expanded
+
+    if cache_dir is None:
+        return build()
+    from permit_cache import PermitCache
+    return PermitCache(cache_dir).get_frame("expanded_permits", [permits_path], build)
+
+
+def aggregate_permits(permits_expanded):
+    """Return (weekly_counts, total_counts, total_by_type) for an exploded frame.
+
+    One bincount over the week x ZIP x EventType codes; the per-ZIP and
+    per-ZIP/type totals are sums over its axes.
+    """
+    counts = GroupCounts.from_frame(permits_expanded, {
+        "week": ["year", "week"], "zip": "ZipCode(s)", "type": "EventType"})
+    weekly_counts = counts.to_frame("permit_count")
+    total_counts = counts.rollup(["zip"]).to_frame("total_permits")
+    if permits_expanded["EventType"].isna().any():
+        # Permits without an EventType still count towards their ZIP's total, as with groupby
+        total_counts = GroupCounts.from_frame(permits_expanded, {"zip": "ZipCode(s)"}).to_frame("total_permits")
+    total_by_type = counts.rollup(["zip", "type"]).to_frame("type_count")
+    return weekly_counts, total_counts, total_by_type
+
 
+def aggregate_permits_groupby(permits_expanded):
+    """Reference groupby implementation of ``aggregate_permits`` (tests and benchmarks)."""
     # Aggregate by week, ZIP, and EventType
-    weekly_counts = permits_expanded.groupby(["year", "week", "ZipCode(s)", "EventType"]).size().reset_index(name="permit_count")
+    weekly_counts = permits_expanded.groupby(WEEKLY_KEYS, observed=True).size().reset_index(name="permit_count")
 
     # Aggregate total counts by ZIP
-    total_counts = permits_expanded.groupby("ZipCode(s)").size().reset_index(name="total_permits")
+    total_counts = permits_expanded.groupby("ZipCode(s)", observed=True).size().reset_index(name="total_permits")
 
     # Aggregate by type
-    total_by_type = permits_expanded.groupby(["ZipCode(s)", "EventType"]).size().reset_index(name="type_count")
+    total_by_type = permits_expanded.groupby(TYPE_KEYS, observed=True).size().reset_index(name="type_count")
+    return weekly_counts, total_counts, total_by_type
+
+
+def _counter_to_frame(counter, keys, name):
+    """Turn a Counter keyed by group tuples into a sorted groupby-style frame."""
+    if not counter:
+        return pd.DataFrame(columns=keys + [name])
+    index = pd.MultiIndex.from_tuples(list(counter.keys()), names=keys) if len(keys) > 1 \
+        else pd.Index(list(counter.keys()), name=keys[0])
+    series = pd.Series(list(counter.values()), index=index, dtype="int64", name=name)
+    return series.sort_index().reset_index()
+
+
+def new_counters():
+    """Empty running counters for the weekly, per-ZIP and per-type aggregates."""
+    return {"weekly": Counter(), "totals": Counter(), "by_type": Counter()}
+
+
+def fold_chunk(counters, chunk):
+    """Expand one chunk of raw permits and add its group counts to ``counters``.
+
+    Returns the number of rows dropped for invalid dates.
+    """
+    expanded, dropped = expand_permits(chunk)
+    chunk_weekly, chunk_totals, chunk_by_type = aggregate_permits(expanded)
+    counters["weekly"].update({
+        (int(y), int(w), z, str(t)): c
+        for (y, w, z, t), c in zip(
+            chunk_weekly[WEEKLY_KEYS].itertuples(index=False, name=None),
+            chunk_weekly["permit_count"])
+    })
+    counters["totals"].update(dict(zip(chunk_totals["ZipCode(s)"], chunk_totals["total_permits"])))
+    counters["by_type"].update({
+        (z, str(t)): c
+        for (z, t), c in zip(
+            chunk_by_type[TYPE_KEYS].itertuples(index=False, name=None),
+            chunk_by_type["type_count"])
+    })
+    return dropped
+
+
+def counters_to_frames(counters):
+    """Return (weekly_counts, total_counts, total_by_type) from running counters."""
+    return (
+        _counter_to_frame(counters["weekly"], WEEKLY_KEYS, "permit_count"),
+        _counter_to_frame(counters["totals"], ["ZipCode(s)"], "total_permits"),
+        _counter_to_frame(counters["by_type"], TYPE_KEYS, "type_count"),
+    )
+
+
+def read_permits_chunks(source, chunksize, names=None, extra_columns=()):
+    """Chunked CSV reader over the columns the aggregation uses.
+
+    ``names`` is given when ``source`` is positioned past the header row.
+    """
+    usecols = USECOLS + [c for c in extra_columns if names is None or c in names]
+    return pd.read_csv(
+        source,
+        usecols=lambda c: c in usecols,
+        dtype={"ZipCode(s)": str, "EventType": "category"},
+        chunksize=chunksize,
+        header=None if names else "infer",
+        names=names,
+    )
+
+
+def aggregate_permits_chunked(permits_path, chunksize):
+    """Stream the permits CSV in chunks and fold each into running counters.
+
+    Only the columns in USECOLS are read, EventType is loaded as a
+    categorical, and each chunk is reduced to group counts before the next
+    one is read, so peak memory depends on the number of distinct
+    (year, week, ZIP, type) groups rather than on the number of rows.
+    Produces the same frames as ``aggregate_permits(expand_permits(...))``.
+    """
+    counters = new_counters()
+    dropped = 0
+    for chunk in read_permits_chunks(permits_path, chunksize):
+        dropped += fold_chunk(counters, chunk)
+    return counters_to_frames(counters), dropped
+
+
+def load_intervals(permits_path, chunksize=None):
+    """(ZIP, EventType, start, end) per permit/ZIP pair, read in chunks."""
+    chunks = [expand_permits(chunk)[0][INTERVAL_COLUMNS]
+              for chunk in read_permits_chunks(permits_path, chunksize or INTERVAL_CHUNKSIZE)]
+    if not chunks:
+        return pd.DataFrame(columns=INTERVAL_COLUMNS)
+    intervals = pd.concat(chunks, ignore_index=True)
+    intervals["EventType"] = intervals["EventType"].astype(str)
+    return intervals
+
+
+def build_occupancy(intervals):
+    """Hourly and daily occupancy per ZIP, and weekly occupancy per (ZIP, EventType)."""
+    start, end = intervals["StartDateTime"], intervals["EndDateTime"]
+    return {
+        "hourly": Occupancy.from_intervals(intervals["ZipCode(s)"], start, end, "h"),
+        "daily": Occupancy.from_intervals(intervals["ZipCode(s)"], start, end, "D"),
+        "weekly": Occupancy.from_intervals(
+            pd.Series(list(zip(intervals["ZipCode(s)"], intervals["EventType"]))), start, end, "W"),
+    }
+
+
+def occupancy_peaks(occupancy):
+    """Peak concurrent permits per ZIP (hourly and daily) and when they first occur."""
+    hourly = occupancy["hourly"].peaks().rename(columns={
+        "group": "ZipCode(s)", "peak_active": "peak_hourly", "peak_start": "peak_hour"})
+    daily = occupancy["daily"].peaks().rename(columns={
+        "group": "ZipCode(s)", "peak_active": "peak_daily", "peak_start": "peak_day"})
+    daily["peak_day"] = daily["peak_day"].str[:10]
+    return hourly.merge(daily, on="ZipCode(s)")
+
+
+def add_active_permits(weekly_counts, weekly_occupancy):
+    """Weekly counts with an ``active_permits`` column (permits running during the ISO week).
+
+    Weeks where permits of a ZIP/type are running but none started get rows
+    with a zero ``permit_count``. Weeks are labelled like ``expand_permits``
+    labels a start date (calendar year, ISO week), so a week spanning New Year
+    has two labels, one per calendar year; each gets the week's active count.
+    """
+    cells = weekly_occupancy.cells()
+    groups = weekly_occupancy.groups
+    mondays = bucket_starts(cells["bucket"], "W")
+    active = pd.DataFrame({
+        "year": mondays.year.to_numpy(dtype="int64"),
+        "week": mondays.isocalendar()["week"].to_numpy(dtype="int64"),
+        "ZipCode(s)": [groups[i][0] for i in cells["group"]],
+        "EventType": [groups[i][1] for i in cells["group"]],
+        "active_permits": cells["active_permits"].to_numpy(),
+    })
+    sunday_year = (mondays + pd.Timedelta(days=6)).year.to_numpy(dtype="int64")
+    spanning = sunday_year != active["year"].to_numpy()
+    active = pd.concat([active, active[spanning].assign(year=sunday_year[spanning])], ignore_index=True)
+    # Week 1 labels of two New Years can coincide, e.g. Dec 30-31 2019 and Jan 1-6 2019 are both (2019, 1)
+    active = active.groupby(WEEKLY_KEYS, as_index=False)["active_permits"].sum()
+
+    weekly = weekly_counts.astype({"year": "int64", "week": "int64", "EventType": str})
+    merged = weekly.merge(active, on=WEEKLY_KEYS, how="outer")
+    merged[["permit_count", "active_permits"]] = merged[["permit_count", "active_permits"]].fillna(0).astype("int64")
+    return merged.sort_values(WEEKLY_KEYS, ignore_index=True)
+
+
+def process_data(chunksize=None, project_root=None, incremental=False, verify=False, use_cache=False,
+                 binary=False, workers=None, profile=None, cprofile=False, trace_memory=False,
+                 rolling_by_type=False, active_permits=False, partitions=None, sample=None, sample_seed=0,
+                 street_index=False):
+    # =====================
+    # 1. Path Configuration (Consistent)
+    # =====================
+    if project_root is None:
+        project_root = Path(__file__).parent.parent.parent  # Correctly goes up to project root
+    raw_data_dir = project_root / "data_processing" / "data" / "raw"
+    processed_data_dir = project_root / "data_processing" / "data" / "processed"
+    cache_dir = project_root / "data_processing" / "data" / "cache"
+    processed_data_dir.mkdir(parents=True, exist_ok=True)  # Ensure output dir exists
+
+    permits_path = raw_data_dir / "film_permits.csv"
+    zip_path = raw_data_dir / "zip_boundaries.geojson"
+    config_path = project_root / "visualization" / "assets" / "js" / "config.js"
+    color_script_path = config_path.with_name(color_breaks.GENERATED_SCRIPT)
+
+    if sample:
+        import preview
+
+        print(f"🔎 Previewing from a stratified sample of up to {sample} permits per ZIP/EventType...")
+        summary = preview.write_preview(permits_path, processed_data_dir, sample, sample_seed, chunksize)
+        print(f"   {summary['sampled']:,} of {summary['permits']:,} permits sampled "
+              f"from {summary['strata']:,} strata")
+        for output, error in summary.get("error", {}).items():
+            print(f"   {output}: total off by {error['total_relative_error']:.1%}, "
+                  f"{error['ci_coverage']:.0%} of exact cells inside the {preview.CONFIDENCE:.0%} CI")
+        print(f"✅ Preview written to {processed_data_dir / preview.PREVIEW_DIR}")
+        return
+
+    # ===================
+    # 2/3/4. Loading, preprocessing and aggregation
+    # ===================
+    def aggregates():
+        print("⏳ Loading film permits data...")
+        if incremental:
+            import incremental as inc
+
+            print("🔁 Merging new permits into saved aggregates...")
+            frames, stats = inc.update_incremental(
+                permits_path, processed_data_dir / inc.STATE_FILE, chunksize or inc.DEFAULT_CHUNKSIZE
+            )
+            print(f"Mode: {stats['mode']}, read {stats['rows']:,} rows")
+            if verify:
+                mismatched = inc.verify_incremental(permits_path, frames)
+                if mismatched:
+                    raise RuntimeError(f"Incremental output differs from full rebuild: {', '.join(mismatched)}")
+                print("✓ Incremental output matches full rebuild")
+            return frames
+        if partitions:
+            # Map/reduce over byte ranges of the CSV in worker processes
+            from partitioned import LocalRunner, aggregate_partitioned
+
+            print(f"🧩 Aggregating {partitions} partitions in worker processes...")
+            frames, dropped = aggregate_partitioned(permits_path, partitions, LocalRunner(), chunksize)
+            print(f"Removed {dropped} records with invalid dates")
+            return frames
+        if chunksize:
+            # Streaming ingest: constant memory
+            print(f"🌀 Streaming permits in chunks of {chunksize:,} rows...")
+            frames, dropped = aggregate_permits_chunked(permits_path, chunksize)
+            print(f"Removed {dropped} records with invalid dates")
+            return frames
+        if use_cache:
+            # Cached preprocessing (rebuilt only when the CSV changes)
+            print("🗃️ Loading expanded permits from cache...")
+            permits_expanded = load_expanded_permits(permits_path, cache_dir)
+            print(f"Removed {permits_expanded.attrs['dropped']} records with invalid dates")
+            return aggregate_permits(permits_expanded)
+
+        with profiler.stage("read_csv") as timer:
+            permits_df = pd.read_csv(permits_path)
+            timer.rows_out = len(permits_df)
+        print("🔧 Processing ZIP codes...")
+        print("🌀 Expanding multi-ZIP permits...")
+        with profiler.stage("expand_permits", rows_in=len(permits_df)) as timer:
+            permits_expanded, dropped = expand_permits(permits_df)
+            timer.rows_out = len(permits_expanded)
+        print(f"Removed {dropped} records with invalid dates")
+
+        print("📅 Processing temporal data (weekly)...")
+        with profiler.stage("aggregate_permits", rows_in=len(permits_expanded)) as timer:
+            frames = aggregate_permits(permits_expanded)
+            timer.rows_out = count_rows(frames)
+        return frames
 
     # ======================
     # 5. GeoJSON Integration
     # ======================
-    print("🗺️ Merging with ZIP boundaries...")
-    zip_gdf = gpd.read_file(zip_path)
-    zip_gdf["postalCode"] = zip_gdf["postalCode"].astype(str)  # Ensure correct type for merging
+    def boundaries():
+        print("🗺️ Loading ZIP boundaries...")
+        zip_gdf = gpd.read_file(zip_path)
+        zip_gdf["postalCode"] = zip_gdf["postalCode"].astype(str)  # Ensure correct type for merging
+        return zip_gdf
 
-    # Merge total counts with GeoDataFrame
-    merged_gdf = zip_gdf.merge(
-        total_counts, left_on="postalCode", right_on="ZipCode(s)", how="left"
-    )
-    merged_gdf["total_permits"] = merged_gdf["total_permits"].fillna(0)  # Fill missing with 0
+    def merge(frames, zip_gdf):
+        print("🗺️ Merging with ZIP boundaries...")
+        total_counts = frames[1]
+        merged_gdf = zip_gdf.merge(
+            total_counts, left_on="postalCode", right_on="ZipCode(s)", how="left"
+        )
+        merged_gdf["total_permits"] = merged_gdf["total_permits"].fillna(0)  # Fill missing with 0
+        return merged_gdf
 
     # =================
     # 6. Output Files
     # =================
-    print("💾 Saving processed data...")
+    def write_geojson(merged_gdf):
+        merged_gdf.to_file(processed_data_dir / "zip_permits.geojson", driver="GeoJSON")
 
-    # --- Save Processed GeoJSON ---
-    merged_gdf.to_file(processed_data_dir / "zip_permits.geojson", driver="GeoJSON")
+    def write_topojson(merged_gdf):
+        # Simplified TopoJSON boundaries, one per map zoom range
+        min_zoom, max_zoom = read_map_zoom(config_path)
+        levels = export_topology_levels(merged_gdf, processed_data_dir, "zip_permits", min_zoom, max_zoom)
+        for level in levels:
+            print(f"   z{level['minZoom']}-{level['maxZoom']}: {level['vertices']:,} vertices, "
+                  f"{level['bytes'] / 1024:,.1f} KB")
+        return levels
 
-    # --- Save Weekly Counts ---
-    weekly_counts.to_json(processed_data_dir / "weekly_permits.json", orient="records", indent=2)
+    def occupancy():
+        # Sweep-line occupancy from StartDateTime/EndDateTime (optional "active permits")
+        print("⏱️ Sweeping permit intervals into occupancy series...")
+        occupancy = build_occupancy(load_intervals(permits_path, chunksize))
+        occupancy["hourly"].save(processed_data_dir / "occupancy_hourly.json")
+        occupancy["daily"].save(processed_data_dir / "occupancy_daily.json")
+        occupancy_peaks(occupancy).to_json(processed_data_dir / "occupancy_peaks.json", orient="records", indent=2)
+        return occupancy["weekly"]
 
-    # --- Save total counts by type ---
-    total_by_type.to_json(
-        processed_data_dir / "total_by_type.json",
-        orient="records",
-        indent=2
-    )
+    def write_weekly(frames, weekly_occupancy=None):
+        weekly_counts = frames[0] if weekly_occupancy is None else add_active_permits(frames[0], weekly_occupancy)
+        weekly_counts.to_json(processed_data_dir / "weekly_permits.json", orient="records", indent=2)
+        # Memory-mapped copy for the analysis scripts (written after the JSON so it counts as current)
+        column_store.write_table(weekly_counts, processed_data_dir, "weekly_permits")
+        return weekly_counts
+
+    def write_by_type(frames):
+        frames[2].to_json(processed_data_dir / "total_by_type.json", orient="records", indent=2)
+        column_store.write_table(frames[2], processed_data_dir, "total_by_type")
+
+    def write_binary(weekly_counts, frames):
+        # Compact binary copies (dictionary-encoded typed arrays) of the tables as written to JSON
+        binary_format.write_binary(weekly_counts, processed_data_dir, "weekly_permits")
+        binary_format.write_binary(frames[2], processed_data_dir, "total_by_type")
+
+    def write_cube(frames):
+        # ZIP x week x type cube (prefix sums) for the map
+        PermitCube.from_weekly_counts(frames[0]).save(processed_data_dir)
+
+    def write_colors(frames):
+        # Quantile color breaks per view (generated script for the map) and per-cell buckets
+        breaks = color_breaks.write_color_breaks(frames, processed_data_dir, color_script_path)
+        print(f"🎨 Color breaks (all time): {breaks['all']}, {len(breaks['weeks'])} weekly views")
+
+    def write_rolling(frames):
+        # Rolling-window and YoY series per ZIP; incremental runs only recompute changed weeks
+        previous = None
+        if incremental and (processed_data_dir / ROLLING_METRICS_FILE).exists():
+            previous = RollingMetrics.load(processed_data_dir)
+        if previous is not None and (previous.types is not None) == rolling_by_type:
+            metrics = previous.update(frames[0])
+        else:
+            metrics = RollingMetrics.from_weekly_counts(frames[0], by_type=rolling_by_type)
+        metrics.save(processed_data_dir)
+
+    out = processed_data_dir
+    stages = [
+        Stage("aggregates", aggregates, sources=[permits_path], cache=not incremental,
+              params={"chunksize": chunksize, "cache": use_cache, "verify": verify, "partitions": partitions}),
+        Stage("boundaries", boundaries, sources=[zip_path]),
+        Stage("merge", merge, inputs=["aggregates", "boundaries"]),
+        Stage("zip_permits.geojson", write_geojson, inputs=["merge"], outputs=[out / "zip_permits.geojson"],
+              params=str(out)),
+        Stage("zip_permits.topojson", write_topojson, inputs=["merge"], sources=[config_path],
+              outputs=[out / "zip_permits.levels.json"], params=str(out)),
+        Stage("weekly_permits.json", write_weekly, inputs=["aggregates"] + (["occupancy"] if active_permits else []),
+              outputs=[out / "weekly_permits.json", column_store.manifest_path(out, "weekly_permits")],
+              params=str(out)),
+        Stage("total_by_type.json", write_by_type, inputs=["aggregates"],
+              outputs=[out / "total_by_type.json", column_store.manifest_path(out, "total_by_type")],
+              params=str(out)),
+        Stage("permit_cube", write_cube, inputs=["aggregates"], outputs=[out / PERMIT_CUBE_FILE],
+              params=str(out)),
+        Stage("color_breaks", write_colors, inputs=["aggregates"],
+              outputs=[out / color_breaks.BUCKETS_FILE, color_script_path],
+              params={"out": str(out), "script": str(color_script_path)}),
+        Stage("rolling_metrics", write_rolling, inputs=["aggregates"], outputs=[out / ROLLING_METRICS_FILE],
+              params={"out": str(out), "by_type": rolling_by_type}),
+    ]
+    if active_permits:
+        stages.append(Stage("occupancy", occupancy, sources=[permits_path],
+                            outputs=[out / "occupancy_hourly.json", out / "occupancy_daily.json",
+                                     out / "occupancy_peaks.json"],
+                            params={"chunksize": chunksize, "out": str(out)}))
+    if street_index:
+        import street_index as streets
+
+        def write_street_index():
+            # Keeps its own CSV offset, so only appended permits are indexed
+            stats = streets.update_index(permits_path, out / streets.INDEX_FILE,
+                                         chunksize or streets.DEFAULT_CHUNKSIZE)
+            print(f"🗂️ Street index ({stats['mode']}): {stats['rows']:,} permits, "
+                  f"{stats['segments']:,} segments added")
+
+        stages.append(Stage("street_index", write_street_index, sources=[permits_path],
+                            outputs=[out / streets.INDEX_FILE], cache=False))
+    if binary:
+        stages.append(Stage("binary", write_binary, inputs=["weekly_permits.json", "aggregates"],
+                            outputs=[binary_format.manifest_path(out, "weekly_permits"),
+                                     binary_format.manifest_path(out, "total_by_type")],
+                            params=str(out)))
+
+    if profile:
+        profiler.enable(cprofile_dir=Path(profile).with_suffix("") if cprofile else None,
+                        trace_memory=trace_memory)
+    pipeline = Pipeline(stages, cache_dir=cache_dir if use_cache else None, workers=workers)
+    try:
+        with profiler.stage("process_data"):
+            pipeline.run()
+    finally:
+        if profile:
+            profiler.disable()
+            print(f"📊 Profile report written to {profiler.write_report(profile)}")
+    print("💾 Saved processed data")
+    cached = [name for name, entry in pipeline.report.items() if entry["status"] != "ran"]
+    if cached:
+        print(f"♻️ Reused cached stages: {', '.join(cached)}")
 
     print("✅ Processing complete!")
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Process NYC film permits into web-ready aggregates")
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Stream the permits CSV in chunks of this many rows (constant-memory mode)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only process rows appended since the last run and merge them into saved aggregates"
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="With --incremental, check the result against a full rebuild"
+    )
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="Reuse the parsed permits and any stage outputs whose inputs have not changed"
+    )
+    parser.add_argument(
+        "--binary", action="store_true",
+        help="Also write compact binary copies of weekly_permits and total_by_type"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Threads for running independent stages in parallel (default: CPU-based)"
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=DEFAULT_PROFILE_REPORT, default=None, metavar="REPORT",
+        help="Record per-stage time, memory and row counts to a JSON report"
+    )
+    parser.add_argument(
+        "--cprofile", action="store_true",
+        help="With --profile, also write a cProfile dump per stage next to the report"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="With --profile, also record tracemalloc allocations per stage (slows the run)"
+    )
+    parser.add_argument(
+        "--rolling-by-type", action="store_true",
+        help="Break the rolling-window and YoY metrics down by EventType as well as ZIP"
+    )
+    parser.add_argument(
+        "--active-permits", action="store_true",
+        help="Also compute hourly/daily occupancy per ZIP and add active_permits to weekly_permits.json"
+    )
+    parser.add_argument(
+        "--partitions", type=int, default=None,
+        help="Aggregate the permits CSV as this many byte-range partitions in worker processes"
+    )
+    parser.add_argument(
+        "--street-index", action="store_true",
+        help="Also keep a SQLite index of permits by ParkingHeld street segment (see street_index.py)"
+    )
+    parser.add_argument(
+        "--sample", type=int, nargs="?", const=100, default=None, metavar="ROWS_PER_STRATUM",
+        help="Only write approximate outputs with confidence intervals to processed/preview, "
+             "from a stratified sample of this many permits per ZIP/EventType"
+    )
+    parser.add_argument(
+        "--sample-seed", type=int, default=0,
+        help="With --sample, the seed that picks the sample (same seed and data, same sample)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None, project_root=None):
+    args = parse_args(argv)
+    process_data(chunksize=args.chunksize, project_root=project_root, incremental=args.incremental,
+                 verify=args.verify, use_cache=args.cache, binary=args.binary, workers=args.workers,
+                 profile=args.profile, cprofile=args.cprofile, trace_memory=args.trace_memory,
+                 rolling_by_type=args.rolling_by_type, active_permits=args.active_permits,
+                 partitions=args.partitions, sample=args.sample, sample_seed=args.sample_seed,
+                 street_index=args.street_index)
+
+
 if __name__ == "__main__":
-    process_data()
\ No newline at end of file
+    main()
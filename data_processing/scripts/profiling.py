@@ -0,0 +1,215 @@
+"""Per-stage instrumentation for the processing pipeline.
+
+Code marks its steps with ``profiler.stage(name, rows_in=...)``. While the
+process-wide ``profiler`` is disabled (the default) this returns a shared
+no-op context, so the markers can stay in production code. Once enabled
+(``--profile``), each stage records:
+
+  - wall time and CPU time (of the thread running the stage)
+  - current and peak process RSS when the stage finished
+  - rows in and rows out, when the caller supplies them
+
+Optionally (``trace_memory``) it also records the tracemalloc allocation
+delta and peak above the stage's start. tracemalloc slows allocation-heavy
+stages several times over, so it is off unless asked for. Also optional is
+a cProfile dump per stage; nested stages are covered by the dump of the
+outermost stage on their thread.
+
+Stages may nest and may run concurrently on pipeline threads. Wall and CPU
+times stay per stage, but memory figures are process-wide while stages
+overlap; use ``--workers 1`` for exact per-stage memory.
+"""
+import cProfile
+import functools
+import json
+import platform
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def _rss_bytes():
+    """Current resident set size (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        return None
+
+
+def count_rows(value):
+    """Rows in a frame/array, or the sum over a tuple/list of them (None if unknown)."""
+    if hasattr(value, "shape") and getattr(value, "ndim", 1) >= 1:
+        return int(value.shape[0])
+    if isinstance(value, (tuple, list)) and value and all(hasattr(v, "shape") for v in value):
+        return sum(int(v.shape[0]) for v in value)
+    return None
+
+
+class _NullStage:
+    """Stand-in while profiling is off; accepts and ignores ``rows_out``."""
+    rows_in = None
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name, rows_in):
+        self.profiler = profiler
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        local = self.profiler._local
+        self._profile = None
+        if self.profiler.cprofile_dir is not None and not getattr(local, "profiling", False):
+            self._profile = cProfile.Profile()
+            local.profiling = True
+        self._tracing = tracemalloc.is_tracing() and self.profiler.trace_memory
+        if self._tracing:
+            tracemalloc.reset_peak()
+            self._traced_start = tracemalloc.get_traced_memory()[0]
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is not None:
+            self._profile.disable()
+            self.profiler._local.profiling = False
+        wall = time.perf_counter() - self._started
+        cpu = time.thread_time() - self._cpu_started
+
+        record = {
+            "name": self.name,
+            "thread": threading.current_thread().name,
+            "start_seconds": round(self._started - self.profiler.started, 6),
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_bytes": _rss_bytes(),
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "failed": exc_type is not None,
+        }
+        if self._tracing:
+            traced, traced_peak = tracemalloc.get_traced_memory()
+            record["traced_delta_bytes"] = traced - self._traced_start
+            record["traced_peak_bytes"] = max(traced_peak - self._traced_start, 0)
+        if self._profile is not None:
+            safe_name = re.sub(r"[^\w.-]+", "_", self.name)
+            path = self.profiler.cprofile_dir / f"{safe_name}.prof"
+            self._profile.dump_stats(path)
+            record["cprofile"] = str(path)
+        self.profiler._add(record)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.cprofile_dir = None
+        self.trace_memory = False
+        self.records = []
+        self.started = None
+        self._owns_tracemalloc = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, cprofile_dir: Path = None, trace_memory: bool = False) -> None:
+        """Start recording (clears earlier records).
+
+        Args:
+            cprofile_dir: Directory for a cProfile dump per (outermost) stage
+            trace_memory: Also record tracemalloc deltas and peaks
+        """
+        self.records = []
+        self.trace_memory = trace_memory
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        if self.cprofile_dir is not None:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+        self._owns_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def stage(self, name: str, rows_in=None):
+        """Context manager timing one stage; set ``.rows_out`` on it before leaving."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows_in)
+
+    def timed(self, name: str):
+        """Decorator recording every call as a stage; rows in are counted from the first argument."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name, count_rows(args[0]) if args else None) as timer:
+                    result = func(*args, **kwargs)
+                    timer.rows_out = count_rows(result)
+                return result
+            return wrapper
+        return decorate
+
+    def _add(self, record) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def report(self) -> dict:
+        return {
+            "version": REPORT_VERSION,
+            "python": platform.python_version(),
+            "total_wall_seconds": round(time.perf_counter() - self.started, 6) if self.started else None,
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "stages": sorted(self.records, key=lambda r: r["start_seconds"]),
+        }
+
+    def write_report(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+# Process-wide profiler used by process_data, DataLoader and MapHandler
+profiler = Profiler()
@@ -0,0 +1,93 @@
+"""Mergeable streaming quantile sketch (KLL).
+
+Items live in compactors, one per level; an item at level ``h`` stands for
+``2 ** h`` inputs. When a level outgrows its capacity it is sorted and every
+other item (from a random offset) is promoted to the next level, so memory
+stays O(k) however many values are added. Capacities shrink geometrically
+below the top level, which keeps the rank error around 1% of the stream
+at the default ``k``. Two sketches merge by concatenating their
+levels and compacting, so partial sketches (per chunk, per week) combine
+into the sketch of the union.
+
+Until a sketch has seen more than ``k`` values nothing is compacted and its
+quantiles are exact; the minimum and maximum are always exact.
+"""
+import numpy as np
+
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self.min = np.fmin(self.min, values.min())
+            self.max = np.fmax(self.max, values.max())
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold ``other`` into this sketch (``other`` is left unchanged)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved; it is
+                # picked at random, like the promotion offset, so neither end is favoured
+                held = self._rng.integers(len(items)) if len(items) % 2 else None
+                keep = items[held:held + 1] if held is not None else items[:0]
+                pairs = np.delete(items, held) if held is not None else items
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate values at the fractions ``qs`` (NaN while empty)."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype=np.int64)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        # Lower quantile: first item whose cumulative weight reaches q * n
+        ranks = np.clip(np.ceil(qs * cumulative[-1]), 1, cumulative[-1])
+        result = items[np.searchsorted(cumulative, ranks, side="left")]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
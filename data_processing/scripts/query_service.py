@@ -0,0 +1,326 @@
+"""Local asyncio HTTP service answering filtered permit-count queries.
+
+Instead of downloading weekly_permits.json and filtering it in the browser,
+the map can ask this service for exactly the counts it draws:
+
+  GET /meta                       weeks, EventTypes and ZIPs available
+  GET /counts?weeks=a..b&types=Shooting+Permit,Rigging+Permit&zips=10001,10002
+                                  [{"ZipCode(s)": ..., "permit_count": ...}, ...]
+  GET /health
+
+``weeks`` takes week indices (into /meta's ``weeks``) or ``YYYY-WW`` keys;
+a single week or an omitted bound is allowed, and all weeks are the default.
+``types`` and ``zips`` default to all. Counts come from the ZIP x week x type
+prefix-sum cube written by process_data.py (permit_cube.json/.bin), so each
+query is O(ZIPs x types) whatever the history length.
+
+Encoded responses for recent filter combinations are kept in a bounded LRU
+cache. Every response carries an ETag derived from the data version and the
+normalized query, so ``If-None-Match`` is answered with 304 without
+computing or encoding the counts. The cube is reloaded when its file changes.
+
+Usage: python data_processing/scripts/query_service.py [--port 8765] [--cache-size 1024]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from permit_cube import DATA_FILE, MANIFEST_FILE, PermitCube
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 1024
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class QueryError(ValueError):
+    """A malformed query parameter (answered with 400)."""
+
+
+class LRUCache:
+    """Bounded mapping evicting the least recently used entry."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PermitQueryIndex:
+    """Answers /counts queries from the prefix-sum cube, with an LRU of encoded results."""
+
+    def __init__(self, processed_dir: Path, cache_size=DEFAULT_CACHE_SIZE):
+        self.processed_dir = Path(processed_dir)
+        self.cache = LRUCache(cache_size)
+        self.cube = None
+        self.version = None
+        self._stamp = None
+        self.reload_if_changed()
+
+    def _file_stamp(self):
+        stamps = []
+        for name in (MANIFEST_FILE, DATA_FILE):
+            stat = os.stat(self.processed_dir / name)
+            stamps.append((stat.st_size, stat.st_mtime_ns))
+        return tuple(stamps)
+
+    def reload_if_changed(self) -> bool:
+        """Reload the cube (and drop cached results) if its files changed."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+        self.cube = PermitCube.load(self.processed_dir)
+        self.version = hashlib.sha1(repr(stamp).encode()).hexdigest()[:12]
+        self._stamp = stamp
+        self._week_keys = {f"{year}-{week:02d}": i for i, (year, week) in enumerate(self.cube.weeks)}
+        self._type_index = {t: i for i, t in enumerate(self.cube.types)}
+        self._zip_index = {z: i for i, z in enumerate(self.cube.zips)}
+        self._zips = np.asarray(self.cube.zips, dtype=object)
+        self.cache.clear()
+        logger.info(f"Loaded permit cube {self.version}: {len(self.cube.zips)} ZIPs, "
+                    f"{len(self.cube.weeks)} weeks, {len(self.cube.types)} types")
+        return True
+
+    def meta(self) -> dict:
+        return {
+            "version": self.version,
+            "weeks": [{"year": year, "week": week} for year, week in self.cube.weeks],
+            "types": self.cube.types,
+            "zips": self.cube.zips,
+        }
+
+    def _week_bound(self, text, default):
+        text = text.strip()
+        if not text:
+            return default
+        if text.isdigit():
+            index = int(text)
+        else:
+            year, _, week = text.partition("-")
+            index = self._week_keys.get(f"{year}-{int(week):02d}") if week.isdigit() else None
+            if index is None:
+                raise QueryError(f"Unknown week: {text}")
+        if not 0 <= index < len(self.cube.weeks):
+            raise QueryError(f"Week index out of range: {index}")
+        return index
+
+    def normalize(self, params: dict):
+        """Canonical (week_start, week_end, types, zips) for query-string params."""
+        last = len(self.cube.weeks) - 1
+        weeks = params.get("weeks", "")
+        start_text, sep, end_text = weeks.partition("..")
+        start = self._week_bound(start_text, 0)
+        end = self._week_bound(end_text, last) if sep else (start if start_text.strip() else last)
+        if start > end:
+            raise QueryError("weeks range is reversed")
+
+        def listed(name, index):
+            if not params.get(name):
+                return None
+            values = sorted({v.strip() for v in params[name].split(",") if v.strip()})
+            return tuple(v for v in values if v in index)
+
+        return start, end, listed("types", self._type_index), listed("zips", self._zip_index)
+
+    def etag(self, key) -> str:
+        return '"' + hashlib.sha1(f"{self.version}:{key!r}".encode()).hexdigest()[:20] + '"'
+
+    def counts(self, key):
+        """Nonzero counts per ZIP for a normalized query key."""
+        start, end, types, zips = key
+        if len(self.cube.weeks) == 0:
+            return []
+        cumulative = self.cube.cumulative
+        zip_rows = slice(None) if zips is None else [self._zip_index[z] for z in zips]
+        type_cols = slice(None) if types is None else [self._type_index[t] for t in types]
+        window = (cumulative[zip_rows, end + 1, :][:, type_cols].astype(np.int64)
+                  - cumulative[zip_rows, start, :][:, type_cols])
+        totals = window.sum(axis=1)
+        names = self._zips if zips is None else np.asarray(zips, dtype=object)
+        nonzero = np.flatnonzero(totals)
+        return [{"ZipCode(s)": name, "permit_count": int(count)}
+                for name, count in zip(names[nonzero].tolist(), totals[nonzero].tolist())]
+
+    def query(self, params: dict):
+        """(etag, encoded JSON body) for a /counts query, served from the LRU when possible."""
+        key = self.normalize(params)
+        cached = self.cache.get(key)
+        if cached is None:
+            body = json.dumps(self.counts(key), separators=(",", ":")).encode()
+            cached = (self.etag(key), body)
+            self.cache.put(key, cached)
+        return cached
+
+
+class QueryService:
+    def __init__(self, index: PermitQueryIndex):
+        self.index = index
+        self.requests = 0
+
+    def _respond(self, status, body=b"", etag=None, content_type="application/json", head=False):
+        """Response bytes; with ``head`` the headers describe ``body`` but it is not sent."""
+        headers = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Expose-Headers: ETag",
+            "Cache-Control: no-cache",  # browsers revalidate with If-None-Match
+        ]
+        if etag:
+            headers.append(f"ETag: {etag}")
+        return ("\r\n".join(headers) + "\r\n\r\n").encode() + (b"" if head else body)
+
+    def _error(self, status, message):
+        return self._respond(status, json.dumps({"error": message}).encode())
+
+    @staticmethod
+    def _not_modified(etag, headers):
+        return etag in {tag.strip() for tag in headers.get("if-none-match", "").split(",")}
+
+    def handle(self, method, target, headers) -> bytes:
+        """Full HTTP response for one request."""
+        self.requests += 1
+        if method not in ("GET", "HEAD"):
+            return self._error(405, f"Unsupported method: {method}")
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            self.index.reload_if_changed()
+            if url.path == "/counts":
+                # The ETag only needs the normalized query; the counts are skipped on a match
+                etag = self.index.etag(self.index.normalize(params))
+                body = None if self._not_modified(etag, headers) else self.index.query(params)[1]
+            elif url.path == "/meta":
+                etag = self.index.etag("meta")
+                body = json.dumps(self.index.meta(), separators=(",", ":")).encode()
+            elif url.path == "/health":
+                etag, body = None, json.dumps({
+                    "status": "ok", "version": self.index.version, "requests": self.requests,
+                    "cache": {"size": len(self.index.cache), "hits": self.index.cache.hits,
+                              "misses": self.index.cache.misses},
+                }).encode()
+            else:
+                return self._error(404, f"Not found: {url.path}")
+        except QueryError as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            logger.exception("Query failed")
+            return self._error(500, str(e))
+
+        if etag and self._not_modified(etag, headers):
+            return self._respond(304, etag=etag)
+        return self._respond(200, body, etag=etag, head=method == "HEAD")
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive: one request at a time per connection."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):  # longer than the stream limit
+                    request_line = None
+                if request_line == b"":
+                    break
+                if request_line is None or len(request_line) > MAX_REQUEST_LINE:
+                    writer.write(self._error(400, "Request line too long"))
+                    break
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    writer.write(self._error(400, "Malformed request line"))
+                    break
+                method, target, version = parts
+
+                headers, complete = {}, False
+                try:
+                    for _ in range(MAX_HEADERS + 1):
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            complete = True
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                except (ValueError, asyncio.LimitOverrunError):  # a header line over the stream limit
+                    pass
+                if not complete:
+                    writer.write(self._error(431, "Request headers too large"))
+                    break
+
+                writer.write(self.handle(method, target, headers))
+                await writer.drain()
+                connection = headers.get("connection", "").lower()
+                if connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+
+async def serve(processed_dir, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=DEFAULT_CACHE_SIZE):
+    service = QueryService(PermitQueryIndex(processed_dir, cache_size))
+    server = await service.start(host, port)
+    print(f"🚀 Serving permit queries on http://{host}:{port} (cache {cache_size} entries)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    default_dir = Path(__file__).resolve().parent.parent / "data" / "processed"
+    parser = argparse.ArgumentParser(description="Serve filtered permit counts over HTTP")
+    parser.add_argument("--processed-dir", type=Path, default=default_dir)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="Filter combinations kept in the LRU result cache")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.processed_dir, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Rolling-window and year-over-year permit metrics per ZIP.
+
+The weekly aggregate is laid out on a contiguous ISO-week calendar (weeks
+without permits count as zero) as a dense ZIP x week array, optionally with
+an EventType axis. Rolling totals come from one cumulative sum along the
+week axis: the total over the ``w`` weeks ending at week ``t`` is
+``cum[t + 1] - cum[t + 1 - w]``. The YoY delta of a window is its total
+minus the total ``YOY_LAG`` weeks earlier, defined from week ``YOY_LAG`` on.
+
+When the weekly aggregate changes, only the weeks from the first changed
+one onward are recomputed (``RollingMetrics.update``), so appending a week
+costs O(ZIPs x longest window) rather than a pass over the whole history.
+
+The artifact is ``rolling_metrics.json`` (axes, metric names, shape) plus
+``rolling_metrics.bin``: little-endian int32, shape
+[metrics, zips, weeks, types], row-major. Without the EventType axis the
+types axis has length 1 and ``types`` is null.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = "rolling_metrics.json"
+DATA_FILE = "rolling_metrics.bin"
+
+DEFAULT_WINDOWS = (4, 13)
+YOY_LAG = 52
+
+
+def _metric_names(windows):
+    return (["count"] + [f"rolling_{w}" for w in windows] + [f"yoy_{w}" for w in windows])
+
+
+def iso_week_mondays(years, weeks) -> pd.DatetimeIndex:
+    """Monday of each (year, ISO week) label.
+
+    weekly_permits labels weeks with the calendar year of the permit, so Jan
+    1-3 can be "week 53" of a year that has no ISO week 53; those belong to
+    week 53 of the year before.
+    """
+    years = pd.Series(years).astype("int64").reset_index(drop=True)
+    weeks = pd.Series(weeks).astype("int64").reset_index(drop=True)
+    dec28 = pd.to_datetime(years * 10000 + 1228, format="%Y%m%d")
+    years = years.where((weeks < 53) | (dec28.dt.isocalendar().week.to_numpy() == 53), years - 1)
+    jan4 = pd.to_datetime(years * 10000 + 104, format="%Y%m%d")
+    offsets = pd.to_timedelta((pd.Series(weeks).astype("int64") - 1) * 7 - jan4.dt.weekday, unit="D")
+    return pd.DatetimeIndex(jan4 + offsets)
+
+
+def _window_sums(counts, window, start):
+    """Totals over the ``window`` weeks ending at each week from ``start`` on."""
+    base = max(start - window + 1, 0)
+    cumulative = np.zeros((counts.shape[0], counts.shape[1] - base + 1, counts.shape[2]), dtype=np.int64)
+    np.cumsum(counts[:, base:], axis=1, out=cumulative[:, 1:])
+    ends = np.arange(start, counts.shape[1]) + 1
+    return cumulative[:, ends - base] - cumulative[:, np.maximum(ends - window, base) - base]
+
+
+class RollingMetrics:
+    def __init__(self, zips, weeks, types, windows, data):
+        self.zips = list(zips)
+        self.weeks = [tuple(week) for week in weeks]  # contiguous ISO weeks
+        self.types = list(types) if types is not None else None
+        self.windows = tuple(windows)
+        self.metrics = _metric_names(self.windows)
+        self.data = data  # shape (metrics, zips, weeks, types)
+        self.last_update_start = None  # first recomputed week index, set by update()
+        self._metric_index = {name: i for i, name in enumerate(self.metrics)}
+
+    @staticmethod
+    def dense_counts(weekly_counts: pd.DataFrame, by_type=False, zips=None, types=None, first_week=None):
+        """Weekly counts on a contiguous calendar: (zips, weeks, types, counts).
+
+        ``zips``/``types``/``first_week`` pin the axes (for comparing with an
+        existing artifact); rows outside them are reported by returning None.
+        """
+        mondays = iso_week_mondays(weekly_counts["year"], weekly_counts["week"])
+        if zips is None:
+            zips = sorted(weekly_counts["ZipCode(s)"].unique().tolist())
+        if by_type and types is None:
+            types = sorted(weekly_counts["EventType"].astype(str).unique().tolist())
+        if first_week is None:
+            first_week = mondays.min() if len(mondays) else pd.Timestamp("2000-01-03")
+        else:
+            first_week = iso_week_mondays([first_week[0]], [first_week[1]])[0]
+
+        zip_codes = pd.Index(zips).get_indexer(weekly_counts["ZipCode(s)"])
+        week_codes = np.asarray((mondays - first_week).days // 7, dtype=np.int64)
+        if by_type:
+            type_codes = pd.Index(types).get_indexer(weekly_counts["EventType"].astype(str))
+        else:
+            type_codes = np.zeros(len(weekly_counts), dtype=np.int64)
+        if (zip_codes < 0).any() or (type_codes < 0).any() or (week_codes < 0).any():
+            return None
+
+        n_weeks = int(week_codes.max()) + 1 if len(week_codes) else 0
+        shape = (len(zips), n_weeks, len(types) if by_type else 1)
+        counts = np.bincount(
+            np.ravel_multi_index((zip_codes, week_codes, type_codes), shape),
+            weights=weekly_counts["permit_count"].to_numpy(),
+            minlength=int(np.prod(shape)),
+        ).reshape(shape).astype(np.int64)
+
+        calendar = pd.date_range(first_week, periods=n_weeks, freq="7D").isocalendar()
+        weeks = list(zip(calendar["year"].astype(int), calendar["week"].astype(int)))
+        return zips, weeks, types if by_type else None, counts
+
+    @classmethod
+    def from_counts(cls, zips, weeks, types, counts, windows=DEFAULT_WINDOWS, previous=None, start=0):
+        """Compute the metrics for dense weekly counts.
+
+        With ``previous`` (same axes and windows), weeks before ``start`` are
+        copied from it and only weeks from ``start`` on are computed.
+        """
+        n_weeks = counts.shape[1]
+        metrics = _metric_names(windows)
+        data = np.zeros((len(metrics),) + counts.shape, dtype=np.int32)
+        if previous is not None and start > 0:
+            data[:, :, :start] = previous.data[:, :, :start]
+        data[0] = counts
+
+        for i, window in enumerate(windows, start=1):
+            data[i, :, start:] = _window_sums(counts, window, start)
+            yoy_start = max(start, YOY_LAG)
+            if yoy_start < n_weeks:
+                rolling = data[i].astype(np.int64)
+                data[i + len(windows), :, yoy_start:] = (
+                    rolling[:, yoy_start:] - rolling[:, yoy_start - YOY_LAG:n_weeks - YOY_LAG])
+        return cls(zips, weeks, types, windows, data)
+
+    @classmethod
+    def from_weekly_counts(cls, weekly_counts: pd.DataFrame, windows=DEFAULT_WINDOWS, by_type=False):
+        """Build from the weekly_permits frame (year, week, ZipCode(s), EventType, permit_count)."""
+        return cls.from_counts(*cls.dense_counts(weekly_counts, by_type), windows=windows)
+
+    def update(self, weekly_counts: pd.DataFrame) -> "RollingMetrics":
+        """Metrics for a newer weekly aggregate, recomputing only from the first changed week.
+
+        Falls back to a full build when ZIPs, EventTypes or the first week
+        differ from this artifact's axes.
+        """
+        by_type = self.types is not None
+        dense = None
+        if self.weeks:
+            dense = self.dense_counts(weekly_counts, by_type, self.zips, self.types, self.weeks[0])
+        if dense is None or dense[3].shape[1] < len(self.weeks):
+            return self.from_weekly_counts(weekly_counts, self.windows, by_type)
+        zips, weeks, types, counts = dense
+
+        previous = self.data[0]
+        changed = np.flatnonzero((counts[:, :previous.shape[1]] != previous).any(axis=(0, 2)))
+        start = int(changed[0]) if len(changed) else previous.shape[1]
+        result = self.from_counts(zips, weeks, types, counts, self.windows, previous=self, start=start)
+        result.last_update_start = start
+        return result
+
+    def metric(self, name: str) -> np.ndarray:
+        """One metric, shape (zips, weeks, types)."""
+        return self.data[self._metric_index[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame: one row per ZIP, week (and EventType) with a column per metric.
+
+        YoY columns are NaN for the first ``YOY_LAG`` weeks.
+        """
+        n_zips, n_weeks, n_types = self.data.shape[1:]
+        index = {
+            "ZipCode(s)": np.repeat(np.asarray(self.zips, dtype=object), n_weeks * n_types),
+            "year": np.tile(np.repeat([y for y, _ in self.weeks], n_types), n_zips),
+            "week": np.tile(np.repeat([w for _, w in self.weeks], n_types), n_zips),
+        }
+        if self.types is not None:
+            index["EventType"] = np.tile(np.asarray(self.types, dtype=object), n_zips * n_weeks)
+        frame = pd.DataFrame(index)
+        undefined = np.tile(np.repeat(np.arange(n_weeks) < YOY_LAG, n_types), n_zips)
+        for name, values in zip(self.metrics, self.data):
+            column = values.reshape(-1)
+            if name.startswith("yoy_"):
+                column = np.where(undefined, np.nan, column)
+            frame[name] = column
+        return frame
+
+    def save(self, output_dir: Path) -> None:
+        output_dir = Path(output_dir)
+        manifest = {
+            "shape": list(self.data.shape),
+            "dtype": "int32",
+            "metrics": self.metrics,
+            "windows": list(self.windows),
+            "yoy_lag": YOY_LAG,
+            "zips": self.zips,
+            "weeks": [{"year": year, "week": week} for year, week in self.weeks],
+            "types": self.types,
+            "data": DATA_FILE,
+        }
+        self.data.astype("<i4").tofile(output_dir / DATA_FILE)
+        with open(output_dir / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "RollingMetrics":
+        output_dir = Path(output_dir)
+        with open(output_dir / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        data = np.fromfile(output_dir / manifest["data"], dtype="<i4").reshape(manifest["shape"])
+        weeks = [(week["year"], week["week"]) for week in manifest["weeks"]]
+        return cls(manifest["zips"], weeks, manifest["types"], manifest["windows"], data)
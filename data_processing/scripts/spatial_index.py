@@ -0,0 +1,186 @@
+"""STRtree spatial index over the ZIP boundaries and ZIP-to-region rollups.
+
+Permit aggregates are keyed by ZIP. To report them by borough, community
+district or a hex grid, each ZIP's count is split across the regions it
+overlaps in proportion to the overlapping area. The overlap fractions are
+computed once per region set (an STRtree query for candidate pairs, then one
+vectorized intersection) and kept as a sparse ZIP x region weight matrix in
+COO form, so any number of aggregates can be re-projected with a sparse
+multiply instead of another polygon overlay.
+"""
+import hashlib
+import logging
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+logger = logging.getLogger(__name__)
+
+# NY State Plane Long Island (feet): equal-area enough for NYC overlap fractions
+AREA_CRS = "EPSG:2263"
+
+
+class AreaWeights:
+    """Sparse ZIP x region matrix of area fractions (COO, sorted by region)."""
+
+    def __init__(self, zips, regions, zip_idx, region_idx, weight):
+        order = np.argsort(region_idx, kind="stable")
+        self.zips = list(zips)
+        self.regions = list(regions)
+        self.zip_idx = np.asarray(zip_idx, dtype=np.int64)[order]
+        self.region_idx = np.asarray(region_idx, dtype=np.int64)[order]
+        self.weight = np.asarray(weight, dtype=np.float64)[order]
+
+    @property
+    def shape(self):
+        return len(self.zips), len(self.regions)
+
+    def rollup(self, values):
+        """Re-project ZIP-indexed values onto the regions.
+
+        Args:
+            values: Series indexed by ZIP, or DataFrame with ZIP rows (e.g.
+                one column per week); ZIPs missing from the index count as 0
+
+        Returns:
+            Series/DataFrame indexed by region
+        """
+        frame = values.to_frame() if isinstance(values, pd.Series) else values
+        dense = frame.reindex(self.zips, fill_value=0).to_numpy(dtype=np.float64)
+
+        result = np.zeros((len(self.regions), dense.shape[1]))
+        if len(self.weight):
+            contributions = dense[self.zip_idx] * self.weight[:, None]
+            starts = np.flatnonzero(np.r_[True, self.region_idx[1:] != self.region_idx[:-1]])
+            result[self.region_idx[starts]] = np.add.reduceat(contributions, starts, axis=0)
+
+        out = pd.DataFrame(result, index=pd.Index(self.regions, name="region"), columns=frame.columns)
+        return out.iloc[:, 0] if isinstance(values, pd.Series) else out
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "zip": np.asarray(self.zips, dtype=object)[self.zip_idx],
+            "region": np.asarray(self.regions, dtype=object)[self.region_idx],
+            "weight": self.weight,
+        })
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(
+            path,
+            zips=np.asarray(self.zips, dtype=str),
+            regions=np.asarray(self.regions, dtype=str),
+            zip_idx=self.zip_idx,
+            region_idx=self.region_idx,
+            weight=self.weight,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "AreaWeights":
+        with np.load(path) as data:
+            return cls(data["zips"].tolist(), data["regions"].tolist(),
+                       data["zip_idx"], data["region_idx"], data["weight"])
+
+
+def _fingerprint(geometries, ids) -> str:
+    digest = hashlib.sha256()
+    for wkb in shapely.to_wkb(geometries):
+        digest.update(wkb)
+    digest.update("\0".join(map(str, ids)).encode())
+    return digest.hexdigest()[:24]
+
+
+class ZipSpatialIndex:
+    def __init__(self, boundaries: gpd.GeoDataFrame, zip_column: str = "postalCode",
+                 cache_dir: Path = None):
+        """
+        Args:
+            boundaries: ZIP polygons, e.g. from DataLoader.load_boundaries()
+            zip_column: Column holding the ZIP code
+            cache_dir: Optional directory to persist area-weight matrices
+        """
+        projected = boundaries.to_crs(AREA_CRS) if boundaries.crs is not None else boundaries
+        self.zips = projected[zip_column].astype(str).tolist()
+        self.crs = projected.crs
+        self.geometries = projected.geometry.to_numpy()
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+        self.areas = shapely.area(self.geometries)
+        self._fingerprint = _fingerprint(self.geometries, self.zips)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._weights = {}
+
+    def assign_points(self, lon, lat, crs="EPSG:4326") -> np.ndarray:
+        """ZIP code covering each point (None where no ZIP does; the first ZIP on a border)."""
+        points = gpd.GeoSeries(gpd.points_from_xy(lon, lat), crs=crs)
+        if self.crs is not None:
+            points = points.to_crs(self.crs)
+        point_idx, zip_idx = self.tree.query(points.to_numpy(), predicate="covered_by")
+        result = np.full(len(points), None, dtype=object)
+        # A point on a shared border is covered by both ZIPs; keep the first in ZIP
+        # order (the tree returns each point's matches in tree order)
+        order = np.lexsort((zip_idx, point_idx))
+        point_idx, zip_idx = point_idx[order], zip_idx[order]
+        first = np.r_[True, point_idx[1:] != point_idx[:-1]] if len(point_idx) else point_idx.astype(bool)
+        result[point_idx[first]] = np.asarray(self.zips, dtype=object)[zip_idx[first]]
+        return result
+
+    def area_weights(self, regions: gpd.GeoDataFrame, region_column: str) -> AreaWeights:
+        """Fraction of each ZIP's area falling in each region (computed once per region set)."""
+        if self.crs is not None and regions.crs is not None:
+            regions = regions.to_crs(self.crs)
+        region_ids = regions[region_column].astype(str).tolist()
+        region_geoms = regions.geometry.to_numpy()
+        key = f"{self._fingerprint}-{_fingerprint(region_geoms, region_ids)}"
+
+        if key in self._weights:
+            return self._weights[key]
+        cache_path = self.cache_dir / f"area_weights-{key}.npz" if self.cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            weights = AreaWeights.load(cache_path)
+        else:
+            weights = self._compute_weights(region_ids, region_geoms)
+            if cache_path is not None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                weights.save(cache_path)
+        self._weights[key] = weights
+        return weights
+
+    def _compute_weights(self, region_ids, region_geoms) -> AreaWeights:
+        region_idx, zip_idx = self.tree.query(region_geoms, predicate="intersects")
+        logger.info(f"Computing overlap for {len(region_idx):,} ZIP/region pairs")
+
+        # Regions fully inside a ZIP skip the intersection
+        inside = shapely.contains_properly(self.geometries[zip_idx], region_geoms[region_idx])
+        overlap = shapely.area(region_geoms[region_idx])
+        partial = ~inside
+        overlap[partial] = shapely.area(
+            shapely.intersection(self.geometries[zip_idx[partial]], region_geoms[region_idx[partial]])
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(self.areas[zip_idx] > 0, overlap / self.areas[zip_idx], 0.0)
+        keep = weight > 0
+        return AreaWeights(self.zips, region_ids, zip_idx[keep], region_idx[keep], weight[keep])
+
+
+def hex_grid(bounds, size, crs=AREA_CRS) -> gpd.GeoDataFrame:
+    """Flat-topped hexagons of circumradius ``size`` covering ``bounds`` (in ``crs`` units)."""
+    minx, miny, maxx, maxy = bounds
+    dx, dy = 1.5 * size, np.sqrt(3) * size
+    cols = np.arange(int(np.ceil((maxx - minx) / dx)) + 1)
+    rows = np.arange(int(np.ceil((maxy - miny) / dy)) + 2)
+    col, row = np.meshgrid(cols, rows)
+    cx = minx + col.ravel() * dx
+    cy = miny + row.ravel() * dy - (col.ravel() % 2) * dy / 2
+
+    angles = np.deg2rad(np.arange(0, 360, 60))
+    ring = np.stack([
+        cx[:, None] + size * np.cos(angles),
+        cy[:, None] + size * np.sin(angles),
+    ], axis=-1)
+    polygons = shapely.polygons(np.concatenate([ring, ring[:, :1]], axis=1))
+    hex_ids = [f"{c}_{r}" for c, r in zip(col.ravel(), row.ravel())]
+    return gpd.GeoDataFrame({"hex_id": hex_ids}, geometry=polygons, crs=crs)
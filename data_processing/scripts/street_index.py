@@ -0,0 +1,281 @@
+"""Street-segment index over the ParkingHeld text of the permits CSV.
+
+ParkingHeld lists the blocks a permit holds, e.g.
+"BROADWAY between W 44 ST and W 45 ST,  7 AVENUE between W 44 STREET and W 45 STREET".
+Each segment is normalized (upper case, "STREET" -> "ST", "WEST" -> "W",
+"7TH"/"SEVENTH" -> "7", ...) into (street, cross_a, cross_b) with the cross
+streets in sorted order, and stored in a SQLite table with one row per
+segment and covering B-trees on (street, cross_a, cross_b, start, ...) and
+(street, cross_b, start, ...). A block and date range query is an index
+range scan instead of a str.contains over the CSV.
+
+Like incremental.py, the index records the byte offset and a fingerprint of
+the CSV it has read. Rows appended since then are indexed on the next
+update; a rewritten or re-headed CSV is indexed from scratch. Row ids are
+0-based data row numbers in the CSV.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from incremental import file_fingerprint, read_header
+from process_data import DATE_FORMAT
+
+INDEX_VERSION = 1
+INDEX_FILE = "street_index.sqlite"
+DEFAULT_CHUNKSIZE = 200_000
+
+COLUMNS = ["EventID", "StartDateTime", "EndDateTime", "ParkingHeld"]
+
+# Dates are stored as Unix seconds (NULL when unparseable)
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE permits (row_id INTEGER PRIMARY KEY, event_id TEXT, start INTEGER, end INTEGER, parking_held TEXT);
+CREATE TABLE segments (street TEXT, cross_a TEXT, cross_b TEXT, row_id INTEGER, start INTEGER, end INTEGER);
+"""
+# Built after the bulk load of a full build, maintained by incremental inserts. Both
+# cover the columns lookups read; the second serves single cross streets matching cross_b.
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS segments_block ON segments (street, cross_a, cross_b, start, end, row_id);
+CREATE INDEX IF NOT EXISTS segments_cross_b ON segments (street, cross_b, start, end, row_id);
+"""
+
+# Word-level spellings folded to one form
+WORDS = {
+    "STREET": "ST", "STR": "ST", "AVENUE": "AVE", "AV": "AVE", "BOULEVARD": "BLVD", "PLACE": "PL",
+    "ROAD": "RD", "DRIVE": "DR", "PARKWAY": "PKWY", "LANE": "LN", "TERRACE": "TER", "COURT": "CT",
+    "EXPRESSWAY": "EXPY", "HIGHWAY": "HWY", "SQUARE": "SQ",
+    "WEST": "W", "EAST": "E", "NORTH": "N", "SOUTH": "S", "SAINT": "ST",
+    "FIRST": "1", "SECOND": "2", "THIRD": "3", "FOURTH": "4", "FIFTH": "5", "SIXTH": "6",
+    "SEVENTH": "7", "EIGHTH": "8", "NINTH": "9", "TENTH": "10", "ELEVENTH": "11", "TWELFTH": "12",
+}
+ORDINAL = re.compile(r"^(\d+)(ST|ND|RD|TH)$")
+SEGMENT = re.compile(r"^(?P<street>.*?)\s+BETWEEN\s+(?P<cross_a>.*?)\s+AND\s+(?P<cross_b>.*)$")
+
+
+def normalize_street(name):
+    """Canonical form of a street name ("West 44th Street" -> "W 44 ST")."""
+    words = re.sub(r"[^A-Z0-9 ]", " ", str(name).upper()).split()
+    return " ".join(ORDINAL.sub(r"\1", WORDS.get(word, word)) for word in words)
+
+
+def parse_segment(text):
+    """(street, cross_a, cross_b) of one "X between Y and Z" segment, crosses sorted.
+
+    A segment without "between" is a whole street: both crosses are "".
+    """
+    match = SEGMENT.match(" ".join(str(text).upper().split()))
+    if match is None:
+        return normalize_street(text), "", ""
+    cross_a, cross_b = sorted((normalize_street(match["cross_a"]), normalize_street(match["cross_b"])))
+    return normalize_street(match["street"]), cross_a, cross_b
+
+
+def _seconds(column):
+    parsed = pd.to_datetime(column, format=DATE_FORMAT, errors="coerce")
+    return pd.Series(parsed.to_numpy("datetime64[s]").astype("int64"), dtype="Int64").mask(parsed.isna())
+
+
+def _to_seconds(value):
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _rows(frame):
+    """Plain Python rows for executemany (NA as None)."""
+    return frame.astype(object).where(frame.notna(), None).to_numpy().tolist()
+
+
+def chunk_rows(chunk, first_row):
+    """(permit rows, segment rows) to insert for one chunk of raw permits."""
+    chunk = chunk.reset_index(drop=True)
+    row_ids = pd.RangeIndex(first_row, first_row + len(chunk))
+    start, end = _seconds(chunk["StartDateTime"]), _seconds(chunk["EndDateTime"])
+    permits = pd.DataFrame({"row_id": row_ids, "event_id": chunk["EventID"], "start": start, "end": end,
+                            "parking_held": chunk["ParkingHeld"]})
+
+    texts = chunk["ParkingHeld"].fillna("").str.split(",").explode()
+    texts = texts.str.strip()
+    texts = texts[texts != ""]
+    # Segment texts repeat a lot, so each distinct one is parsed once
+    parsed = {text: parse_segment(text) for text in texts.unique()}
+    keys = pd.DataFrame([parsed[text] for text in texts], columns=["street", "cross_a", "cross_b"])
+    segments = keys.assign(row_id=row_ids[texts.index], start=start[texts.index].to_numpy(),
+                           end=end[texts.index].to_numpy()).drop_duplicates()
+    return permits, segments
+
+
+class StreetIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def meta(self):
+        try:
+            return {key: json.loads(value) for key, value in self.db.execute("SELECT key, value FROM meta")}
+        except sqlite3.DatabaseError:
+            return {}
+
+    def add_chunk(self, chunk, first_row):
+        permits, segments = chunk_rows(chunk, first_row)
+        self.db.executemany("INSERT INTO permits VALUES (?, ?, ?, ?, ?)", _rows(permits))
+        self.db.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?)", _rows(segments))
+        return len(segments)
+
+    def lookup(self, street, cross=(), since=None, until=None):
+        """Permits holding a segment of ``street``, newest first.
+
+        ``cross`` narrows to segments touching one cross street, or to the
+        block between two. ``since``/``until`` (datetimes or ISO strings)
+        keep permits whose [start, end] overlaps the range.
+        """
+        cross = sorted(normalize_street(name) for name in cross)
+        if len(cross) > 2:
+            raise ValueError("a block has at most two cross streets")
+        # One SELECT per index range: a single cross street may be either end of a block
+        street = normalize_street(street)
+        if len(cross) == 2:
+            ranges = [(["s.street = ?", "s.cross_a = ?", "s.cross_b = ?"], [street] + cross)]
+        elif cross:
+            ranges = [(["s.street = ?", f"s.{end} = ?"], [street] + cross) for end in ("cross_a", "cross_b")]
+        else:
+            ranges = [(["s.street = ?"], [street])]
+        dates, date_params = [], []
+        if until is not None:
+            dates.append("s.start <= ?")
+            date_params.append(_to_seconds(until))
+        if since is not None:
+            dates.append("s.end >= ?")
+            date_params.append(_to_seconds(since))
+        selects = [f"SELECT s.row_id FROM segments s WHERE {' AND '.join(where + dates)}" for where, _ in ranges]
+        params = [param for _, where_params in ranges for param in where_params + date_params]
+        query = (
+            "SELECT p.row_id, p.event_id, p.start, p.end, p.parking_held FROM permits p WHERE p.row_id IN "
+            f"({' UNION '.join(selects)}) ORDER BY p.start DESC, p.row_id"
+        )
+        permits = pd.read_sql_query(query, self.db, params=params)
+        for column in ("start", "end"):
+            permits[column] = pd.to_datetime(permits[column], unit="s")
+        return permits.rename(columns={
+            "event_id": "EventID", "start": "StartDateTime", "end": "EndDateTime", "parking_held": "ParkingHeld"})
+
+
+def _index_from(index, permits_path, offset, columns, first_row, chunksize):
+    """Index the rows starting at byte ``offset``; returns (rows, segments) added."""
+    if "ParkingHeld" not in columns:
+        raise ValueError(f"{permits_path} has no ParkingHeld column")
+    rows = segments = 0
+    with open(permits_path, "rb") as f:
+        f.seek(offset)
+        reader = pd.read_csv(f, header=None, names=columns, usecols=lambda c: c in COLUMNS, dtype=str,
+                             chunksize=chunksize)
+        for chunk in reader:
+            segments += index.add_chunk(chunk.reindex(columns=COLUMNS), first_row + rows)
+            rows += len(chunk)
+    return rows, segments
+
+
+def update_index(permits_path, index_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Bring the street index up to date with the permits CSV.
+
+    Returns stats with the mode used ("unchanged", "incremental" or "full")
+    and the rows and segments indexed by this call.
+    """
+    permits_path, index_path = Path(permits_path), Path(index_path)
+    columns, header_len = read_header(permits_path)
+    size = permits_path.stat().st_size
+
+    meta = {}
+    if index_path.exists():
+        with StreetIndex(index_path) as index:
+            meta = index.meta()
+    resumable = (meta.get("version") == INDEX_VERSION and meta.get("columns") == columns
+                 and meta.get("offset", size + 1) <= size
+                 and file_fingerprint(permits_path, meta["offset"]) == meta.get("fingerprint"))
+    if resumable and meta["offset"] == size:
+        return {"mode": "unchanged", "rows": 0, "segments": 0, "total_rows": meta["rows"]}
+
+    # A full build goes to a temporary file so readers never see a half-built index
+    target = index_path if resumable else index_path.with_suffix(".tmp")
+    if not resumable:
+        target.unlink(missing_ok=True)
+        meta = {"version": INDEX_VERSION, "columns": columns, "offset": header_len, "rows": 0}
+    with StreetIndex(target) as index, index.db:
+        if not resumable:
+            # Nothing reads the temporary file until it is complete, so skip the journal
+            index.db.execute("PRAGMA journal_mode = OFF")
+            index.db.execute("PRAGMA synchronous = OFF")
+            index.db.executescript(SCHEMA)
+        rows, segments = _index_from(index, permits_path, meta["offset"], columns, meta["rows"], chunksize)
+        index.db.executescript(INDEX_SQL)
+        if not resumable:
+            index.db.execute("ANALYZE")
+        meta.update(offset=size, fingerprint=file_fingerprint(permits_path, size), rows=meta["rows"] + rows)
+        index.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in meta.items()])
+    if not resumable:
+        target.replace(index_path)
+    return {"mode": "incremental" if resumable else "full", "rows": rows, "segments": segments,
+            "total_rows": meta["rows"]}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find the permits that held parking on a street or block")
+    parser.add_argument("street", nargs="?", help='Street, e.g. "BROADWAY" or "W 44 ST"')
+    parser.add_argument("--cross", nargs="+", default=[], metavar="STREET",
+                        help="One cross street (segments touching it) or two (the block between them)")
+    parser.add_argument("--since", help="Only permits active on or after this date")
+    parser.add_argument("--until", help="Only permits active on or before this date (default: now)")
+    parser.add_argument("--weeks", type=int, help="Only permits active in the N weeks before --until")
+    parser.add_argument("--limit", type=int, default=50, help="Rows to print (default: 50)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None, project_root=None):
+    args = parse_args(argv)
+    project_root = Path(project_root or Path(__file__).parent.parent.parent)
+    permits_path = project_root / "data_processing" / "data" / "raw" / "film_permits.csv"
+    index_path = project_root / "data_processing" / "data" / "processed" / INDEX_FILE
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    stats = update_index(permits_path, index_path, args.chunksize)
+    if stats["mode"] != "unchanged":
+        print(f"🗂️ Street index ({stats['mode']}): {stats['rows']:,} permits, {stats['segments']:,} segments added")
+    if not args.street:
+        return
+
+    until = pd.Timestamp(args.until) if args.until else None
+    since = pd.Timestamp(args.since) if args.since else None
+    if args.weeks:
+        until = until or pd.Timestamp(datetime.now())
+        since = until - timedelta(weeks=args.weeks)
+    with StreetIndex(index_path) as index:
+        try:
+            permits = index.lookup(args.street, args.cross, since, until)
+        except ValueError as error:
+            print(f"Error: {error}")
+            sys.exit(2)
+    block = f" between {' and '.join(args.cross)}" if len(args.cross) == 2 else (
+        f" at {args.cross[0]}" if args.cross else "")
+    print(f"🔍 {len(permits):,} permits on {args.street}{block}")
+    if len(permits):
+        print(permits.head(args.limit).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
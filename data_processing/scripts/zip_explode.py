@@ -0,0 +1,75 @@
+"""Vectorized multi-ZIP explode and weight attribution.
+
+The raw ``ZipCode(s)`` column holds comma-separated ZIP lists. Both
+process_data scripts need one row per (permit, ZIP) pair plus the share of
+the permit attributed to each ZIP (1 / number of ZIPs on the permit).
+
+Here the whole column is split in one ``str.split`` over the joined text,
+with a marker token between rows, and the result is laid out CSR-style: a
+flat array of stripped ZIP strings, the parent row of each token, and
+``offsets`` such that the tokens of row ``i`` are
+``zips[offsets[i]:offsets[i + 1]]``. Stripping, token lengths, validation,
+counting and weights are then plain NumPy operations on those arrays
+(fixed-width strings until the kept ZIPs are returned as objects), with no
+per-row Python callbacks.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Row boundary marker; must not be whitespace (tokens are stripped) or NUL
+# (NumPy drops trailing NULs when comparing strings)
+ROW_MARKER = "\x01"
+
+
+class ZipExplosion(NamedTuple):
+    row: np.ndarray       # positional index of the source row for each valid ZIP
+    zip: np.ndarray       # the stripped, validated ZIP strings
+    num_zips: np.ndarray  # valid ZIPs on the source row, per exploded ZIP
+    weight: np.ndarray    # 1 / num_zips
+    offsets: np.ndarray   # CSR offsets into row/zip, one entry per source row + 1
+
+
+def explode_zips(zip_strings: pd.Series, sep: str = ",", zip_length=5) -> ZipExplosion:
+    """Split, strip and validate multi-ZIP strings.
+
+    Args:
+        zip_strings: Raw ``ZipCode(s)`` values (any dtype; missing values
+            yield no ZIPs)
+        sep: Separator between ZIPs
+        zip_length: Keep only tokens of exactly this length, or None to
+            keep every non-empty token
+
+    Returns:
+        ZipExplosion with CSR offsets over the kept tokens
+    """
+    values = zip_strings.astype(str).where(zip_strings.notna(), "").tolist()
+    tokens = (sep + ROW_MARKER + sep).join(values).split(sep)
+    tokens = np.char.strip(np.array(tokens, dtype=str))
+
+    is_marker = tokens == ROW_MARKER
+    if values and is_marker.sum() != len(values) - 1:
+        raise ValueError("ZIP strings contain the row marker character")
+    parent = np.cumsum(is_marker)[~is_marker]
+    tokens = tokens[~is_marker]
+
+    lengths = np.char.str_len(tokens)
+    if zip_length is None:
+        valid = lengths > 0
+    else:
+        valid = lengths == zip_length
+
+    row = parent[valid]
+    counts = np.bincount(row, minlength=len(values))
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    num_zips = counts[row]
+    return ZipExplosion(
+        row=row,
+        zip=tokens[valid].astype(object),
+        num_zips=num_zips,
+        weight=1 / num_zips,
+        offsets=offsets,
+    )
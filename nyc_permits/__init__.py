@@ -0,0 +1 @@
+"""NYC film permit data tools; ``python -m nyc_permits --help`` lists the commands."""
@@ -0,0 +1,5 @@
+import sys
+
+from nyc_permits.cli import main
+
+sys.exit(main())
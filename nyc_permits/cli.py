@@ -0,0 +1,162 @@
+"""Single entry point for the permit tools: ``nyc-permits <command> [args]``.
+
+  download        fetch new and changed permits from NYC Open Data
+  load            load and summarize the raw permits and ZIP boundaries
+  process         build the processed outputs (process_data.py options)
+  validate        check the raw files exist and the CSV has the needed columns
+  analyze-weekly  weekly permit count statistics and histogram
+  analyze-types   per-EventType distribution and suggested color breaks
+  streets         permits that held parking on a street or block
+  serve           run the filtered-counts query service
+
+Only the standard library is imported at startup. Each command imports its
+subsystem (pandas, geopandas, matplotlib, pyarrow, ...) when it runs, so
+``--help`` and ``validate`` start about as fast as a bare interpreter.
+Options after a forwarded command are passed on to its script unchanged,
+and the script rejects any it does not know.
+"""
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "data_processing" / "scripts"
+
+
+def _use_scripts():
+    """Make the pipeline scripts (and process_permits.py) importable."""
+    for path in (PROJECT_ROOT, SCRIPTS_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+
+def _processed_dir(args) -> Path:
+    return args.project_root / "data_processing" / "data" / "processed"
+
+
+def download(args, extra):
+    _use_scripts()
+    import open_data
+
+    open_data.main(extra, project_root=args.project_root)
+    return 0
+
+
+def load(args, extra):
+    _use_scripts()
+    import data_loader
+
+    data_loader.main(extra, project_root=args.project_root)
+    return 0
+
+
+def process(args, extra):
+    _use_scripts()
+    import process_data
+
+    process_data.main(extra, project_root=args.project_root)
+    return 0
+
+
+def validate(args, extra):
+    _use_scripts()
+    from data_loader import DataLoader
+
+    loader = DataLoader(args.project_root, use_cache=False)
+    if not (loader.validate_paths() and loader.validate_columns()):
+        print("✗ Raw data is missing or incomplete")
+        return 1
+    print("✓ Raw data files present with the required columns")
+    if not args.full:
+        return 0
+
+    import pandas as pd
+    from data_loader import REQUIRED_COLUMNS
+    from process_data import DATE_FORMAT
+    from process_permits import validate_permit_batch
+
+    permits = pd.read_csv(loader.permits_path, usecols=REQUIRED_COLUMNS, dtype=str)
+    report = validate_permit_batch(permits, date_format=DATE_FORMAT)
+    for rule, result in report["rules"].items():
+        print(f"   {rule}: {result['failed']:,} rows")
+    print(f"{'✓' if report['valid'] else '✗'} {report['rows']:,} permits checked")
+    return 0 if report["valid"] else 1
+
+
+def analyze_weekly(args, extra):
+    _use_scripts()
+    import analyze_weekly
+
+    analyze_weekly.main(extra, processed_dir=_processed_dir(args))
+    return 0
+
+
+def analyze_types(args, extra):
+    _use_scripts()
+    # scripts/analyze_type_distribution.py shares its module name with the
+    # older copy in data_processing/scripts, so load it by path
+    path = PROJECT_ROOT / "scripts" / "analyze_type_distribution.py"
+    spec = importlib.util.spec_from_file_location("type_distribution_report", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.analyze_type_distribution(use_cache=not args.no_cache, project_root=str(args.project_root),
+                                     preview=args.preview)
+    return 0
+
+
+def streets(args, extra):
+    _use_scripts()
+    import street_index
+
+    street_index.main(extra, project_root=args.project_root)
+    return 0
+
+
+def serve(args, extra):
+    _use_scripts()
+    import query_service
+
+    if not any(arg.startswith("--processed-dir") for arg in extra):
+        extra = ["--processed-dir", str(_processed_dir(args))] + extra
+    query_service.main(extra)
+    return 0
+
+
+# Commands whose options belong to the script they run
+FORWARDED = [
+    ("download", download, "Fetch new and changed permits from NYC Open Data (see `download --help`)"),
+    ("load", load, "Load and summarize the raw permits and ZIP boundaries [--no-cache] [--profile]"),
+    ("process", process, "Build the processed outputs (see `process --help`)"),
+    ("analyze-weekly", analyze_weekly, "Weekly permit count statistics [WEEKLY_JSON] [--no-cache] [--preview]"),
+    ("streets", streets, "Permits on a street or block, by date (see `streets --help`)"),
+    ("serve", serve, "Serve filtered permit counts over HTTP (see `serve --help`)"),
+]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="nyc-permits", description="NYC film permit data tools")
+    parser.add_argument("--project-root", type=Path, default=PROJECT_ROOT,
+                        help="Project tree holding data_processing/data (default: this checkout)")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    for name, handler, help_text in FORWARDED:
+        command = commands.add_parser(name, help=help_text, add_help=False)
+        command.set_defaults(handler=handler, forward=True)
+    command = commands.add_parser("validate", help="Check the raw data files and CSV columns")
+    command.add_argument("--full", action="store_true",
+                         help="Also run the per-row permit checks (dates, ZIP format, event types)")
+    command.set_defaults(handler=validate, forward=False)
+    command = commands.add_parser("analyze-types", help="EventType distribution and suggested color breaks")
+    command.add_argument("--no-cache", action="store_true", help="Parse total_by_type.json without the permit cache")
+    command.add_argument("--preview", action="store_true",
+                         help="Read the sampled estimates written by `process --sample`")
+    command.set_defaults(handler=analyze_types, forward=False)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and not args.forward:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.handler(args, extra)
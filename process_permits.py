@@ -1,44 +1,144 @@
 #!/usr/bin/env python3
 
 import logging
+import os
 import sys
-from typing import Dict, List, Optional
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_processing', 'scripts'))
+from profiling import profiler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class PermitCounts:
+    """
+    Compact per-ZIP permit counts backed by array buffers
+
+    Counts live in a single integer array indexed by ZIP slot; when
+    requested, the row index of every permit is kept in one integer array
+    per ZIP. No permit objects are retained, so memory grows with the number
+    of ZIP codes (plus 8 bytes per permit with indices), not with the size
+    of the permit records.
+    """
+
+    def __init__(self, keep_indices: bool = False):
+        self.zip_codes: List[str] = []
+        self.counts = array('q')
+        self._slots: Dict[str, int] = {}
+        self._indices: Optional[List[array]] = [] if keep_indices else None
+
+    def add(self, zip_code: str, row: int) -> None:
+        """Count one permit for zip_code, recording its row index if kept"""
+        slot = self._slots.get(zip_code)
+        if slot is None:
+            slot = self._slots[zip_code] = len(self.zip_codes)
+            self.zip_codes.append(zip_code)
+            self.counts.append(0)
+            if self._indices is not None:
+                self._indices.append(array('q'))
+        self.counts[slot] += 1
+        if self._indices is not None:
+            self._indices[slot].append(row)
+
+    def __len__(self) -> int:
+        return len(self.zip_codes)
+
+    def __contains__(self, zip_code: str) -> bool:
+        return zip_code in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.zip_codes)
+
+    def count(self, zip_code: str) -> int:
+        """Number of permits for zip_code (0 if unseen)"""
+        slot = self._slots.get(zip_code)
+        return 0 if slot is None else self.counts[slot]
+
+    def indices(self, zip_code: str) -> memoryview:
+        """Read-only view of the row indices of permits for zip_code"""
+        if self._indices is None:
+            raise ValueError("Row indices were not kept; use keep_indices=True")
+        slot = self._slots.get(zip_code)
+        if slot is None:
+            return memoryview(array('q')).toreadonly()
+        return memoryview(self._indices[slot]).toreadonly()
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """(zip_code, count) pairs in first-seen order"""
+        return zip(self.zip_codes, self.counts)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Counts in the {'zip': {'count': n}} shape of aggregatePermitData"""
+        return {zip_code: {'count': count} for zip_code, count in self.items()}
+
+
 class MapHandler:
     def __init__(self):
         self.map_data = None
         self.color_scale = None
         
-    def aggregatePermitData(self, permit_data: List[Dict]) -> Dict:
+    def aggregatePermitData(self, permit_data: Iterable[Dict]) -> Dict:
         """
         Aggregate permit data by ZIP code
         
         Args:
-            permit_data: List of permit dictionaries
+            permit_data: List (or any iterable) of permit dictionaries
             
         Returns:
             Dictionary of aggregated permit data by ZIP code
         """
         aggregated = {}
-        try:
-            for permit in permit_data:
-                zip_code = permit.get('zipcode')
-                if zip_code:
-                    if zip_code not in aggregated:
-                        aggregated[zip_code] = {
-                            'count': 0,
-                            'permits': []
-                        }
-                    aggregated[zip_code]['count'] += 1
-                    aggregated[zip_code]['permits'].append(permit)
-            return aggregated
-        except Exception as e:
-            logger.error(f"Error aggregating permit data: {str(e)}")
-            return {}
+        with profiler.stage('MapHandler.aggregatePermitData') as timer:
+            try:
+                rows = 0
+                for permit in permit_data:
+                    rows += 1
+                    zip_code = permit.get('zipcode')
+                    if zip_code:
+                        if zip_code not in aggregated:
+                            aggregated[zip_code] = {
+                                'count': 0,
+                                'permits': []
+                            }
+                        aggregated[zip_code]['count'] += 1
+                        aggregated[zip_code]['permits'].append(permit)
+                timer.rows_in, timer.rows_out = rows, len(aggregated)
+                return aggregated
+            except Exception as e:
+                logger.error(f"Error aggregating permit data: {str(e)}")
+                return {}
+
+    def aggregatePermitCounts(self, permit_data: Iterable[Dict],
+                              keep_indices: bool = False) -> PermitCounts:
+        """
+        Count permits by ZIP code without retaining the permit records
+        
+        Args:
+            permit_data: Any iterable of permit dictionaries, e.g. a
+                generator streaming rows from disk
+            keep_indices: Also record each permit's position in the input
+            
+        Returns:
+            PermitCounts with array-backed counts (and row indices)
+        """
+        counts = PermitCounts(keep_indices=keep_indices)
+        with profiler.stage('MapHandler.aggregatePermitCounts') as timer:
+            row = -1
+            try:
+                for row, permit in enumerate(permit_data):
+                    zip_code = permit.get('zipcode')
+                    if zip_code:
+                        counts.add(zip_code, row)
+            except Exception as e:
+                logger.error(f"Error aggregating permit counts: {str(e)}")
+                return PermitCounts(keep_indices=keep_indices)
+            timer.rows_in, timer.rows_out = row + 1, len(counts)
+        return counts
 
 def validate_permit_data(data: List[Dict]) -> bool:
     """
@@ -56,9 +156,9 @@ def validate_permit_data(data: List[Dict]) -> bool:
             return False
             
         required_fields = ['zipcode', 'date', 'type']
-        for permit in data:
+        for row, permit in enumerate(data):
             if not all(field in permit for field in required_fields):
-                logger.error(f"Missing required fields in permit: {permit}")
+                logger.error(f"Missing required fields in permit at row {row}")
                 return False
                 
         return True
@@ -67,6 +167,103 @@ def validate_permit_data(data: List[Dict]) -> bool:
         return False
 
 
+# Column names of the raw NYC Open Data extract, by validation role
+RAW_PERMIT_COLUMNS = {
+    'zipcode': 'ZipCode(s)',
+    'start': 'StartDateTime',
+    'end': 'EndDateTime',
+    'type': 'EventType',
+}
+
+KNOWN_EVENT_TYPES = frozenset({
+    'Shooting Permit',
+    'Rigging Permit',
+    'Theater Load in and Load Outs',
+    'DCAS Prep/Shoot/Wrap Permit',
+})
+
+# One or more comma-separated 5-digit ZIP codes
+ZIP_LIST_PATTERN = r'\s*\d{5}(?:\s*,\s*\d{5})*\s*'
+
+
+def _rule_result(failed: pd.Series, sample_size: int) -> Dict:
+    failed_index = failed.index[failed.to_numpy()]
+    return {
+        'failed': int(len(failed_index)),
+        'sample_rows': failed_index[:sample_size].tolist(),
+    }
+
+
+@profiler.timed('validate_permit_batch')
+def validate_permit_batch(data, columns: Optional[Mapping[str, str]] = None,
+                          event_types: Optional[Iterable[str]] = KNOWN_EVENT_TYPES,
+                          date_format: Optional[str] = None,
+                          sample_size: int = 5) -> Dict:
+    """
+    Validate a whole batch of permits with vectorized column checks
+    
+    Every rule runs over the full batch, so the report covers all bad rows
+    rather than stopping at the first one.
+    
+    Args:
+        data: DataFrame, or columnar input (dict of equal-length lists)
+        columns: Maps the roles 'zipcode', 'start', 'end' and 'type' to
+            column names; roles left out are not checked.
+            Defaults to the raw CSV columns (RAW_PERMIT_COLUMNS)
+        event_types: Allowed EventType values, or None to skip the check
+        date_format: strptime format for the date columns (inferred if None)
+        sample_size: Number of failing row indices kept per rule
+        
+    Returns:
+        Dictionary with 'rows', 'valid' and per-rule 'rules' results of
+        the form {'failed': count, 'sample_rows': [index, ...]}
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    columns = dict(RAW_PERMIT_COLUMNS if columns is None else columns)
+    rules = {}
+
+    # Required fields: column present and value not missing
+    missing_columns = [name for name in columns.values() if name not in df.columns]
+    present = {role: name for role, name in columns.items() if name in df.columns}
+    for role, name in columns.items():
+        if name in missing_columns:
+            rules[f'required:{name}'] = {'failed': len(df), 'sample_rows': df.index[:sample_size].tolist()}
+        else:
+            rules[f'required:{name}'] = _rule_result(df[name].isna(), sample_size)
+
+    if 'zipcode' in present:
+        zips = df[present['zipcode']]
+        bad_zip = zips.notna() & ~zips.astype(str).str.fullmatch(ZIP_LIST_PATTERN)
+        rules['zipcode_format'] = _rule_result(bad_zip, sample_size)
+
+    parsed = {}
+    for role in ('start', 'end'):
+        if role in present:
+            raw = df[present[role]]
+            parsed[role] = pd.to_datetime(raw, format=date_format, errors='coerce')
+            rules[f'date_format:{present[role]}'] = _rule_result(raw.notna() & parsed[role].isna(), sample_size)
+
+    if 'start' in parsed and 'end' in parsed:
+        rules['end_before_start'] = _rule_result(parsed['end'] < parsed['start'], sample_size)
+
+    if 'type' in present and event_types is not None:
+        types = df[present['type']]
+        rules['unknown_event_type'] = _rule_result(
+            types.notna() & ~types.isin(list(event_types)), sample_size
+        )
+
+    for rule, result in rules.items():
+        if result['failed']:
+            logger.error(f"Permit validation rule '{rule}' failed for {result['failed']} rows "
+                         f"(e.g. rows {result['sample_rows']})")
+
+    return {
+        'rows': len(df),
+        'valid': len(df) > 0 and not any(result['failed'] for result in rules.values()),
+        'rules': rules,
+    }
+
+
 def main():
     """Main function to process permits and run tests"""
     # Sample test data
@@ -1,25 +1,26 @@
-import json
 import pandas as pd
 import numpy as np
 from collections import Counter
 import os
+import sys
 
-def analyze_type_distribution():
-    # Get the absolute path to the JSON file
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(os.path.dirname(script_dir), 'data_processing', 'data', 'processed', 'total_by_type.json')
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), 'data_processing', 'scripts'))
+from column_store import load_processed_frame
+
+def analyze_type_distribution(use_cache=True, project_root=None, preview=False):
+    # Get the absolute path to the JSON file (preview: sampled estimates from process_data.py --sample)
+    project_root = project_root or os.path.dirname(script_dir)
+    processed_dir = os.path.join(project_root, 'data_processing', 'data', 'processed')
+    json_path = os.path.join(processed_dir, 'preview' if preview else '', 'total_by_type.json')
     
     try:
-        # Read the JSON file
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(data)
+        # Read the JSON file (memory-mapped from the column store when current)
+        df = load_processed_frame(json_path, use_cache)
         
         # Basic statistics
         print("\n=== Basic Statistics ===")
-        total_types = len(data)
+        total_types = len(df)
         print(f"Total number of types: {total_types}")
         print(f"Unique Event Types: {len(df['EventType'].unique())}")
         print(f"Number of ZipCodes with Activity: {len(df['ZipCode(s)'].unique())}")
@@ -46,7 +47,7 @@ def analyze_type_distribution():
         
         # Event Type Analysis
         print("\n=== Event Type Analysis ===")
-        type_stats = df.groupby('EventType')['type_count'].agg(['count', 'sum', 'mean']).sort_values('sum', ascending=False)
+        type_stats = df.groupby('EventType', observed=True)['type_count'].agg(['count', 'sum', 'mean']).sort_values('sum', ascending=False)
         print("\nTop Event Types by Total Count:")
         print(type_stats.to_string())
         
@@ -81,4 +82,4 @@ def analyze_type_distribution():
         print(f"Error: {str(e)}")
 
 if __name__ == "__main__":
-    analyze_type_distribution()
+    analyze_type_distribution(use_cache='--no-cache' not in sys.argv, preview='--preview' in sys.argv)
@@ -0,0 +1,46 @@
+import pandas as pd
+from bench_scaling import compare, format_rows, parse_rows
+from synthetic import generate_permits, generate_raw_data
+
+
+def test_generator_is_seeded(tmp_path):
+    """Test the same seed writes the same file and a different seed does not"""
+    first = generate_permits(tmp_path / "a.csv", 2_000, seed=7, chunk_rows=700).read_bytes()
+    again = generate_permits(tmp_path / "b.csv", 2_000, seed=7, chunk_rows=700).read_bytes()
+    other = generate_permits(tmp_path / "c.csv", 2_000, seed=8, chunk_rows=700).read_bytes()
+    assert first == again
+    assert first != other
+
+
+def test_generated_data_feeds_both_pipelines(tmp_path):
+    """Test synthetic rows parse in both date formats with skewed types and multi-ZIP strings"""
+    from process_data import aggregate_permits, expand_permits
+
+    raw_dir = generate_raw_data(tmp_path / "raw", 5_000, seed=1)
+    df = pd.read_csv(raw_dir / "film_permits.csv")
+    assert len(df) == 5_000
+    assert df["EventType"].value_counts(normalize=True).iloc[0] > 0.7
+    assert df["ZipCode(s)"].str.contains(",").mean() > 0.3
+
+    expanded, dropped = expand_permits(df)
+    assert 0 < dropped < 50
+    _, total_counts, _ = aggregate_permits(expanded)
+    boundaries = pd.read_json(raw_dir / "zip_boundaries.geojson")
+    zips = {feature["properties"]["postalCode"] for feature in boundaries["features"]}
+    assert set(total_counts["ZipCode(s)"]) <= zips
+
+    iso = pd.read_csv(generate_permits(tmp_path / "iso.csv", 1_000, seed=1, date_format="iso"))
+    parsed = pd.to_datetime(iso["StartDateTime"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    assert parsed.notna().mean() > 0.99
+
+
+def test_baseline_comparison():
+    """Test throughput drops and memory growth beyond tolerance are reported"""
+    baseline = {"case@1M": {"rows_per_second": 1000.0, "peak_rss_mb": 500.0, "rss_growth_mb": 100.0}}
+    assert compare({"case@1M": {"rows_per_second": 900.0, "peak_rss_mb": 900.0, "rss_growth_mb": 110.0}},
+                   baseline, 0.25) == []
+    problems = compare({"case@1M": {"rows_per_second": 500.0, "peak_rss_mb": 500.0, "rss_growth_mb": 200.0},
+                        "new@1M": {"rows_per_second": 1.0, "peak_rss_mb": 1.0, "rss_growth_mb": 1.0}},
+                       baseline, 0.25)
+    assert len(problems) == 2 and all(p.startswith("case@1M") for p in problems)
+    assert parse_rows("50M") == 50_000_000 and format_rows(parse_rows("100k")) == "100k"
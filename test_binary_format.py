@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+import pytest
+from binary_format import manifest_path, read_binary, write_binary
+from process_data import aggregate_permits, expand_permits
+
+
+# Fixtures
+@pytest.fixture
+def aggregates(permits_csv):
+    """Fixture providing weekly and by-type aggregates of a small permits CSV"""
+    weekly_counts, _, total_by_type = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])
+    return {"weekly_permits": weekly_counts, "total_by_type": total_by_type}
+
+
+@pytest.mark.parametrize("name", ["weekly_permits", "total_by_type"])
+def test_round_trip_matches_json(aggregates, tmp_path, name):
+    """Test the binary output decodes to exactly the JSON records"""
+    df = aggregates[name]
+    df.to_json(tmp_path / f"{name}.json", orient="records", indent=2)
+    write_binary(df, tmp_path, name)
+
+    with open(tmp_path / f"{name}.json") as f:
+        expected = json.load(f)
+    assert read_binary(tmp_path, name).to_dict("records") == expected
+
+
+def test_manifest_dictionary_encoding(aggregates, tmp_path):
+    """Test string columns are dictionary-encoded and counts are uint32"""
+    write_binary(aggregates["weekly_permits"], tmp_path, "weekly_permits")
+    with open(manifest_path(tmp_path, "weekly_permits")) as f:
+        columns = {col["name"]: col for col in json.load(f)["columns"]}
+
+    assert columns["ZipCode(s)"]["dictionary"] == ["10001", "10002", "10003", "10004"]
+    assert columns["year"]["dtype"] == "uint16"
+    assert columns["permit_count"]["dtype"] == "uint32"
+
+
+def test_pipeline_binary_copy_matches_weekly_json(project_root):
+    """Test --binary writes the weekly table as written to JSON, active_permits included"""
+    from process_data import process_data
+
+    processed_dir = project_root / "data_processing" / "data" / "processed"
+    process_data(project_root=project_root, binary=True, active_permits=True)
+    with open(processed_dir / "weekly_permits.json") as f:
+        expected = json.load(f)
+    assert "active_permits" in expected[0]
+    assert read_binary(processed_dir, "weekly_permits").to_dict("records") == expected
+    assert not list(processed_dir.glob("*.tmp"))
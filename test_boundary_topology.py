@@ -0,0 +1,62 @@
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from boundary_topology import build_topology, decode_topology, export_topology_levels, simplify_arcs, zoom_ranges
+
+
+# Fixtures
+@pytest.fixture
+def tessellation():
+    """Fixture providing adjacent polygons with wiggly shared borders"""
+    rng = np.random.default_rng(0)
+    extent = shapely.box(-74.25, 40.5, -73.7, 40.9)
+    seeds = shapely.multipoints(rng.uniform([-74.25, 40.5], [-73.7, 40.9], size=(30, 2)))
+    cells = [shapely.segmentize(cell.intersection(extent), 0.002)
+             for cell in shapely.voronoi_polygons(seeds, extend_to=extent).geoms]
+    cells = [shapely.transform(cell, lambda c: c + 0.001 * np.sin(c[:, ::-1] * 500)) for cell in cells]
+    return gpd.GeoDataFrame(
+        {"postalCode": [str(10001 + i) for i in range(len(cells))]}, geometry=cells, crs="EPSG:4326"
+    )
+
+
+def test_zoom_ranges():
+    """Test zoom ranges cover the configured min/max zoom"""
+    assert zoom_ranges(10, 18) == [(10, 11), (12, 13), (14, 15), (16, 18)]
+    assert zoom_ranges(10, 10) == [(10, 10)]
+
+
+def test_ring_of_open_arcs_keeps_its_area():
+    """Test a thin ring joined from two open arcs is not simplified down to a line"""
+    arcs = [np.array([[0, 0], [5, 1], [10, 0]]), np.array([[10, 0], [5, -1], [0, 0]])]
+    assert [len(arc) for arc in simplify_arcs(arcs, 2)] == [2, 2]
+    kept = simplify_arcs(arcs, 2, rings=[[0, 1]])
+    assert all((arc == original).all() for arc, original in zip(kept, arcs))
+
+
+def test_shared_borders_stored_once(tessellation):
+    """Test every interior border arc is referenced by exactly two rings"""
+    arcs, geometries, _ = build_topology(tessellation)
+    references = np.zeros(len(arcs), dtype=int)
+    for geometry in geometries:
+        for ring in geometry["arcs"]:
+            for ref in ring:
+                references[ref if ref >= 0 else ~ref] += 1
+    assert references.max() == 2, "An arc should be shared by at most two neighbours"
+    assert (references == 2).sum() > len(tessellation), "Expected most borders to be shared"
+
+
+def test_levels_preserve_topology(tessellation, tmp_path):
+    """Test simplified levels stay valid, gap-free and overlap-free"""
+    levels = export_topology_levels(tessellation, tmp_path, "zip_permits", 10, 18)
+    assert [level["vertices"] for level in levels] == sorted(level["vertices"] for level in levels)
+
+    expected_area = shapely.union_all(tessellation.geometry.values).area
+    for level in levels:
+        geometries = decode_topology(json.loads((tmp_path / level["file"]).read_text()))
+        assert all(geometry.is_valid for geometry in geometries)
+        total_area = sum(geometry.area for geometry in geometries)
+        assert shapely.union_all(geometries).area == pytest.approx(total_area, rel=1e-9)
+        assert total_area == pytest.approx(expected_area, rel=1e-3)
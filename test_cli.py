@@ -0,0 +1,60 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Total import time allowed for `--help` and `validate`; pandas alone takes longer
+IMPORT_BUDGET_SECONDS = 0.25
+HEAVY_MODULES = {"pandas", "numpy", "geopandas", "matplotlib", "pyarrow", "shapely"}
+
+
+def _run_with_importtime(*args):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "nyc_permits", *args],
+                            cwd=Path(__file__).parent, capture_output=True, text=True)
+    imports = re.findall(r"^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)$", result.stderr, re.MULTILINE)
+    total = sum(int(self_us) for self_us, _ in imports) / 1e6
+    top_level = {name.split(".")[0] for _, name in imports}
+    return result, total, top_level
+
+
+@pytest.mark.parametrize("args", [["--help"], ["validate"]])
+def test_startup_within_import_budget(project_root, args):
+    """Test --help and validate import no heavy dependencies and stay within the budget"""
+    result, total, modules = _run_with_importtime("--project-root", str(project_root), *args)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "nyc_permits" in modules
+    assert not modules & HEAVY_MODULES, f"Imported at startup: {sorted(modules & HEAVY_MODULES)}"
+    assert total < IMPORT_BUDGET_SECONDS, f"Imports took {total:.3f}s"
+
+
+def test_validate_reports_missing_columns(project_root, capsys):
+    """Test validate fails on a CSV without the pipeline's columns and --full runs the row checks"""
+    from nyc_permits.cli import main
+
+    assert main(["--project-root", str(project_root), "validate", "--full"]) == 1  # fixture has a bad date
+    assert "date_format:StartDateTime: 1 rows" in capsys.readouterr().out
+
+    permits = project_root / "data_processing" / "data" / "raw" / "film_permits.csv"
+    permits.write_text(permits.read_text().replace("EventType", "Type", 1))
+    assert main(["--project-root", str(project_root), "validate"]) == 1
+
+
+def test_forwarded_command_runs_script(project_root):
+    """Test process forwards its options to process_data.py"""
+    from nyc_permits.cli import main
+
+    assert main(["--project-root", str(project_root), "process", "--chunksize", "2"]) == 0
+    assert (project_root / "data_processing" / "data" / "processed" / "weekly_permits.json").exists()
+
+
+@pytest.mark.parametrize("command", ["analyze-types", "analyze-weekly", "load"])
+def test_unknown_options_are_rejected(project_root, command, capsys):
+    """Test commands fail on an option they do not know instead of ignoring it"""
+    from nyc_permits.cli import main
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--project-root", str(project_root), command, "--no-cahce"])
+    assert exit_info.value.code == 2
+    assert "--no-cahce" in capsys.readouterr().err
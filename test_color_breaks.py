@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from color_breaks import bucket_index, write_color_breaks
+from quantile_sketch import KLLSketch
+
+
+# Quantile Sketch Tests
+def test_sketch_is_exact_below_k():
+    """Test small streams give the exact lower quantiles"""
+    values = np.random.default_rng(0).integers(1, 50, size=150)
+    qs = np.linspace(0, 1, 7)
+    result = KLLSketch(k=200).update(values).quantiles(qs)
+    assert result.tolist() == np.quantile(values, qs, method="inverted_cdf").tolist()
+
+
+def test_merged_sketches_stay_within_rank_error():
+    """Test merging per-chunk sketches approximates the quantiles of the union"""
+    values = np.random.default_rng(1).lognormal(2, 1, size=200_000)
+    merged = KLLSketch(seed=0)
+    for i, chunk in enumerate(np.array_split(values, 50)):
+        merged.merge(KLLSketch(seed=i).update(chunk))
+
+    assert len(merged) == len(values)
+    assert sum(len(level) for level in merged.levels) < 1_000
+    qs = np.array([0.1, 0.25, 0.5, 0.75, 0.9])
+    ranks = np.searchsorted(np.sort(values), merged.quantiles(qs)) / len(values)
+    assert np.abs(ranks - qs).max() < 0.03
+    assert merged.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+
+# Color Breaks Tests
+def test_bucket_index_matches_map_semantics():
+    """Test zero is bucket 0 and bucket i covers (breaks[i - 1], breaks[i]]"""
+    breaks = [0, 2, 4, 10, 21, 80, 1331]
+    values = [0, 1, 2, 3, 10, 11, 80, 81, 5000]
+    assert bucket_index(values, breaks).tolist() == [0, 1, 1, 2, 3, 4, 5, 6, 6]
+
+
+def test_write_color_breaks(tmp_path):
+    """Test per-view breaks in the generated script and per-cell buckets"""
+    weekly_counts = pd.DataFrame({
+        "year": [2023] * 6,
+        "week": [1, 1, 1, 2, 2, 2],
+        "ZipCode(s)": ["10001", "10002", "10003", "10001", "10001", "10002"],
+        "EventType": ["Shooting Permit", "Shooting Permit", "Shooting Permit",
+                      "Shooting Permit", "Rigging Permit", "Shooting Permit"],
+        "permit_count": [1, 5, 9, 2, 3, 40],
+    })
+    total_counts = pd.DataFrame({"ZipCode(s)": ["10001", "10002", "10003"], "total_permits": [6, 45, 9]})
+    total_by_type = pd.DataFrame({
+        "ZipCode(s)": ["10001", "10001", "10002", "10003"],
+        "EventType": ["Rigging Permit", "Shooting Permit", "Shooting Permit", "Shooting Permit"],
+        "type_count": [3, 3, 45, 9],
+    })
+    script_path = tmp_path / "js" / "color-breaks.js"
+    breaks = write_color_breaks((weekly_counts, total_counts, total_by_type), tmp_path, script_path)
+
+    assert breaks["all"][0] == 0 and breaks["all"][-1] == 45
+    assert breaks["weeks"]["2023-2"][-1] == 40
+    assert set(breaks["types"]) == {"Rigging Permit", "Shooting Permit"}
+    assert f"CONFIG.colors.breaks = {json.dumps(breaks['all'])};" in script_path.read_text()
+
+    with open(tmp_path / "color_buckets.json") as f:
+        buckets = json.load(f)
+    assert buckets["zips"] == ["10001", "10002", "10003"]
+    assert buckets["weeks"] == ["2023-1", "2023-2"]
+    assert buckets["weekly"][1][2] == 0  # no permits in 10003 that week
+    assert buckets["all"] == bucket_index([6, 45, 9], breaks["all"]).tolist()
+    assert buckets["types"]["Rigging Permit"] == [bucket_index([3], breaks["types"]["Rigging Permit"])[0], 0, 0]
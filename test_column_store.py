@@ -0,0 +1,50 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from column_store import Table, load_processed_frame, manifest_path, write_table
+from process_data import aggregate_permits, expand_permits
+
+
+# Fixtures
+@pytest.fixture
+def processed_dir(permits_csv, tmp_path):
+    """Fixture writing weekly_permits.json and its column store copy"""
+    weekly_counts = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])[0]
+    weekly_counts.to_json(tmp_path / "weekly_permits.json", orient="records", indent=2)
+    write_table(weekly_counts, tmp_path, "weekly_permits")
+    return tmp_path
+
+
+def test_table_matches_json_without_copies(processed_dir):
+    """Test the mapped frame equals the JSON records and its columns are views on the files"""
+    table = Table(processed_dir, "weekly_permits")
+    frame = table.to_frame()
+    with open(processed_dir / "weekly_permits.json") as f:
+        assert frame.astype({"ZipCode(s)": str, "EventType": str}).to_dict("records") == json.load(f)
+
+    counts = frame["permit_count"].to_numpy()
+    assert np.shares_memory(counts, table.array("permit_count")) and not counts.flags.writeable
+    assert isinstance(table.array("permit_count"), np.memmap)
+    assert np.shares_memory(frame["ZipCode(s)"].cat.codes.to_numpy(), table.array("ZipCode(s)"))
+
+
+def test_rewrite_keeps_open_readers_and_stale_store_falls_back(processed_dir):
+    """Test a rewrite leaves open tables intact and an older store is not used"""
+    before = Table(processed_dir, "weekly_permits")
+    rows = len(before)
+    write_table(pd.DataFrame({"year": [2024], "permit_count": [9]}), processed_dir, "weekly_permits")
+    assert len(before.to_frame()) == rows
+    assert Table(processed_dir, "weekly_permits").to_frame().values.tolist() == [[2024, 9]]
+    # The new generation has its own files; the old ones are gone once the manifest moved
+    assert sorted(path.name for path in processed_dir.glob("weekly_permits.*.bin")) == \
+        sorted(spec["file"] for spec in Table(processed_dir, "weekly_permits").specs.values())
+    assert before.specs["year"]["file"] != Table(processed_dir, "weekly_permits").specs["year"]["file"]
+
+    json_path = processed_dir / "weekly_permits.json"
+    assert len(load_processed_frame(json_path, use_cache=False)) == 1
+    later = os.stat(manifest_path(processed_dir, "weekly_permits")).st_mtime_ns + 10**9
+    os.utime(json_path, ns=(later, later))
+    assert len(load_processed_frame(json_path, use_cache=False)) == rows
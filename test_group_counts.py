@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from group_counts import GroupCounts
+
+
+def test_aggregate_permits_matches_groupby(permits_csv):
+    """Test the single-bincount aggregation reproduces the three groupbys"""
+    from process_data import aggregate_permits, aggregate_permits_groupby, expand_permits
+
+    expanded, _ = expand_permits(pd.read_csv(permits_csv))
+    for actual, expected in zip(aggregate_permits(expanded), aggregate_permits_groupby(expanded)):
+        assert actual.to_json(orient="records") == expected.to_json(orient="records")
+
+
+def test_rollups_and_weights_match_groupby():
+    """Test axis-sum rollups, reordered axes and weight sums against groupby"""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "year": rng.choice([2022, 2023], 500),
+        "week": rng.integers(1, 5, 500),
+        "zip": rng.choice(["10001", "10002", "11201"], 500),
+        "type": rng.choice(["Rigging Permit", "Shooting Permit"], 500),
+        "weight": rng.choice([1, 0.5, 0.25], 500),
+    })
+    counts = GroupCounts.from_frame(frame, {"week": ["year", "week"], "zip": "zip", "type": "type"},
+                                    weights=["weight"])
+
+    finest = counts.to_frame("n")
+    expected = frame.groupby(["year", "week", "zip", "type"]).agg(n=("weight", "size"), weight=("weight", "sum"))
+    assert finest.values.tolist() == expected.reset_index().values.tolist()
+
+    by_type_zip = counts.rollup(["type", "zip"]).to_frame("n")
+    expected = frame.groupby(["type", "zip"]).agg(n=("weight", "size"), weight=("weight", "sum"))
+    assert by_type_zip.values.tolist() == expected.reset_index().values.tolist()
+
+
+def test_rows_with_missing_labels_are_dropped(permits_csv):
+    """Test a permit with an empty EventType is left out like groupby does, instead of failing"""
+    from process_data import aggregate_permits, aggregate_permits_groupby, expand_permits
+
+    permits = pd.read_csv(permits_csv)
+    permits.loc[0, "EventType"] = np.nan
+    expanded, _ = expand_permits(permits)
+    for actual, expected in zip(aggregate_permits(expanded), aggregate_permits_groupby(expanded)):
+        assert actual.to_json(orient="records") == expected.to_json(orient="records")
+
+    frame = pd.DataFrame({"year": [2023, 2023, np.nan], "week": [1, 2, 1], "zip": ["10001", None, "10001"]})
+    counts = GroupCounts.from_frame(frame, {"week": ["year", "week"], "zip": "zip"})
+    assert counts.to_frame("n").values.tolist() == [[2023, 1, "10001", 1]]
@@ -0,0 +1,49 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from monthly_slices import GEOMETRY_FILE, MANIFEST_FILE, SLICES_DIR, load_month
+from synthetic import generate_raw_data
+
+MONTHLY_SCRIPT = Path(__file__).parent / "data_processing" / "scripts" / "data_processing" / "process_data.py"
+
+
+def _monthly_script():
+    spec = importlib.util.spec_from_file_location("monthly_process_data", MONTHLY_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_geometry_written_once_and_months_sliced(tmp_path):
+    """Test each month slice matches a groupby over the permits and geometry is only rewritten on change"""
+    generate_raw_data(tmp_path / "data" / "raw", 3_000, seed=3, date_format="iso")
+    script = _monthly_script()
+    script.process_data(project_root=tmp_path)
+    processed = tmp_path / "data" / "processed"
+
+    with open(processed / GEOMETRY_FILE) as f:
+        features = json.load(f)["features"]
+    with open(processed / SLICES_DIR / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    assert [feature["id"] for feature in features] == manifest["zips"]
+    assert all("total_permits" not in feature["properties"] for feature in features)
+
+    permits = pd.read_csv(tmp_path / "data" / "raw" / "film_permits.csv")
+    permits["start"] = pd.to_datetime(permits["StartDateTime"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    permits = permits.dropna(subset=["start"]).assign(ZIP=lambda df: df["ZipCode(s)"].str.split(", "))
+    permits["weight"] = 1 / permits["ZIP"].str.len()
+    exploded = permits.explode("ZIP").assign(month=lambda df: df["start"].dt.strftime("%Y-%m"))
+    expected = exploded.groupby(["month", "ZIP"])["weight"].agg(["size", "sum"])
+    assert [entry["month"] for entry in manifest["months"]] == sorted(expected.index.levels[0])
+    for month in ["2018-01", "2020-07", manifest["months"][-1]["month"]]:
+        actual = load_month(processed, month)
+        reference = expected.loc[month].reindex(actual.index, fill_value=0)
+        assert (actual["total_permits"] == reference["size"]).all()
+        assert np.allclose(actual["weighted_permits"], reference["sum"], rtol=1e-6)
+
+    geometry_mtime = (processed / GEOMETRY_FILE).stat().st_mtime_ns
+    script.process_data(project_root=tmp_path)
+    assert (processed / GEOMETRY_FILE).stat().st_mtime_ns == geometry_mtime
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from occupancy import Occupancy
+
+
+def _brute_force(starts, ends, hours):
+    """Reference answer by checking every permit against every hour"""
+    return np.array([sum(1 for s, e in zip(starts, ends) if s < hour + pd.Timedelta(hours=1)
+                         and (e > hour or s.floor("h") == hour)) for hour in hours])
+
+
+def test_hourly_occupancy_matches_brute_force(tmp_path):
+    """Test the sweep against per-hour overlap counts, including zero-length permits"""
+    rng = np.random.default_rng(0)
+    starts = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 5 * 24 * 60, 60), unit="m")
+    ends = starts + pd.to_timedelta(rng.integers(0, 30 * 60, 60), unit="m")
+    zips = rng.choice(["10001", "10002"], size=60)
+
+    occupancy = Occupancy.from_intervals(zips, starts, ends, "h")
+    occupancy.save(tmp_path / "occupancy.json")
+    occupancy = Occupancy.load(tmp_path / "occupancy.json")
+    hours = pd.date_range("2022-12-31", "2023-01-08", freq="h")
+    for zip_code in ("10001", "10002"):
+        mask = zips == zip_code
+        expected = _brute_force(starts[mask], ends[mask], hours)
+        series = occupancy.series(zip_code, hours[0], hours[-1])
+        assert (series.to_numpy() == expected).all()
+
+        peaks = occupancy.peaks().set_index("group")
+        assert peaks.loc[zip_code, "peak_active"] == expected.max()
+        assert peaks.loc[zip_code, "peak_start"] == hours[expected.argmax()].strftime("%Y-%m-%dT%H:%M")
+
+
+def test_daily_cells_cover_multi_day_permits():
+    """Test a five-day permit is active on each of its days and weeks"""
+    starts = pd.to_datetime(["2023-01-02 07:00", "2023-01-03 09:00"])
+    ends = pd.to_datetime(["2023-01-06 21:00", "2023-01-03 10:00"])
+    daily = Occupancy.from_intervals(["10001", "10001"], starts, ends, "D").cells()
+    assert daily["active_permits"].tolist() == [1, 2, 1, 1, 1]
+
+    weekly = Occupancy.from_intervals(["10001"], pd.to_datetime(["2023-01-06"]), pd.to_datetime(["2023-01-10"]), "W")
+    assert weekly.series("10001").index.strftime("%G-%V").tolist() == ["2023-01", "2023-02"]
+
+
+def test_weekly_output_gains_active_permits(permits_csv):
+    """Test active_permits joins the weekly counts, adding weeks where permits only run"""
+    from process_data import add_active_permits, aggregate_permits, build_occupancy, expand_permits, load_intervals
+
+    weekly_counts = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])[0]
+    with open(permits_csv, "a") as f:
+        f.write("7,Special Event,01/28/2023 07:00:00 PM,02/14/2023 09:00:00 PM,10005\n")
+    weekly = add_active_permits(weekly_counts, build_occupancy(load_intervals(permits_csv, chunksize=2))["weekly"])
+
+    assert (weekly["active_permits"] >= weekly["permit_count"]).all()
+    assert weekly["permit_count"].sum() == weekly_counts["permit_count"].sum()
+    special = weekly[weekly["ZipCode(s)"] == "10005"]
+    assert special[["year", "week", "permit_count", "active_permits"]].values.tolist() == [
+        [2023, 4, 0, 1], [2023, 5, 0, 1], [2023, 6, 0, 1], [2023, 7, 0, 1]]
+
+
+def test_new_year_week_shares_the_count_labels():
+    """Test a week spanning New Year puts active_permits on the rows permit_count uses"""
+    from process_data import add_active_permits, aggregate_permits, build_occupancy, expand_permits
+
+    permits = pd.DataFrame({
+        "EventID": [1, 2],
+        "EventType": ["Shooting Permit"] * 2,
+        "StartDateTime": ["12/29/2020 08:00:00 AM", "01/02/2021 08:00:00 AM"],
+        "EndDateTime": ["01/02/2021 08:00:00 PM", "01/02/2021 08:00:00 PM"],
+        "ZipCode(s)": ["10001"] * 2,
+    })
+    expanded = expand_permits(permits)[0]
+    weekly = add_active_permits(aggregate_permits(expanded)[0], build_occupancy(expanded)["weekly"])
+    assert weekly[["year", "week", "permit_count", "active_permits"]].values.tolist() == [
+        [2020, 53, 1, 2], [2021, 53, 1, 2]]
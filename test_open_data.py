@@ -0,0 +1,110 @@
+import asyncio
+import json
+import urllib.error
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from open_data import STATE_FILE, OpenDataClient, aggregate_feed, sync
+from open_data_stub import OpenDataStub
+from process_data import aggregate_permits, aggregate_permits_chunked, expand_permits
+from synthetic import generate_permits
+
+PAGE_SIZE = 300
+
+
+def _day(day):
+    return datetime(2024, 1, day, tzinfo=timezone.utc)
+
+
+def _assert_same_aggregates(permits_path, expected_rows):
+    expected = aggregate_permits(expand_permits(expected_rows.copy())[0])
+    actual, _ = aggregate_permits_chunked(permits_path, 1_000)
+    for exp, act in zip(expected, actual):
+        assert exp.to_json(orient="records") == act.to_json(orient="records")
+
+
+# Fixtures
+@pytest.fixture
+def source(tmp_path):
+    """Fixture providing 1,000 synthetic permits in the manual export layout"""
+    return pd.read_csv(generate_permits(tmp_path / "source.csv", 1_000, seed=4), dtype=str)
+
+
+@pytest.fixture
+def stub(source):
+    """Fixture serving the synthetic permits from a local SODA stand-in"""
+    with OpenDataStub() as stub:
+        stub.upsert(source, "2024-01-01T00:00:00.000Z")
+        yield stub
+
+
+def test_sync_retries_then_fetches_only_changes(stub, source, tmp_path):
+    """Test a full sync survives transient errors and later syncs fetch just the changed rows"""
+    raw_dir = tmp_path / "raw"
+    client = OpenDataClient(stub.url, PAGE_SIZE, connections=3, backoff=0)
+    stub.fail(PAGE_SIZE, 503, 429)
+    assert asyncio.run(sync(raw_dir, client, now=_day(2)))["mode"] == "created"
+    _assert_same_aggregates(raw_dir / "film_permits.csv", source)
+
+    added = source.head(5).assign(EventID=lambda df: (df["EventID"].astype(int) + 10_000).astype(str))
+    stub.upsert(added, "2024-01-02T12:00:00.000Z")
+    stub.requests.clear()
+    assert asyncio.run(sync(raw_dir, client, now=_day(3)))["mode"] == "appended"
+    assert len(stub.requests) == 2  # count + one page
+    assert all("2024-01-02T00:00:00.000Z" in request["$where"] for request in stub.requests)
+    _assert_same_aggregates(raw_dir / "film_permits.csv", pd.concat([source, added]))
+
+    amended = source.head(1).assign(EventType="Rigging Permit", **{"ZipCode(s)": "10301"})
+    stub.upsert(amended, "2024-01-03T12:00:00.000Z")
+    assert asyncio.run(sync(raw_dir, client, now=_day(4)))["mode"] == "rewritten"
+    _assert_same_aggregates(raw_dir / "film_permits.csv", pd.concat([amended, source.iloc[1:], added]))
+
+
+def test_interrupted_sync_resumes_from_last_page(stub, source, tmp_path):
+    """Test a sync stopped by a hard error restarts after the last completed page"""
+    raw_dir = tmp_path / "raw"
+    client = OpenDataClient(stub.url, PAGE_SIZE, connections=1, backoff=0)
+    stub.fail(2 * PAGE_SIZE, 404)
+    with pytest.raises(urllib.error.HTTPError):
+        asyncio.run(sync(raw_dir, client, now=_day(2)))
+    with open(raw_dir / STATE_FILE) as f:
+        assert json.load(f)["pending"]["next_page"] == 2
+
+    stub.requests.clear()
+    asyncio.run(sync(raw_dir, client, now=_day(2)))
+    assert sorted(int(request["$offset"]) for request in stub.requests) == [2 * PAGE_SIZE, 3 * PAGE_SIZE]
+    _assert_same_aggregates(raw_dir / "film_permits.csv", source)
+
+
+def test_full_sync_resumes_after_removing_the_old_file(stub, source, tmp_path, monkeypatch):
+    """Test a --full sync stopped between removing the old CSV and merging still completes"""
+    import open_data
+
+    raw_dir = tmp_path / "raw"
+    client = OpenDataClient(stub.url, PAGE_SIZE, connections=2, backoff=0)
+    asyncio.run(sync(raw_dir, client, now=_day(2)))
+
+    merge = open_data._merge_delta
+
+    def interrupted(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(open_data, "_merge_delta", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(sync(raw_dir, client, full=True, now=_day(3)))
+    assert not (raw_dir / "film_permits.csv").exists()
+
+    monkeypatch.setattr(open_data, "_merge_delta", merge)
+    assert asyncio.run(sync(raw_dir, client, now=_day(3)))["mode"] == "created"
+    _assert_same_aggregates(raw_dir / "film_permits.csv", source)
+
+
+def test_feed_streams_into_chunked_ingest(stub, source):
+    """Test pages fold straight into the aggregates without a file"""
+    frames, dropped = asyncio.run(aggregate_feed(OpenDataClient(stub.url, PAGE_SIZE, connections=4)))
+    expanded, expected_dropped = expand_permits(source.copy())
+    expected = aggregate_permits(expanded)
+    assert dropped == expected_dropped
+    for exp, act in zip(expected, frames):
+        assert exp.to_json(orient="records") == act.to_json(orient="records")
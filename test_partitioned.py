@@ -0,0 +1,51 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from partitioned import LocalRunner, SerialRunner, aggregate_partitioned, partition_csv
+from process_data import aggregate_permits, expand_permits
+
+
+@pytest.mark.parametrize("partitions,runner,chunksize", [
+    (1, SerialRunner(), None),
+    (3, SerialRunner(), 1),
+    (50, SerialRunner(), None),  # more partitions than rows
+    (2, LocalRunner(workers=2), None),
+])
+def test_partitioned_matches_serial(permits_csv, partitions, runner, chunksize):
+    """Test merged partials equal the serial aggregates whatever the partitioning"""
+    expected = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])
+    actual, dropped = aggregate_partitioned(permits_csv, partitions, runner, chunksize)
+
+    assert dropped == 1
+    for exp, act in zip(expected, actual):
+        assert exp.to_json(orient="records") == act.to_json(orient="records")
+
+
+def test_partitions_cover_every_row_once(permits_csv):
+    """Test byte ranges start on line starts and tile the body of the file"""
+    parts = partition_csv(permits_csv, 4)
+    data = permits_csv.read_bytes()
+    assert parts[0].start == data.index(b"\n") + 1 and parts[-1].end == len(data)
+    assert all(a.end == b.start and data[b.start - 1:b.start] == b"\n" for a, b in zip(parts, parts[1:]))
+    assert parts[0].names[:2] == ("EventID", "EventType")
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs several cores")
+def test_speedup_is_near_linear(tmp_path):
+    """Test worker processes scale the aggregation close to linearly up to the core count"""
+    from synthetic import generate_permits
+
+    workers = min(os.cpu_count(), 4)
+    path = generate_permits(tmp_path / "film_permits.csv", 150_000 * workers, seed=2)
+
+    def timed(runner):
+        start = time.perf_counter()
+        result = aggregate_partitioned(path, workers, runner)
+        return time.perf_counter() - start, result
+
+    serial_time, (serial, _) = timed(SerialRunner())
+    parallel_time, (parallel, _) = timed(LocalRunner(workers))
+    assert all(a.equals(b) for a, b in zip(serial, parallel))
+    assert serial_time / parallel_time > 0.6 * workers
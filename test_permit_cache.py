@@ -0,0 +1,71 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import box
+from permit_cache import PermitCache
+
+
+# Fixtures
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture providing an empty cache directory"""
+    return PermitCache(tmp_path / "cache")
+
+
+def test_frame_round_trip_and_invalidation(cache, tmp_path):
+    """Test frames are served from cache until the source file changes"""
+    source = tmp_path / "film_permits.csv"
+    source.write_text("a\n1\n")
+    builds = []
+
+    def build():
+        builds.append(1)
+        df = pd.DataFrame({"ZipCode": ["10001", "10002"], "EventType": pd.Categorical(["A", "B"])})
+        df.attrs["dropped"] = 3
+        return df
+
+    first = cache.get_frame("permits", [source], build)
+    second = cache.get_frame("permits", [source], build)
+    assert len(builds) == 1, "Warm load should not rebuild"
+    pd.testing.assert_frame_equal(first, second)
+    assert second.attrs["dropped"] == 3
+
+    source.write_text("a\n2\n")
+    cache.get_frame("permits", [source], build)
+    assert len(builds) == 2, "Changed input should invalidate the cache"
+    assert len(list(cache.cache_dir.glob("permits-*.feather"))) == 1
+
+
+def test_failed_write_keeps_the_previous_entry(cache, tmp_path, monkeypatch):
+    """Test stale entries are only removed once the new one is in place"""
+    import permit_cache
+
+    source = tmp_path / "film_permits.csv"
+    source.write_text("a\n1\n")
+    cache.get_frame("permits", [source], lambda: pd.DataFrame({"a": [1]}))
+    previous = list(cache.cache_dir.glob("permits-*.feather"))
+
+    def fail(*args, **kwargs):
+        raise ValueError("disk full")
+
+    monkeypatch.setattr(permit_cache.feather, "write_feather", fail)
+    source.write_text("a\n2\n")
+    assert cache.get_frame("permits", [source], lambda: pd.DataFrame({"a": [2]}))["a"].tolist() == [2]
+    assert list(cache.cache_dir.glob("permits-*")) == previous
+
+
+def test_geoframe_round_trip(cache, tmp_path):
+    """Test boundaries survive the WKB round trip with attributes and CRS"""
+    source = tmp_path / "zip_boundaries.geojson"
+    source.write_text("{}")
+    gdf = gpd.GeoDataFrame(
+        {"postalCode": ["10001", "10002"]},
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)],
+        crs="EPSG:4326",
+    )
+
+    cache.get_geoframe("boundaries", [source], lambda: gdf)
+    cached = cache.get_geoframe("boundaries", [source], lambda: pytest.fail("should not rebuild"))
+    assert list(cached["postalCode"]) == ["10001", "10002"]
+    assert cached.crs == gdf.crs
+    assert cached.geometry.geom_equals(gdf.geometry).all()
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from permit_cube import PermitCube
+
+
+# Fixtures
+@pytest.fixture
+def weekly_counts():
+    """Fixture providing a small weekly_permits frame spanning a year boundary"""
+    return pd.DataFrame({
+        "year": [2022, 2022, 2023, 2023, 2023, 2023],
+        "week": [52, 52, 1, 1, 2, 2],
+        "ZipCode(s)": ["10001", "10002", "10001", "10001", "10002", "10003"],
+        "EventType": ["Shooting Permit", "Rigging Permit", "Shooting Permit", "Rigging Permit",
+                      "Shooting Permit", "Shooting Permit"],
+        "permit_count": [3, 1, 2, 5, 4, 7],
+    })
+
+
+def _scan(weekly_counts, weeks, types):
+    """Reference answer by filtering the rows, as the map used to"""
+    keys = list(zip(weekly_counts["year"], weekly_counts["week"]))
+    mask = pd.Series([key in weeks for key in keys]) & weekly_counts["EventType"].isin(types)
+    return weekly_counts[mask].groupby("ZipCode(s)")["permit_count"].sum()
+
+
+@pytest.mark.parametrize("start,end", [(0, 0), (0, 2), (1, 2), (2, 2)])
+@pytest.mark.parametrize("types", [["Shooting Permit"], ["Shooting Permit", "Rigging Permit"]])
+def test_query_matches_row_scan(weekly_counts, start, end, types):
+    """Test prefix-sum range queries against a row scan"""
+    cube = PermitCube.from_weekly_counts(weekly_counts)
+    assert cube.weeks == [(2022, 52), (2023, 1), (2023, 2)]
+
+    result = cube.query(start, end, types)
+    expected = _scan(weekly_counts, cube.weeks[start:end + 1], types)
+    assert result[result > 0].to_dict() == expected[expected > 0].to_dict()
+
+
+def test_new_year_days_sort_by_their_monday():
+    """Test Jan 1-3 labelled week 53 of a year without one sort before that year's week 1"""
+    weekly_counts = pd.DataFrame({
+        "year": [2020, 2020, 2021, 2021, 2021],
+        "week": [52, 53, 53, 1, 52],  # 2021-01-01 is (2021, 53): ISO week 53 of 2020
+        "ZipCode(s)": ["10001"] * 5,
+        "EventType": ["Shooting Permit"] * 5,
+        "permit_count": [1, 2, 4, 8, 16],
+    })
+    cube = PermitCube.from_weekly_counts(weekly_counts)
+    assert cube.weeks == [(2020, 52), (2020, 53), (2021, 53), (2021, 1), (2021, 52)]
+    assert cube.query(1, 3)["10001"] == 14
+
+
+def test_save_load_round_trip(weekly_counts, tmp_path):
+    """Test the exported manifest and buffer reload to the same cube"""
+    cube = PermitCube.from_weekly_counts(weekly_counts)
+    cube.save(tmp_path)
+    loaded = PermitCube.load(tmp_path)
+
+    assert loaded.zips == cube.zips and loaded.weeks == cube.weeks and loaded.types == cube.types
+    assert (loaded.cumulative == cube.cumulative).all()
+    assert loaded.query().to_dict() == {"10001": 10, "10002": 5, "10003": 7}
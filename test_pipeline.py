@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+from pipeline import Pipeline, Stage
+
+
+def test_runs_in_dependency_order_and_parallel():
+    """Test inputs are passed in order and independent stages overlap"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def left():
+        barrier.wait()  # only returns if "right" is running at the same time
+        return 2
+
+    def right():
+        barrier.wait()
+        return 3
+
+    pipeline = Pipeline([
+        Stage("total", lambda a, b: a * 10 + b, inputs=["left", "right"]),
+        Stage("left", left),
+        Stage("right", right),
+    ], workers=2)
+    assert pipeline.order[-1] == "total"
+    assert pipeline.run()["total"] == 23
+
+
+def test_rejects_cycles_and_unknown_inputs():
+    """Test invalid stage graphs are reported"""
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([Stage("a", lambda b: b, inputs=["b"]), Stage("b", lambda a: a, inputs=["a"])])
+    with pytest.raises(ValueError, match="unknown"):
+        Pipeline([Stage("a", lambda b: b, inputs=["missing"])])
+
+
+def test_stage_failure_propagates():
+    """Test an exception in a stage stops the run"""
+    def fail():
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        Pipeline([Stage("fail", fail), Stage("after", lambda x: x, inputs=["fail"])]).run()
+
+
+def test_reruns_only_affected_stages(tmp_path):
+    """Test cached stages are skipped until their params, sources or inputs change"""
+    source = tmp_path / "source.txt"
+    source.write_text("1")
+    calls = []
+
+    def stages(fmt):
+        def read():
+            calls.append("read")
+            return int(source.read_text())
+
+        def double(value):
+            calls.append("double")
+            return value * 2
+
+        def write(value):
+            calls.append("write")
+            (tmp_path / "out.txt").write_text(fmt.format(value))
+
+        return [
+            Stage("read", read, sources=[source]),
+            Stage("double", double, inputs=["read"]),
+            Stage("write", write, inputs=["double"], outputs=[tmp_path / "out.txt"], params=fmt),
+        ]
+
+    cache_dir = tmp_path / "cache"
+    Pipeline(stages("{}"), cache_dir).run()
+    assert calls == ["read", "double", "write"]
+
+    calls.clear()
+    pipeline = Pipeline(stages("{}"), cache_dir)
+    assert pipeline.run() == {}
+    assert calls == []
+    assert {entry["status"] for entry in pipeline.report.values()} == {"cached"}
+
+    # A new output format re-runs the write alone, from the stored input
+    calls.clear()
+    pipeline = Pipeline(stages("value={}"), cache_dir)
+    pipeline.run()
+    assert calls == ["write"]
+    assert pipeline.report["double"]["status"] == "loaded"
+    assert (tmp_path / "out.txt").read_text() == "value=2"
+
+    # A deleted output file or a changed source re-runs what depends on it
+    calls.clear()
+    (tmp_path / "out.txt").unlink()
+    Pipeline(stages("value={}"), cache_dir).run()
+    assert calls == ["write"]
+
+    calls.clear()
+    source.write_text("5")
+    Pipeline(stages("value={}"), cache_dir).run()
+    assert calls == ["read", "double", "write"]
+    assert (tmp_path / "out.txt").read_text() == "value=10"
+
+
+def test_helper_code_change_invalidates_stage(tmp_path, monkeypatch):
+    """Test editing a project module a stage calls into re-runs the stage"""
+    import importlib
+    import sys
+
+    helper = tmp_path / "stage_helper.py"
+    helper.write_text("def scale(value):\n    return value * 2\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import stage_helper
+
+    def compute():
+        return stage_helper.scale(21)
+
+    cache_dir = tmp_path / "cache"
+    assert Pipeline([Stage("compute", compute)], cache_dir).run() == {"compute": 42}
+    assert Pipeline([Stage("compute", compute)], cache_dir).run() == {}
+
+    helper.write_text("def scale(value):\n    return value * 3\n")
+    importlib.reload(stage_helper)
+    try:
+        assert Pipeline([Stage("compute", compute)], cache_dir).run() == {"compute": 63}
+    finally:
+        sys.modules.pop("stage_helper", None)
+
+
+def test_module_imported_in_stage_invalidates_stage(tmp_path, monkeypatch):
+    """Test editing a module a stage imports locally re-runs it, even before that module is loaded"""
+    import sys
+
+    helper = tmp_path / "stage_local_helper.py"
+    helper.write_text("FACTOR = 2\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+
+    def compute():
+        import stage_local_helper
+        return stage_local_helper.FACTOR * 21
+
+    cache_dir = tmp_path / "cache"
+    try:
+        assert Pipeline([Stage("compute", compute)], cache_dir).run() == {"compute": 42}
+        sys.modules.pop("stage_local_helper")
+        assert Pipeline([Stage("compute", compute)], cache_dir).run() == {}
+
+        helper.write_text("FACTOR = 3\n")
+        assert Pipeline([Stage("compute", compute)], cache_dir).run() == {"compute": 63}
+    finally:
+        sys.modules.pop("stage_local_helper", None)
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+from preview import ERROR_FILE, PREVIEW_DIR, estimate_aggregates, preview_error, stratified_sample
+from process_data import aggregate_permits, expand_permits, process_data
+from synthetic import generate_permits
+
+
+def test_small_strata_are_taken_whole(permits_csv):
+    """Test strata no larger than the sample size give the exact aggregates with zero-width CIs"""
+    sample, strata = stratified_sample(permits_csv, rows_per_stratum=10)
+    assert (strata["k"] == strata["N"]).all()
+    frames, dropped = estimate_aggregates(sample, strata)
+    expanded, expected_dropped = expand_permits(pd.read_csv(permits_csv))
+    assert dropped == expected_dropped
+    for exact, preview in zip(aggregate_permits(expanded), frames):
+        name = exact.columns[-1]
+        merged = exact.merge(preview, on=list(exact.columns[:-1]), suffixes=("_exact", ""))
+        assert len(merged) == len(exact) == len(preview)
+        assert np.allclose(merged[name], merged[f"{name}_exact"])
+        assert np.allclose(merged["ci_low"], merged["ci_high"])
+
+
+def test_cells_with_zero_exact_count_are_left_out_of_the_error(permits_csv):
+    """Test cells whose exact count is zero (active-only weeks) do not enter the error report"""
+    sample, strata = stratified_sample(permits_csv, rows_per_stratum=10)
+    frames, _ = estimate_aggregates(sample, strata)
+    exact = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])
+    active_only = exact[0].head(1).assign(year=1999, permit_count=0)
+    report = preview_error(frames, (pd.concat([exact[0], active_only]),) + exact[1:])
+    assert report == preview_error(frames, exact)
+    assert report["weekly_permits"]["cells"] == len(exact[0])
+
+
+def test_sample_is_reproducible_and_covers_exact(tmp_path):
+    """Test the sample depends only on the seed and the CIs cover the exact per ZIP/type counts"""
+    path = generate_permits(tmp_path / "permits.csv", 20_000, seed=2)
+    sample, strata = stratified_sample(path, rows_per_stratum=20, seed=1, chunksize=20_000)
+    rechunked, _ = stratified_sample(path, rows_per_stratum=20, seed=1, chunksize=3_001)
+    assert sorted(sample.to_csv(index=False).splitlines()) == sorted(rechunked.to_csv(index=False).splitlines())
+    other, _ = stratified_sample(path, rows_per_stratum=20, seed=2, chunksize=20_000)
+    assert not sample.equals(other)
+
+    assert strata["N"].sum() == 20_000 and len(sample) == strata["k"].sum() < 20_000
+    _, _, by_type = estimate_aggregates(sample, strata)[0]
+    _, _, exact = aggregate_permits(expand_permits(pd.read_csv(path))[0])
+    merged = exact.merge(by_type, on=["ZipCode(s)", "EventType"], how="left", suffixes=("", "_estimate"))
+    covered = (merged["ci_low"] <= merged["type_count"]) & (merged["type_count"] <= merged["ci_high"])
+    assert covered.mean() > 0.85
+    assert abs(by_type["type_count"].sum() / exact["type_count"].sum() - 1) < 0.1  # about 4 standard errors
+
+
+def test_process_data_sample_writes_preview(project_root):
+    """Test --sample writes only the preview outputs, with their error against the last full run"""
+    process_data(project_root=project_root)
+    processed = project_root / "data_processing" / "data" / "processed"
+    before = {path: path.stat().st_mtime_ns for path in processed.iterdir() if path.is_file()}
+
+    process_data(project_root=project_root, sample=10)
+    assert {path: path.stat().st_mtime_ns for path in processed.iterdir() if path.is_file()} == before
+    with open(processed / PREVIEW_DIR / ERROR_FILE) as f:
+        summary = json.load(f)
+    assert summary["sampled"] == summary["permits"]
+    for error in summary["error"].values():
+        assert error["total_relative_error"] == 0 and error["ci_coverage"] == 1
+    weekly = pd.read_json(processed / PREVIEW_DIR / "weekly_permits.json")
+    assert list(weekly.columns) == ["year", "week", "ZipCode(s)", "EventType", "permit_count", "ci_low", "ci_high"]
@@ -0,0 +1,109 @@
+import pandas as pd
+import pytest
+from process_data import aggregate_permits, aggregate_permits_chunked, expand_permits
+
+
+def test_expand_permits(permits_csv):
+    """Test date filtering and multi-ZIP expansion"""
+    expanded, dropped = expand_permits(pd.read_csv(permits_csv))
+    assert dropped == 1, "Expected one record with an invalid date"
+    assert sorted(expanded["ZipCode(s)"]) == sorted(
+        ["10001", "10002", "10001", "10002", "10003", "10004", "10001"]
+    )
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 4, 100])
+def test_chunked_matches_in_memory(permits_csv, chunksize):
+    """Test the streaming ingest produces the same aggregates as a full load"""
+    expected = aggregate_permits(expand_permits(pd.read_csv(permits_csv))[0])
+    actual, dropped = aggregate_permits_chunked(permits_csv, chunksize)
+
+    assert dropped == 1
+    for exp, act in zip(expected, actual):
+        assert exp.to_json(orient="records") == act.to_json(orient="records")
+
+
+# Incremental Processing Tests
+def test_incremental_matches_full_rebuild(permits_csv, tmp_path):
+    """Test appended rows are merged as a delta and match a full rebuild"""
+    from incremental import update_incremental, verify_incremental
+
+    state_path = tmp_path / "state.json"
+    _, stats = update_incremental(permits_csv, state_path, chunksize=2)
+    assert stats["mode"] == "full"
+
+    # Nothing new: no rows read
+    _, stats = update_incremental(permits_csv, state_path, chunksize=2)
+    assert (stats["mode"], stats["rows"]) == ("incremental", 0)
+
+    with open(permits_csv, "a") as f:
+        f.write('7,Shooting Permit,03/01/2023 07:00:00 AM,03/01/2023 09:00:00 PM,"10001, 10005"\n')
+        f.write("8,Rigging Permit,bad,03/01/2023 09:00:00 PM,10002\n")
+    frames, stats = update_incremental(permits_csv, state_path, chunksize=2)
+    assert (stats["mode"], stats["rows"], stats["dropped"]) == ("incremental", 2, 2)
+    assert verify_incremental(permits_csv, frames) == []
+
+
+def test_incremental_falls_back_on_amended_or_rewritten(permits_csv, tmp_path):
+    """Test amended permits and rewritten history trigger a full rebuild"""
+    from incremental import update_incremental, verify_incremental
+
+    state_path = tmp_path / "state.json"
+    update_incremental(permits_csv, state_path)
+
+    with open(permits_csv, "a") as f:
+        f.write("2,Rigging Permit,01/03/2023 07:00:00 AM,01/03/2023 09:00:00 PM,10003\n")
+    frames, stats = update_incremental(permits_csv, state_path)
+    assert stats["mode"] == "full"
+    assert verify_incremental(permits_csv, frames) == []
+
+    permits_csv.write_text(permits_csv.read_text().replace("10004", "10006"))
+    frames, stats = update_incremental(permits_csv, state_path)
+    assert stats["mode"] == "full"
+    assert verify_incremental(permits_csv, frames) == []
+
+
+# ZIP Explode Tests
+def test_explode_zips_csr_layout():
+    """Test split/strip/validate and the CSR offsets and weights"""
+    from zip_explode import explode_zips
+
+    zips = pd.Series(["10001, 10002", None, "1000, 10003,10004", "", 10005])
+    result = explode_zips(zips, sep=",", zip_length=5)
+
+    assert list(result.zip) == ["10001", "10002", "10003", "10004", "10005"]
+    assert list(result.row) == [0, 0, 2, 2, 4]
+    assert list(result.offsets) == [0, 2, 2, 4, 4, 5]
+    assert list(result.weight) == [0.5, 0.5, 0.5, 0.5, 1.0]
+
+
+def test_explode_zips_keeps_nonempty_tokens():
+    """Test the non-validating mode used for weighted monthly counts"""
+    from zip_explode import explode_zips
+
+    result = explode_zips(pd.Series(["10001 , 1000", " ", "10002,10003"]), sep=", ", zip_length=None)
+    assert list(result.zip) == ["10001", "1000", "10002,10003"]
+    assert list(result.num_zips) == [2, 2, 1]
+
+
+# Pipeline Tests
+def test_process_data_reuses_cached_stages(project_root, capsys):
+    """Test a cached re-run only re-executes stages downstream of a changed file"""
+    from process_data import process_data
+
+    processed_dir = project_root / "data_processing" / "data" / "processed"
+    process_data(project_root=project_root)
+    expected = {path.name: path.read_bytes() for path in processed_dir.iterdir()}
+
+    process_data(project_root=project_root, use_cache=True, workers=2)
+    process_data(project_root=project_root, use_cache=True, workers=2)
+    assert "Reused cached stages: aggregates, boundaries, merge" in capsys.readouterr().out
+    assert {path.name: path.read_bytes() for path in processed_dir.iterdir()} == expected
+
+    config_path = project_root / "visualization" / "assets" / "js" / "config.js"
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text("minZoom: 12, maxZoom: 18")
+    process_data(project_root=project_root, use_cache=True)
+    out = capsys.readouterr().out
+    assert "z12-13" in out and "Loading ZIP boundaries" not in out
+    assert (processed_dir / "weekly_permits.json").read_bytes() == expected["weekly_permits.json"]
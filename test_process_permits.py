@@ -1,3 +1,4 @@
+import pandas as pd
 import pytest
 from process_permits import MapHandler, validate_permit_data
 
@@ -92,5 +93,57 @@ def test_edge_cases():
     assert isinstance(empty_result, dict), "Empty input should return empty dict"
     assert len(empty_result) == 0, "Empty input should return empty dict"
 
+def test_map_handler_count_only(sample_permit_data):
+    """Test array-backed count aggregation over a streamed input"""
+    handler = MapHandler()
+    permits = sample_permit_data + [{"zipcode": "10001", "date": "2023-01-03", "type": "Film Shoot"}]
+
+    # A generator is consumed once, without materializing the input
+    result = handler.aggregatePermitCounts((p for p in permits), keep_indices=True)
+
+    assert len(result) == 2, "Expected exactly 2 ZIP codes"
+    assert result.count("10001") == 2, "Incorrect count for ZIP 10001"
+    assert result.count("99999") == 0, "Unseen ZIP should count 0"
+    assert list(result.indices("10001")) == [0, 2], "Incorrect row indices for ZIP 10001"
+    assert result.to_dict() == {"10001": {"count": 2}, "10002": {"count": 1}}
+
+def test_map_handler_count_only_without_indices(sample_permit_data):
+    """Test indices are not stored unless requested"""
+    result = MapHandler().aggregatePermitCounts(sample_permit_data)
+    assert dict(result.items()) == {"10001": 1, "10002": 1}
+    with pytest.raises(ValueError):
+        result.indices("10001")
+
+# Batch Validation Tests
+def test_validate_permit_batch_report():
+    """Test every rule is checked across the whole batch"""
+    from process_permits import validate_permit_batch
+    raw = {
+        "ZipCode(s)": ["10001, 10002", "1000", None, "10003"],
+        "StartDateTime": ["01/02/2023 07:00:00 AM", "bad", "01/02/2023 07:00:00 AM", "01/05/2023 07:00:00 AM"],
+        "EndDateTime": ["01/02/2023 09:00:00 PM", "01/02/2023 09:00:00 PM", "01/01/2023 07:00:00 AM", "01/06/2023 07:00:00 AM"],
+        "EventType": ["Shooting Permit", "Street Fair", "Rigging Permit", "Rigging Permit"],
+    }
+    report = validate_permit_batch(raw, date_format="%m/%d/%Y %I:%M:%S %p")
+    rules = report["rules"]
+
+    assert report["rows"] == 4 and report["valid"] is False
+    assert rules["required:ZipCode(s)"] == {"failed": 1, "sample_rows": [2]}
+    assert rules["zipcode_format"] == {"failed": 1, "sample_rows": [1]}
+    assert rules["date_format:StartDateTime"] == {"failed": 1, "sample_rows": [1]}
+    assert rules["end_before_start"] == {"failed": 1, "sample_rows": [2]}
+    assert rules["unknown_event_type"] == {"failed": 1, "sample_rows": [1]}
+
+def test_validate_permit_batch_custom_columns(sample_permit_data):
+    """Test the batch validator on the simple permit schema"""
+    from process_permits import validate_permit_batch
+    report = validate_permit_batch(
+        pd.DataFrame(sample_permit_data),
+        columns={"zipcode": "zipcode", "start": "date", "type": "type"},
+        event_types=None,
+    )
+    assert report["valid"] is True
+    assert validate_permit_batch(pd.DataFrame(sample_permit_data), event_types=None)["valid"] is False
+
 if __name__ == "__main__":
     pytest.main(["-v"])
\ No newline at end of file
@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+from profiling import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    """Test stages are no-ops until the profiler is enabled"""
+    profiler = Profiler()
+    with profiler.stage("load", rows_in=10) as timer:
+        timer.rows_out = 5
+    assert profiler.records == []
+    assert profiler.timed("double")(lambda x: x * 2)(3) == 6
+    assert profiler.records == []
+
+
+def test_stage_records(tmp_path):
+    """Test time, memory and row counts per stage, nesting and cProfile dumps"""
+    profiler = Profiler()
+    profiler.enable(cprofile_dir=tmp_path / "prof", trace_memory=True)
+
+    @profiler.timed("filter")
+    def keep_even(df):
+        return df[df["n"] % 2 == 0]
+
+    with profiler.stage("outer") as timer:
+        with profiler.stage("build") as inner:
+            df = pd.DataFrame({"n": range(1000)})
+            inner.rows_out = len(df)
+        timer.rows_out = len(keep_even(df))
+    profiler.disable()
+
+    records = {record["name"]: record for record in profiler.records}
+    assert records["build"]["rows_out"] == 1000
+    assert (records["filter"]["rows_in"], records["filter"]["rows_out"]) == (1000, 500)
+    assert records["outer"]["wall_seconds"] >= records["build"]["wall_seconds"]
+    assert records["build"]["traced_peak_bytes"] > 0
+    assert "cprofile" in records["outer"] and "cprofile" not in records["build"]
+    assert (tmp_path / "prof" / "outer.prof").exists()
+
+    report = json.loads(profiler.write_report(tmp_path / "report.json").read_text())
+    assert [stage["name"] for stage in report["stages"]][0] == "outer"
+
+
+def test_process_data_profile_report(project_root):
+    """Test --profile writes a report covering the pipeline stages"""
+    from process_data import process_data
+
+    report_path = project_root / "profile.json"
+    process_data(project_root=project_root, profile=report_path)
+    stages = {stage["name"]: stage for stage in json.loads(report_path.read_text())["stages"]}
+    assert stages["read_csv"]["rows_out"] == 6
+    assert stages["expand_permits"]["rows_out"] == 7
+    assert stages["zip_permits.geojson"]["rows_in"] == 4
+    assert all(stage["wall_seconds"] >= 0 for stage in stages.values())
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+from permit_cube import PermitCube
+from query_service import LRUCache, PermitQueryIndex, QueryError, QueryService
+
+
+# Fixtures
+@pytest.fixture
+def weekly_counts():
+    """Fixture providing a small weekly_permits frame over three weeks"""
+    return pd.DataFrame({
+        "year": [2022, 2022, 2023, 2023, 2023, 2023],
+        "week": [52, 52, 1, 1, 2, 2],
+        "ZipCode(s)": ["10001", "10002", "10001", "10001", "10002", "10003"],
+        "EventType": ["Shooting Permit", "Rigging Permit", "Shooting Permit", "Rigging Permit",
+                      "Shooting Permit", "Shooting Permit"],
+        "permit_count": [3, 1, 2, 5, 4, 7],
+    })
+
+
+@pytest.fixture
+def index(weekly_counts, tmp_path):
+    """Fixture providing a query index over the saved cube"""
+    PermitCube.from_weekly_counts(weekly_counts).save(tmp_path)
+    return PermitQueryIndex(tmp_path, cache_size=2)
+
+
+def _as_series(rows):
+    return pd.Series({row["ZipCode(s)"]: row["permit_count"] for row in rows}, dtype="int64")
+
+
+@pytest.mark.parametrize("params,start,end,types", [
+    ({}, 0, 2, None),
+    ({"weeks": "1"}, 1, 1, None),
+    ({"weeks": "1..2", "types": "Shooting Permit"}, 1, 2, ["Shooting Permit"]),
+    ({"weeks": "2022-52..2023-01"}, 0, 1, None),
+    ({"weeks": "..1", "types": "Rigging Permit,Shooting Permit,Bogus"}, 0, 1, ["Rigging Permit", "Shooting Permit"]),
+])
+def test_counts_match_cube(index, params, start, end, types):
+    """Test /counts answers against PermitCube.query"""
+    etag, body = index.query(params)
+    expected = index.cube.query(start, end, types)
+    pd.testing.assert_series_equal(_as_series(json.loads(body)), expected[expected > 0],
+                                   check_names=False, check_index_type=False)
+
+
+def test_query_filters_and_errors(index):
+    """Test ZIP filtering, normalization and bad parameters"""
+    _, body = index.query({"zips": "10003,10001,99999"})
+    assert json.loads(body) == [{"ZipCode(s)": "10001", "permit_count": 10},
+                                {"ZipCode(s)": "10003", "permit_count": 7}]
+    assert index.normalize({"types": "Rigging Permit,Shooting Permit"}) == \
+        index.normalize({"types": " Shooting Permit,Rigging Permit"})
+    for weeks in ["2..1", "7", "2023-40", "x..1"]:
+        with pytest.raises(QueryError):
+            index.query({"weeks": weeks})
+
+
+def test_lru_cache_eviction():
+    """Test the least recently used entry is evicted"""
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_reload_on_change(index, weekly_counts):
+    """Test a rewritten cube changes the version and drops cached results"""
+    etag, _ = index.query({})
+    weekly_counts.loc[0, "permit_count"] = 30
+    PermitCube.from_weekly_counts(weekly_counts).save(index.processed_dir)
+    assert index.reload_if_changed()
+    assert len(index.cache) == 0
+    new_etag, body = index.query({"zips": "10001"})
+    assert json.loads(body)[0]["permit_count"] == 37
+    assert index.query({})[0] != etag
+
+
+def test_http_keep_alive_etag_and_errors(index):
+    """Test the HTTP service end to end on one keep-alive connection"""
+    async def exchange(reader, writer, target, extra=""):
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{extra}\r\n".encode())
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers["content-length"]))
+        return status, headers, body
+
+    async def scenario():
+        service = QueryService(index)
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            status, headers, body = await exchange(reader, writer, "/counts?weeks=1&types=Rigging+Permit")
+            assert status == 200
+            assert json.loads(body) == [{"ZipCode(s)": "10001", "permit_count": 5}]
+            length = headers["content-length"]
+
+            etag = headers["etag"]
+            status, _, body = await exchange(reader, writer, "/counts?types=Rigging+Permit&weeks=1",
+                                             f"If-None-Match: {etag}\r\n")
+            assert (status, body) == (304, b"")
+
+            status, _, body = await exchange(reader, writer, "/meta")
+            assert json.loads(body)["weeks"][0] == {"year": 2022, "week": 52}
+            assert (await exchange(reader, writer, "/counts?weeks=9"))[0] == 400
+            assert (await exchange(reader, writer, "/nope"))[0] == 404
+
+            status, _, body = await exchange(reader, writer, "/health")
+            # The 304 was answered from the ETag alone, without a cache lookup
+            assert json.loads(body)["cache"] == {"size": 1, "hits": 0, "misses": 1}
+
+            # HEAD describes the GET body without sending it
+            head = service.handle("HEAD", "/counts?weeks=1&types=Rigging+Permit", {})
+            assert head.endswith(b"\r\n\r\n") and f"Content-Length: {length}\r\n".encode() in head
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_oversized_requests_get_an_error_and_304_skips_the_query(index):
+    """Test over-long request lines and header blocks are answered, and a matching ETag skips the counts"""
+    async def status_of(request):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        writer.close()
+        return status
+
+    async def scenario():
+        nonlocal port
+        server = await QueryService(index).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            assert await status_of(f"GET /counts?zips={'1' * 70_000} HTTP/1.1\r\n\r\n".encode()) == 400
+            assert await status_of(b"GET /meta HTTP/1.1\r\n" + b"X-Pad: 1\r\n" * 200 + b"\r\n") == 431
+            assert await status_of(b"GET /meta HTTP/1.1\r\nX-Pad: " + b"1" * 70_000 + b"\r\n\r\n") == 431
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    port = None
+    asyncio.run(scenario())
+
+    params = {"weeks": "0..1", "types": "Shooting Permit"}
+    etag = index.etag(index.normalize(params))
+    response = QueryService(index).handle("GET", "/counts?weeks=0..1&types=Shooting+Permit", {"if-none-match": etag})
+    assert response.startswith(b"HTTP/1.1 304") and index.cache.misses == 0
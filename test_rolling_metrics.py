@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rolling_metrics import YOY_LAG, RollingMetrics
+
+
+# Fixtures
+@pytest.fixture
+def weekly_counts():
+    """Fixture providing three years of weekly counts with gaps, for two ZIPs and two types"""
+    rng = np.random.default_rng(0)
+    rows = [(year, week, zip_code, event_type, int(rng.integers(1, 9)))
+            for year in (2019, 2020, 2021) for week in range(1, 53)
+            for zip_code in ("10001", "10002") for event_type in ("Rigging Permit", "Shooting Permit")
+            if rng.random() < 0.7]
+    return pd.DataFrame(rows, columns=["year", "week", "ZipCode(s)", "EventType", "permit_count"])
+
+
+def test_metrics_match_pandas_rolling(weekly_counts):
+    """Test cumsum-differenced windows and YoY deltas against groupby rolling/shift"""
+    frame = RollingMetrics.from_weekly_counts(weekly_counts).to_frame()
+    # 2020 has an ISO week 53 with no permits; it is still on the calendar
+    assert len(frame) == 2 * (52 + 53 + 52)
+    assert frame["count"].sum() == weekly_counts["permit_count"].sum()
+
+    by_zip = frame.groupby("ZipCode(s)")
+    for window in (4, 13):
+        expected = by_zip["count"].transform(lambda x: x.rolling(window, min_periods=1).sum())
+        assert (frame[f"rolling_{window}"] == expected).all()
+        yoy = by_zip[f"rolling_{window}"].transform(lambda x: x - x.shift(YOY_LAG))
+        pd.testing.assert_series_equal(frame[f"yoy_{window}"], yoy.astype(float), check_names=False)
+
+
+def test_update_recomputes_from_first_changed_week(weekly_counts, tmp_path):
+    """Test appending weeks updates incrementally and matches a full build"""
+    earlier = weekly_counts[weekly_counts["year"] < 2021]
+    metrics = RollingMetrics.from_weekly_counts(earlier, by_type=True)
+    metrics.save(tmp_path)
+
+    updated = RollingMetrics.load(tmp_path).update(weekly_counts)
+    full = RollingMetrics.from_weekly_counts(weekly_counts, by_type=True)
+    assert updated.last_update_start == len(metrics.weeks)
+    assert updated.weeks == full.weeks and updated.types == ["Rigging Permit", "Shooting Permit"]
+    assert (updated.data == full.data).all()
+
+    # A new ZIP changes the axes: full rebuild
+    extra = pd.DataFrame([(2021, 10, "10003", "Shooting Permit", 1)], columns=weekly_counts.columns)
+    grown = pd.concat([weekly_counts, extra], ignore_index=True)
+    assert (updated.update(grown).data == RollingMetrics.from_weekly_counts(grown, by_type=True).data).all()
@@ -0,0 +1,94 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+from spatial_index import ZipSpatialIndex, hex_grid
+
+
+# Fixtures
+@pytest.fixture
+def zips():
+    """Fixture providing three ZIP tiles in a row (projected, 1000 ft squares)"""
+    return gpd.GeoDataFrame(
+        {"postalCode": ["10001", "10002", "10003"]},
+        geometry=[shapely.box(x, 0, x + 1000, 1000) for x in (0, 1000, 2000)],
+        crs="EPSG:2263",
+    )
+
+
+@pytest.fixture
+def regions():
+    """Fixture providing two regions splitting the middle ZIP in half"""
+    return gpd.GeoDataFrame(
+        {"borough": ["West", "East"]},
+        geometry=[shapely.box(0, 0, 1500, 1000), shapely.box(1500, 0, 3000, 1000)],
+        crs="EPSG:2263",
+    )
+
+
+def test_border_points_take_the_first_zip():
+    """Test a border point gets the lower ZIP index even where the tree returns another first"""
+    grid = gpd.GeoDataFrame(
+        {"postalCode": [str(10000 + i) for i in range(50)]},
+        geometry=[shapely.box(x * 100, y * 100, x * 100 + 100, y * 100 + 100) for y in range(5) for x in range(10)],
+        crs="EPSG:2263",
+    )
+    index = ZipSpatialIndex(grid)
+    # Every vertical border between two boxes of the grid, and every horizontal one
+    lon = [x * 100 for y in range(5) for x in range(1, 10)] + [x * 100 + 50 for y in range(1, 5) for x in range(10)]
+    lat = [y * 100 + 50 for y in range(5) for x in range(1, 10)] + [y * 100 for y in range(1, 5) for x in range(10)]
+    expected = [str(10000 + y * 10 + x - 1) for y in range(5) for x in range(1, 10)] + \
+        [str(10000 + (y - 1) * 10 + x) for y in range(1, 5) for x in range(10)]
+    assert index.assign_points(lon, lat, crs="EPSG:2263").tolist() == expected
+
+
+def test_area_weights(zips, regions):
+    """Test each ZIP's overlap fractions"""
+    weights = ZipSpatialIndex(zips).area_weights(regions, "borough").to_frame()
+    by_pair = weights.set_index(["zip", "region"])["weight"]
+    assert by_pair[("10001", "West")] == pytest.approx(1.0)
+    assert by_pair[("10002", "West")] == pytest.approx(0.5)
+    assert by_pair[("10002", "East")] == pytest.approx(0.5)
+    assert by_pair[("10003", "East")] == pytest.approx(1.0)
+    assert len(weights) == 4, "Edge-touching pairs should carry no weight"
+
+
+def test_rollup_series_and_frame(zips, regions):
+    """Test re-projecting per-ZIP counts and per-week columns"""
+    weights = ZipSpatialIndex(zips).area_weights(regions, "borough")
+    counts = pd.Series({"10001": 4, "10002": 10, "10003": 1, "99999": 7})
+    rolled = weights.rollup(counts)
+    assert rolled["West"] == pytest.approx(9)
+    assert rolled["East"] == pytest.approx(6)
+
+    weekly = pd.DataFrame({"w1": [2, 2], "w2": [0, 6]}, index=["10002", "10003"])
+    rolled = weights.rollup(weekly)
+    assert rolled.loc["West"].tolist() == pytest.approx([1, 0])
+    assert rolled.loc["East"].tolist() == pytest.approx([3, 6])
+
+
+def test_weights_cached(zips, regions, tmp_path):
+    """Test weights are computed once and persisted per region set"""
+    index = ZipSpatialIndex(zips, cache_dir=tmp_path)
+    first = index.area_weights(regions, "borough")
+    assert index.area_weights(regions, "borough") is first
+    assert len(list(tmp_path.glob("area_weights-*.npz"))) == 1
+
+    reloaded = ZipSpatialIndex(zips, cache_dir=tmp_path).area_weights(regions, "borough")
+    pd.testing.assert_frame_equal(reloaded.to_frame(), first.to_frame())
+
+
+def test_hex_grid_rollup_conserves_totals(zips):
+    """Test a hex grid covering the ZIPs keeps every permit"""
+    grid = hex_grid(zips.total_bounds, 60)
+    covered = shapely.intersection(grid.geometry.to_numpy(), shapely.box(*zips.total_bounds))
+    assert shapely.area(covered).sum() == pytest.approx(3_000_000)
+    counts = pd.Series({"10001": 5, "10002": 11, "10003": 3})
+    rolled = ZipSpatialIndex(zips).area_weights(grid, "hex_id").rollup(counts)
+    assert rolled.sum() == pytest.approx(19)
+
+
+def test_assign_points(zips):
+    """Test point-in-ZIP assignment, including points outside every ZIP and on a shared border"""
+    zip_codes = ZipSpatialIndex(zips).assign_points([500, 2500, 5000, 1000], [500, 10, 500, 500], crs="EPSG:2263")
+    assert zip_codes.tolist() == ["10001", "10003", None, "10001"]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from street_index import StreetIndex, normalize_street, parse_segment, update_index
+from synthetic import generate_permits
+
+
+@pytest.fixture
+def permits_path(tmp_path):
+    """Fixture writing 3,000 synthetic permits with ParkingHeld segments"""
+    return generate_permits(tmp_path / "film_permits.csv", 3_000, seed=5)
+
+
+def _scan(permits, pattern, since=None, until=None):
+    """Reference str.contains scan over the raw CSV."""
+    hit = permits["ParkingHeld"].str.contains(pattern, regex=True)
+    start = pd.to_datetime(permits["StartDateTime"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    end = pd.to_datetime(permits["EndDateTime"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    if until is not None:
+        hit &= start <= pd.Timestamp(until)
+    if since is not None:
+        hit &= end >= pd.Timestamp(since)
+    return sorted(permits.index[hit])
+
+
+def test_segment_spellings_share_a_key():
+    """Test street spellings and cross street order normalize to the same block"""
+    assert normalize_street("West 44th Street") == normalize_street("W 44 ST") == "W 44 ST"
+    assert normalize_street("Seventh Avenue") == normalize_street("7 AVE") == "7 AVE"
+    assert parse_segment("BROADWAY between WEST 45 STREET and W 44 ST") == \
+        parse_segment("Broadway  between W 44 ST and W 45 ST") == ("BROADWAY", "W 44 ST", "W 45 ST")
+    assert parse_segment("CENTRAL PARK") == ("CENTRAL PARK", "", "")
+
+
+def test_lookup_matches_scan(permits_path, tmp_path):
+    """Test block, cross street and date-range lookups return the rows a full scan finds"""
+    index_path = tmp_path / "streets.sqlite"
+    assert update_index(permits_path, index_path, chunksize=700)["mode"] == "full"
+    permits = pd.read_csv(permits_path, dtype=str)
+    block = r"(?:^|,\s*)BROADWAY between (?:W|WEST) 44 (?:ST|STREET) and (?:W|WEST) 45 (?:ST|STREET)"
+    cross = r"(?:^|,\s*)BROADWAY between (?:W|WEST) 44 (?:ST|STREET) and|(?:^|,\s*)BROADWAY between \S+ 43 \S+ and (?:W|WEST) 44"
+    with StreetIndex(index_path) as index:
+        assert sorted(index.lookup("Broadway", ["W 45 St", "West 44th Street"])["row_id"]) == \
+            _scan(permits, block) != []
+        assert sorted(index.lookup("broadway", ["w 44 st"])["row_id"]) == _scan(permits, cross)
+        found = index.lookup("BROADWAY", since="2020-01-01", until="2020-06-30")
+        assert sorted(found["row_id"]) == _scan(permits, r"(?:^|,\s*)BROADWAY between", "2020-01-01", "2020-06-30")
+        assert found["StartDateTime"].is_monotonic_decreasing
+
+
+def test_update_indexes_appended_rows_only(permits_path, tmp_path):
+    """Test appended permits are indexed incrementally and a rewritten CSV is rebuilt"""
+    index_path = tmp_path / "streets.sqlite"
+    permits = pd.read_csv(permits_path, dtype=str)
+    permits.head(2_000).to_csv(permits_path, index=False)
+    update_index(permits_path, index_path)
+    assert update_index(permits_path, index_path)["mode"] == "unchanged"
+
+    permits.iloc[2_000:].to_csv(permits_path, mode="a", header=False, index=False)
+    stats = update_index(permits_path, index_path)
+    assert (stats["mode"], stats["rows"], stats["total_rows"]) == ("incremental", 1_000, 3_000)
+
+    with StreetIndex(index_path) as index:
+        appended = index.lookup("5 AVENUE")
+        assert sorted(appended["row_id"]) == _scan(permits, r"(?:^|,\s*)5 AVENUE between")
+        assert appended["EventID"].tolist() == permits.loc[appended["row_id"], "EventID"].tolist()
+
+    permits.iloc[::-1].to_csv(permits_path, index=False)
+    assert update_index(permits_path, index_path)["mode"] == "full"
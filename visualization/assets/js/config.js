@@ -1,5 +1,9 @@
 // config.js
 const CONFIG = {
+    data: {
+        format: 'json', // 'binary' to load the .bin/.manifest.json outputs (process_data.py --binary)
+        service: null // e.g. 'http://127.0.0.1:8765' to query query_service.py instead of static files
+    },
     map: {
         center: [40.7128, -74.0060], // NYC coordinates
         zoom: 11,
@@ -138,12 +138,17 @@ class Controls {
       }
   }
 
-  updateFilters() {
+  async updateFilters() {
       const index = parseInt(this.weekSlider.value);
       const selectedTypes = Array.from(this.permitTypesContainer.querySelectorAll('input:checked')).map(cb => cb.value);
       
       this.dataManager.updateFilters(index, selectedTypes);
-      this.mapViz.updateMap(this.dataManager.getFilteredData());
       this.updateDateDisplay();
+      try {
+          const data = await this.dataManager.fetchFilteredData();
+          if (data) this.mapViz.updateMap(data);
+      } catch (error) {
+          console.error('Error updating filters:', error);
+      }
   }
 }
\ No newline at end of file
@@ -7,17 +7,30 @@ class DataManager {
         this.selectedTypes = new Set();
         this.permitTypes = []; // Store permit types here
         this.availableWeeks = []; // Array of {year, week} objects in chronological order
+        this.cube = null; // Optional ZIP x week x type prefix-sum cube (see loadCube)
+        this.service = null; // Base URL of query_service.py when counts are fetched per filter
+        this.requestId = 0; // Latest /counts request; older responses are dropped
     }
 
     async loadData() {
         try {
-            const [weeklyResponse, totalResponse] = await Promise.all([
-                fetch('../../data_processing/data/processed/weekly_permits.json'),
-                fetch('../../data_processing/data/processed/total_by_type.json')
-            ]);
+            if (CONFIG.data && CONFIG.data.service && await this.connectService(CONFIG.data.service)) {
+                return true;
+            }
+            if (CONFIG.data && CONFIG.data.format === 'binary') {
+                [this.weeklyData, this.totalByType] = await Promise.all([
+                    this.loadBinaryTable('weekly_permits'),
+                    this.loadBinaryTable('total_by_type')
+                ]);
+            } else {
+                const [weeklyResponse, totalResponse] = await Promise.all([
+                    fetch('../../data_processing/data/processed/weekly_permits.json'),
+                    fetch('../../data_processing/data/processed/total_by_type.json')
+                ]);
 
-            this.weeklyData = await weeklyResponse.json();
-            this.totalByType = await totalResponse.json();
+                this.weeklyData = await weeklyResponse.json();
+                this.totalByType = await totalResponse.json();
+            }
             
             // Extract unique permit types
             this.permitTypes = [...new Set(this.totalByType.map(item => item.EventType))];
@@ -26,6 +39,8 @@ class DataManager {
             // Calculate available weeks after loading data
             this.calculateMinMaxWeeks();
 
+            await this.loadCube();
+
             return true;
         } catch (error) {
             console.error('Error loading data:', error);
@@ -33,6 +48,122 @@ class DataManager {
         }
     }
 
+    async connectService(baseUrl) {
+        // Only the filter axes are downloaded; counts are fetched per filter change
+        try {
+            const response = await fetch(`${baseUrl}/meta`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const meta = await response.json();
+
+            this.service = baseUrl;
+            this.permitTypes = meta.types;
+            this.selectedTypes = new Set(this.permitTypes);
+            this.availableWeeks = meta.weeks; // same order as the service's week indices
+            console.log(`Using query service ${baseUrl} (${this.availableWeeks.length} weeks)`);
+            return true;
+        } catch (error) {
+            console.warn('Query service unavailable, loading static files:', error);
+            this.service = null;
+            return false;
+        }
+    }
+
+    async fetchFilteredData() {
+        // Counts for the current filters: from the service when connected, else computed locally.
+        // Resolves to null if a newer request was issued meanwhile (e.g. while dragging the slider)
+        if (!this.service) return this.getFilteredData();
+
+        const requestId = ++this.requestId;
+        const params = new URLSearchParams();
+        if (this.currentWeek !== 0) params.set('weeks', String(this.currentWeek - 1));
+        if (this.selectedTypes.size !== this.permitTypes.length) {
+            params.set('types', [...this.selectedTypes].join(','));
+        }
+        if (this.selectedTypes.size === 0) return [];
+
+        // Responses carry ETags with Cache-Control: no-cache, so the browser revalidates (304)
+        const response = await fetch(`${this.service}/counts?${params}`);
+        if (!response.ok) throw new Error(`Query failed: HTTP ${response.status}`);
+        const data = await response.json();
+        return requestId === this.requestId ? data : null;
+    }
+
+    async loadBinaryTable(name) {
+        // Decode a dictionary-encoded typed-array table (see binary_format.py)
+        // into the same row objects the JSON files contain
+        const base = '../../data_processing/data/processed/';
+        const manifest = await (await fetch(`${base}${name}.manifest.json`)).json();
+        const buffer = await (await fetch(`${base}${manifest.data}`)).arrayBuffer();
+
+        const arrayTypes = {
+            uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array,
+            int32: Int32Array, float64: Float64Array
+        };
+        const columns = manifest.columns.map(col => ({
+            name: col.name,
+            values: new arrayTypes[col.dtype](buffer, col.offset, manifest.rows),
+            dictionary: col.dictionary
+        }));
+
+        const rows = new Array(manifest.rows);
+        for (let i = 0; i < manifest.rows; i++) {
+            const row = {};
+            for (const col of columns) {
+                row[col.name] = col.dictionary ? col.dictionary[col.values[i]] : col.values[i];
+            }
+            rows[i] = row;
+        }
+        return rows;
+    }
+
+    async loadCube() {
+        // The cube is optional: fall back to scanning weeklyData without it
+        try {
+            const manifestResponse = await fetch('../../data_processing/data/processed/permit_cube.json');
+            if (!manifestResponse.ok) return false;
+            const manifest = await manifestResponse.json();
+
+            const dataResponse = await fetch(`../../data_processing/data/processed/${manifest.data}`);
+            if (!dataResponse.ok) return false;
+
+            const [zips, weeks, types] = manifest.shape;
+            this.cube = {
+                zips: manifest.zips,
+                types: manifest.types,
+                typeIndex: new Map(manifest.types.map((type, i) => [type, i])),
+                weekIndex: new Map(manifest.weeks.map((w, i) => [`${w.year}-${w.week}`, i])),
+                numWeeks: weeks - 1,
+                numTypes: types,
+                cumulative: new Uint32Array(await dataResponse.arrayBuffer())
+            };
+            return true;
+        } catch (error) {
+            console.warn('Permit cube unavailable, using weekly rows:', error);
+            this.cube = null;
+            return false;
+        }
+    }
+
+    queryCube(weekStart, weekEnd) {
+        // Counts per ZIP for cube weeks [weekStart, weekEnd] and the selected types,
+        // from prefix sums: O(ZIPs x types), independent of the number of rows
+        const { zips, numWeeks, numTypes, cumulative } = this.cube;
+        const typeIdx = [...this.selectedTypes]
+            .map(type => this.cube.typeIndex.get(type))
+            .filter(i => i !== undefined);
+        const stride = (numWeeks + 1) * numTypes;
+
+        const result = [];
+        for (let z = 0; z < zips.length; z++) {
+            const lo = z * stride + weekStart * numTypes;
+            const hi = z * stride + (weekEnd + 1) * numTypes;
+            let count = 0;
+            for (const t of typeIdx) count += cumulative[hi + t] - cumulative[lo + t];
+            if (count > 0) result.push({ "ZipCode(s)": zips[z], permit_count: count });
+        }
+        return result;
+    }
+
     calculateMinMaxWeeks() {
         if (!this.weeklyData || this.weeklyData.length === 0) return;
 
@@ -62,6 +193,15 @@ class DataManager {
     }
 
     getFilteredData() {
+        if (this.cube) {
+            if (this.currentWeek === 0) return this.queryCube(0, this.cube.numWeeks - 1);
+
+            const weekInfo = this.getWeekFromIndex(this.currentWeek);
+            if (!weekInfo) return []; // Safety check
+            const index = this.cube.weekIndex.get(`${weekInfo.year}-${weekInfo.week}`);
+            return index === undefined ? [] : this.queryCube(index, index);
+        }
+
         if (this.currentWeek === 0) {
             // All Time: aggregate data across all weeks for selected types
             const aggregatedData = new Map(); // Use zipcode as key
@@ -7,6 +7,9 @@ class MapVisualization {
         this.legend = null;
         this.maxTotalPermits = 0;
         this.dataManager = dataManager;
+        this.boundaryLevels = null; // Simplified TopoJSON levels per zoom range, if available
+        this.currentLevel = null;
+        this.colorBuckets = null; // Precomputed bucket per ZIP cell and view (color_buckets.json)
     }
 
     async init() {
@@ -21,40 +24,133 @@ class MapVisualization {
             attribution: ' OpenStreetMap contributors'
         }).addTo(this.map);
 
-        await this.loadZipBoundaries();  // Make sure boundaries are loaded first
+        // Make sure boundaries are loaded first
+        await Promise.all([this.loadZipBoundaries(), this.loadColorBuckets()]);
 
         this.dataLayer = L.geoJSON(this.zipBoundaries, {
             style: this.styleFeature.bind(this),
             onEachFeature: this.onEachFeature.bind(this)
         }).addTo(this.map);
 
+        if (this.boundaryLevels) {
+            this.map.on('zoomend', () => this.onZoomEnd());
+        }
+
         this.updateLegend();
     }
 
     async loadZipBoundaries() {
         try {
+            // Prefer the simplified per-zoom TopoJSON levels; fall back to the full GeoJSON
+            const levelsResponse = await fetch('../../data_processing/data/processed/zip_permits.levels.json');
+            if (levelsResponse.ok) {
+                this.boundaryLevels = await levelsResponse.json();
+                await this.loadBoundaryLevel(this.levelForZoom(CONFIG.map.zoom));
+                return;
+            }
+
             const response = await fetch('../../data_processing/data/processed/zip_permits.geojson');
             if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
             
-            this.zipBoundaries = await response.json();
-            const allTotals = this.zipBoundaries.features
-                .map(f => f.properties.total_permits || 0)
-                .sort((a, b) => a - b);
-
-            this.maxTotalPermits = Math.max(...allTotals);
-            
+            this.setZipBoundaries(await response.json());
         } catch (error) {
             console.error('Error loading ZIP boundaries:', error);
         }
     }
 
+    async loadColorBuckets() {
+        try {
+            const response = await fetch('../../data_processing/data/processed/color_buckets.json');
+            if (!response.ok) return;
+            const buckets = await response.json();
+            buckets.zipIndex = new Map(buckets.zips.map((zip, i) => [zip, i]));
+            buckets.weekIndex = new Map(buckets.weeks.map((key, i) => [key, i]));
+            this.colorBuckets = buckets;
+        } catch (error) {
+            console.warn('Color buckets unavailable, bucketing in the browser:', error);
+        }
+    }
+
+    levelForZoom(zoom) {
+        const levels = this.boundaryLevels.levels;
+        return levels.find(level => zoom >= level.minZoom && zoom <= level.maxZoom)
+            || levels[zoom < levels[0].minZoom ? 0 : levels.length - 1];
+    }
+
+    async loadBoundaryLevel(level) {
+        const response = await fetch(`../../data_processing/data/processed/${level.file}`);
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+
+        const topology = await response.json();
+        this.setZipBoundaries(this.topologyToGeoJSON(topology, this.boundaryLevels.object));
+        this.currentLevel = level;
+    }
+
+    async onZoomEnd() {
+        const level = this.levelForZoom(this.map.getZoom());
+        if (level === this.currentLevel) return;
+
+        try {
+            await this.loadBoundaryLevel(level);
+            this.dataLayer.clearLayers();
+            this.dataLayer.addData(this.zipBoundaries);
+            const data = await this.dataManager.fetchFilteredData();
+            if (data) this.updateMap(data);
+        } catch (error) {
+            console.error('Error switching boundary level:', error);
+        }
+    }
+
+    topologyToGeoJSON(topology, objectName) {
+        // Decode quantized, delta-encoded shared arcs (see boundary_topology.py)
+        const [sx, sy] = topology.transform.scale;
+        const [tx, ty] = topology.transform.translate;
+        const arcs = topology.arcs.map(arc => {
+            let x = 0, y = 0;
+            return arc.map(([dx, dy]) => {
+                x += dx;
+                y += dy;
+                return [x * sx + tx, y * sy + ty];
+            });
+        });
+
+        const ring = refs => {
+            const points = [];
+            refs.forEach(ref => {
+                const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+                points.push(...(points.length ? arc.slice(1) : arc));
+            });
+            return points;
+        };
+
+        const features = topology.objects[objectName].geometries.map(geometry => ({
+            type: 'Feature',
+            properties: geometry.properties,
+            geometry: geometry.type === 'Polygon'
+                ? { type: 'Polygon', coordinates: geometry.arcs.map(ring) }
+                : geometry.type === 'MultiPolygon'
+                    ? { type: 'MultiPolygon', coordinates: geometry.arcs.map(part => part.map(ring)) }
+                    : null
+        }));
+        return { type: 'FeatureCollection', features };
+    }
+
+    setZipBoundaries(featureCollection) {
+        this.zipBoundaries = featureCollection;
+        const allTotals = this.zipBoundaries.features
+            .map(f => f.properties.total_permits || 0)
+            .sort((a, b) => a - b);
+
+        this.maxTotalPermits = Math.max(...allTotals);
+    }
+
     styleFeature(feature) {
         const isAllTime = this.dataManager.currentWeek === 0;
         const totalPermits = feature.properties.total_permits || 0;
         const weeklyPermits = feature.properties.permit_count || 0;
 
         return {
-            fillColor: this.getColor(isAllTime ? totalPermits : weeklyPermits, isAllTime),
+            fillColor: this.getColor(isAllTime ? totalPermits : weeklyPermits, isAllTime, feature.properties.postalCode),
             weight: 1,
             opacity: 1,
             color: 'white',
@@ -62,32 +158,76 @@ class MapVisualization {
         };
     }
 
-    getColor(value, isAllTime = false) {
-        const colors = CONFIG.colors.heatmap;
-        
+    colorBreaks(isAllTime = false) {
+        // Breaks for the current view; color-breaks.js (generated by process_data.py)
+        // adds per-type and per-week breaks in CONFIG.colors.views
+        const views = CONFIG.colors.views || {};
+        const { selectedTypes, permitTypes } = this.dataManager;
+        const allTypes = selectedTypes.size === permitTypes.length;
+
+        if (isAllTime) {
+            if (selectedTypes.size === 1 && views.types) {
+                return views.types[[...selectedTypes][0]] || CONFIG.colors.breaks;
+            }
+            return CONFIG.colors.breaks;
+        }
+        const week = this.dataManager.getWeekFromIndex(this.dataManager.currentWeek);
+        if (allTypes && week && views.weeks && views.weeks[`${week.year}-${week.week}`]) {
+            return views.weeks[`${week.year}-${week.week}`];
+        }
+        return views.weekly || [0, 1, 3, 6, 10, 15, Infinity];
+    }
+
+    usesConfigBreaks(isAllTime) {
+        // Without color-breaks.js the all-time view uses the hand-set CONFIG breaks,
+        // where bucket i covers (breaks[i], breaks[i + 1]] and bucket 0 includes zero
+        return isAllTime && !CONFIG.colors.views;
+    }
+
+    precomputedBucket(zipCode, isAllTime) {
+        // Bucket of this ZIP in color_buckets.json for the views it covers
+        // (all time for all or one type, a single week for all types), else null
+        const buckets = this.colorBuckets;
+        if (!buckets || !CONFIG.colors.views || zipCode === undefined) return null;
+        const zip = buckets.zipIndex.get(String(zipCode).trim());
+        if (zip === undefined) return null;
+        const { selectedTypes, permitTypes } = this.dataManager;
+        const allTypes = selectedTypes.size === permitTypes.length;
+
         if (isAllTime) {
-            // Use the new breaks for all-time view
+            if (allTypes) return buckets.all[zip];
+            const typeBuckets = selectedTypes.size === 1 ? buckets.types[[...selectedTypes][0]] : null;
+            return typeBuckets ? typeBuckets[zip] : null;
+        }
+        const week = this.dataManager.getWeekFromIndex(this.dataManager.currentWeek);
+        const index = allTypes && week ? buckets.weekIndex.get(`${week.year}-${week.week}`) : undefined;
+        return index === undefined ? null : buckets.weekly[index][zip];
+    }
+
+    getColor(value, isAllTime = false, zipCode = undefined) {
+        // Bucket 0 is no permits, bucket i covers (breaks[i - 1], breaks[i]],
+        // the last bucket everything above breaks[breaks.length - 2]
+        const colors = CONFIG.colors.heatmap;
+        const bucket = this.precomputedBucket(zipCode, isAllTime);
+        if (bucket !== null) return colors[bucket];
+        if (this.usesConfigBreaks(isAllTime)) {
             const breaks = CONFIG.colors.breaks;
             for (let i = 0; i < breaks.length - 1; i++) {
-                if (value <= breaks[i + 1]) {
-                    return colors[i];
-                }
+                if (value <= breaks[i + 1]) return colors[i];
             }
             return colors[colors.length - 1];
         }
-
-        // Weekly view - preserve original behavior
         if (value <= 0) return colors[0];
-        if (value <= 1) return colors[1];
-        if (value <= 3) return colors[2];
-        if (value <= 6) return colors[3];
-        if (value <= 10) return colors[4];
-        if (value <= 15) return colors[5];
-        return colors[6];  // > 15
+        const breaks = this.colorBreaks(isAllTime);
+        for (let i = 1; i < breaks.length - 1; i++) {
+            if (value <= breaks[i]) return colors[i];
+        }
+        return colors[Math.min(breaks.length - 1, colors.length - 1)];
     }
 
     onEachFeature(feature, layer) {
         const zipCode = feature.properties.postalCode;
+        const isAllTime = () => this.dataManager.currentWeek === 0;
         layer.bindPopup(this.getPopupContent(zipCode, feature.properties.permit_count || 0));
 
         layer.on({
@@ -96,7 +236,7 @@ class MapVisualization {
                 e.target.setStyle({
                     weight: 2,
                     fillOpacity: 0.9,
-                    fillColor: this.getColor(permits, this.dataManager.currentWeek === 0)
+                    fillColor: this.getColor(permits, isAllTime(), zipCode)
                 });
             },
             mouseout: e => {
@@ -104,7 +244,7 @@ class MapVisualization {
                 e.target.setStyle({
                     weight: 1,
                     fillOpacity: 0.7,
-                    fillColor: this.getColor(permits, this.dataManager.currentWeek === 0)
+                    fillColor: this.getColor(permits, isAllTime(), zipCode)
                 });
             }
         });
@@ -136,7 +276,7 @@ class MapVisualization {
 
             layer.feature.properties.permit_count = permits;
             layer.setStyle({
-                fillColor: this.getColor(permits, this.dataManager.currentWeek === 0)
+                fillColor: this.getColor(permits, this.dataManager.currentWeek === 0, zipCode)
             }).setPopupContent(this.getPopupContent(zipCode, permits));
         });
 
@@ -159,32 +299,26 @@ class MapVisualization {
             const div = L.DomUtil.create('div', 'info legend');
             const colors = CONFIG.colors.heatmap;
             
-            if (this.dataManager.currentWeek === 0) {
-                // All-time view legend
-                const breaks = CONFIG.colors.breaks;
-                div.innerHTML = `
-                    <h4>Total Permits</h4>
-                    <div><i style="background:${colors[0]}"></i> 0</div>
-                    <div><i style="background:${colors[1]}"></i> 1-${breaks[2]}</div>
-                    <div><i style="background:${colors[2]}"></i> ${breaks[2]}-${breaks[3]}</div>
-                    <div><i style="background:${colors[3]}"></i> ${breaks[3]}-${breaks[4]}</div>
-                    <div><i style="background:${colors[4]}"></i> ${breaks[4]}-${breaks[5]}</div>
-                    <div><i style="background:${colors[5]}"></i> ${breaks[5]}-${breaks[6]}</div>
-                    <div><i style="background:${colors[6]}"></i> >${breaks[6]}</div>
-                `;
+            const isAllTime = this.dataManager.currentWeek === 0;
+            const breaks = this.colorBreaks(isAllTime);
+            const rows = [];
+            if (this.usesConfigBreaks(isAllTime)) {
+                for (let i = 0; i < breaks.length - 1; i++) {
+                    const low = i === 0 ? 0 : breaks[i] + 1;
+                    rows.push(`<div><i style="background:${colors[i]}"></i> ${low}-${breaks[i + 1]}</div>`);
+                }
+                rows.push(`<div><i style="background:${colors[colors.length - 1]}"></i> >${breaks[breaks.length - 1]}</div>`);
             } else {
-                // Weekly view legend
-                div.innerHTML = `
-                    <h4>Weekly Permits</h4>
-                    <div><i style="background:${colors[0]}"></i> 0</div>
-                    <div><i style="background:${colors[1]}"></i> 1</div>
-                    <div><i style="background:${colors[2]}"></i> 2-3</div>
-                    <div><i style="background:${colors[3]}"></i> 4-6</div>
-                    <div><i style="background:${colors[4]}"></i> 7-10</div>
-                    <div><i style="background:${colors[5]}"></i> 11-15</div>
-                    <div><i style="background:${colors[6]}"></i> >15</div>
-                `;
+                rows.push(`<div><i style="background:${colors[0]}"></i> 0</div>`);
+                for (let i = 1; i < breaks.length - 1; i++) {
+                    if (i > 1 && breaks[i] <= breaks[i - 1]) continue; // empty bucket
+                    const low = breaks[i - 1] + 1;
+                    const label = low >= breaks[i] ? `${breaks[i]}` : `${low}-${breaks[i]}`;
+                    rows.push(`<div><i style="background:${colors[i]}"></i> ${label}</div>`);
+                }
+                rows.push(`<div><i style="background:${colors[breaks.length - 1]}"></i> >${breaks[breaks.length - 2]}</div>`);
             }
+            div.innerHTML = `<h4>${isAllTime ? 'Total Permits' : 'Weekly Permits'}</h4>${rows.join('')}`;
             
             return div;
         };